@@ -1,23 +1,37 @@
-from datetime import date
-from typing import Optional, List
-from fastapi import HTTPException, Depends, status
-from fastapi.security import OAuth2PasswordBearer
+import asyncio
+import logging
+from datetime import date, datetime, time
+from typing import Optional, List, Literal, Tuple
+from fastapi import HTTPException, Depends, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from pydantic import BaseModel
-from core.database import get_db
-from core.security import get_current_user
+from pydantic import BaseModel, Field
+from core.config import settings
+from core.database import get_db, pooled_session
+from core.security import get_current_user, oauth2_scheme
+from core.admission import tenant_of
+from api.v1.models.user import User
+from api.v1.services.sensor_registry import sensor_registry
+from api.v1.services.alert_engine import alert_engine
+from api.v1.models.alert import AlertRuleCreate, AlertRuleCRUD
+from api.v1.models.carbon_ledger import CarbonLedgerCRUD, InsufficientBalance
+from api.v1.models.building import building_registry
+from api.v1.services.esg_service import shared_aggregates
+from api.v1.services.hot_store import hot_store
+
+logger = logging.getLogger(__name__)
 
 # ----------------------------
 # Modele Pydantic (walidacja danych)
 # ----------------------------
 
 class ESGDataResponse(BaseModel):
-    co2_emissions_kg: float
-    energy_kwh: float
-    water_m3: float
-    waste_kg: float
-    air_quality: dict
-    goals: dict
+    co2_emissions_kg: Optional[float] = None
+    energy_kwh: Optional[float] = None
+    water_m3: Optional[float] = None
+    waste_kg: Optional[float] = None
+    air_quality: dict = {}
+    goals: dict = {}
+    partial: List[str] = []  # części, których nie udało się pobrać na czas
 
 class Sensor(BaseModel):
     sensor_id: str
@@ -30,6 +44,9 @@ class AlertConfig(BaseModel):
     sensor_type: str
     threshold: float
     notify_emails: List[str]
+    direction: Literal["above", "below"] = "above"
+    hysteresis: float = Field(0.0, ge=0)
+    debounce_seconds: float = Field(0.0, ge=0)
 
 class ReportRequest(BaseModel):
     report_type: str
@@ -39,9 +56,14 @@ class ReportRequest(BaseModel):
 
 class OffsetPurchase(BaseModel):
     tenant_id: str
-    co2_amount_kg: float
+    co2_amount_kg: float = Field(..., gt=0)
     provider: str
 
+class TenantBuildingAssignment(BaseModel):
+    tenant_id: str
+    building_id: str
+    share: float = Field(1.0, gt=0, le=1)
+
 # ----------------------------
 # Funkcje kontrolera
 # ----------------------------
@@ -50,8 +72,7 @@ async def get_esg_data(
     building_id: str,
     date_from: Optional[date] = None,
     date_to: Optional[date] = None,
-    db: AsyncSession = Depends(get_db),
-    current_user: dict = Depends(get_current_user)
+    token: str = Depends(oauth2_scheme)
 ) -> ESGDataResponse:
     """
     Pobiera dane ESG dla budynku z uwzględnieniem filtrów czasowych.
@@ -60,90 +81,209 @@ async def get_esg_data(
         building_id: ID budynku (np. "building_123")
         date_from: Data początkowa (opcjonalna)
         date_to: Data końcowa (opcjonalna)
-        db: Sesja bazy danych
-        current_user: Zalogowany użytkownik (JWT)
+        token: Token JWT; użytkownik jest sprawdzany na krótkiej sesji,
+            oddanej do puli przed zapytaniami części (bez get_db, żeby
+            żądanie nie trzymało połączenia, czekając na kolejne)
     
     Returns:
-        ESGDataResponse: Dane ESG w formacie JSON
+        ESGDataResponse: Dane ESG w formacie JSON (pole partial wymienia
+        części, które nie zdążyły w OVERVIEW_PART_TIMEOUT lub nie są pełne)
     
     Raises:
         HTTPException 404: Jeśli budynek nie istnieje
-        HTTPException 403: Brak uprawnień
+        HTTPException 401: Nieprawidłowy token
     """
-    # Przykładowa logika (w praktyce zapytanie do DB/czujników)
-    if building_id != "building_123":
+    async with pooled_session() as session:
+        await get_current_user(token, session)
+        building = await building_registry.fetch(session, building_id)
+    if building is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Budynek nie istnieje"
         )
-    
+
+    date_to = date_to or date.today()
+    date_from = date_from or date(date_to.year, 1, 1)
+    start = datetime.combine(date_from, time.min)
+    end = datetime.combine(date_to, time.max)
+
+    # Części są niezależne i biegną równolegle, każda zapytaniowa na własnym
+    # połączeniu z puli; czas odpowiedzi ~ najwolniejsza część, nie suma.
+    totals, baseline, air_quality = await asyncio.gather(
+        _overview_part("totals", shared_aggregates(building_id, start, end)),
+        _overview_part("baseline", shared_aggregates(building_id, _year_earlier(start), _year_earlier(end))),
+        _overview_part("air_quality", _air_quality(building_id, start, end)),
+    )
+
+    air_quality, air_quality_complete = air_quality or ({}, False)
+    partial = [
+        name for name, value in (("totals", totals), ("goals", baseline))
+        if value is None
+    ]
+    if not air_quality_complete:
+        partial.append("air_quality")
+    totals = totals or {}
     return ESGDataResponse(
-        co2_emissions_kg=1200,
-        energy_kwh=5000,
-        water_m3=200,
-        waste_kg=150,
-        air_quality={
-            "co2_ppm": 800,
-            "pm2_5": 12,
-            "temperature_c": 22.5
-        },
-        goals={
-            "target_co2_kg": 900,
-            "progress": 75
-        }
+        co2_emissions_kg=totals.get("total_co2"),
+        energy_kwh=totals.get("total_energy"),
+        water_m3=totals.get("total_water"),
+        waste_kg=totals.get("total_waste"),
+        air_quality=air_quality,
+        goals=_goal_progress(totals.get("total_co2"), baseline) if baseline is not None else {},
+        partial=partial
     )
 
 async def list_building_sensors(
     building_id: str,
-    db: AsyncSession = Depends(get_db),
-    current_user: dict = Depends(get_current_user)
+    current_user: User = Depends(get_current_user)
 ) -> List[Sensor]:
     """
     Zwraca listę wszystkich czujników w budynku.
+
+    Dane pochodzą z rejestru ostatnich odczytów w pamięci (zasilanego
+    przez integracje MQTT/BACnet), więc zapytanie nie trafia do bazy.
     """
-    # Przykładowe dane - w praktyce zapytanie do DB
     return [
-        Sensor(
-            sensor_id="temp-1a",
-            type="temperature",
-            last_value=22.5,
-            unit="C",
-            last_update="2025-03-30T12:00:00Z"
-        ),
-        Sensor(
-            sensor_id="co2-2b",
-            type="co2",
-            last_value=800,
-            unit="ppm",
-            last_update=None
-        )
+        _sensor_from_state(state)
+        for state in sensor_registry.list_building(building_id)
     ]
 
+async def get_sensor_latest(
+    building_id: str,
+    sensor_id: str,
+    current_user: User = Depends(get_current_user)
+) -> Sensor:
+    """
+    Zwraca ostatni odczyt pojedynczego czujnika.
+
+    Raises:
+        HTTPException 404: Jeśli czujnik nie jest znany
+    """
+    state = sensor_registry.latest(building_id, sensor_id)
+    if state is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Czujnik nie istnieje"
+        )
+    return _sensor_from_state(state)
+
+async def _overview_part(name: str, coro):
+    """Jedna część przeglądu z limitem czasu; błąd lub timeout daje None (wynik częściowy)"""
+    try:
+        return await asyncio.wait_for(coro, timeout=settings.OVERVIEW_PART_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.warning(f"ESG overview part '{name}' timed out")
+    except Exception as e:
+        logger.warning(f"ESG overview part '{name}' failed: {str(e)}")
+    return None
+
+def _year_earlier(value: datetime) -> datetime:
+    try:
+        return value.replace(year=value.year - 1)
+    except ValueError:  # 29 lutego
+        return value.replace(year=value.year - 1, day=28)
+
+async def _air_quality(building_id: str, start: datetime, end: datetime) -> Tuple[dict, bool]:
+    """
+    Średnie z czujników wg typu w zakresie, z okna w pamięci. Czujniki,
+    których okno nie obejmuje zakresu, są pomijane (ostatni odczyt nie
+    zastępuje średniej), a wynik oznaczany jako niepełny (False).
+    """
+    readings = {}
+    complete = True
+    for state in sensor_registry.list_building(building_id):
+        points = None
+        if settings.HOT_STORE_ENABLED:
+            points = hot_store.query(building_id, f"sensor:{state['sensor_id']}", start, end)
+        if points is None:
+            complete = False
+            continue
+        if points:
+            readings.setdefault(state["type"], []).extend(value for _, value in points)
+    averages = {
+        sensor_type: round(sum(values) / len(values), 2)
+        for sensor_type, values in readings.items()
+    }
+    return averages, complete
+
+def _goal_progress(current_co2: Optional[float], baseline: dict) -> dict:
+    baseline_co2 = baseline.get("total_co2")
+    if not baseline_co2:
+        return {"target_co2_kg": None, "progress": None}
+    target = baseline_co2 * (1 - settings.CO2_REDUCTION_TARGET)
+    progress = None
+    if current_co2 is not None:
+        achieved = (baseline_co2 - current_co2) / (baseline_co2 - target)
+        progress = round(min(max(achieved, 0.0), 1.0) * 100, 1)
+    return {"target_co2_kg": round(target, 2), "progress": progress}
+
+def _sensor_from_state(state: dict) -> Sensor:
+    last_update = state["last_update"]
+    return Sensor(
+        sensor_id=state["sensor_id"],
+        type=state["type"],
+        last_value=state["last_value"],
+        unit=state["unit"],
+        last_update=f"{last_update.isoformat()}Z" if last_update else None
+    )
+
 async def create_alert(
     building_id: str,
     alert_config: AlertConfig,
     db: AsyncSession = Depends(get_db),
-    current_user: dict = Depends(get_current_user)
+    current_user: User = Depends(get_current_user)
 ) -> dict:
     """
     Ustawia próg alertu dla czujnika w budynku.
+
+    Reguła jest zapisywana w bazie i od razu rejestrowana w silniku
+    alertów, który sprawdza ją przy każdym przychodzącym odczycie.
     """
-    if current_user["role"] not in ["tenant_admin", "building_manager"]:
+    if current_user.role not in ["tenant_admin", "building_manager"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Brak uprawnień"
         )
     
-    # Tutaj logika zapisu do DB
+    rule = await AlertRuleCRUD.create(
+        db,
+        AlertRuleCreate(building_id=building_id, **alert_config.dict())
+    )
+    alert_engine.add_rule(rule)
     return {
         "status": "alert_created",
-        "alert_id": f"alert-{building_id}-{alert_config.sensor_type}"
+        "alert_id": rule.id
     }
 
+async def delete_alert(
+    building_id: str,
+    alert_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+) -> dict:
+    """
+    Wyłącza regułę alertu.
+    """
+    if current_user.role not in ["tenant_admin", "building_manager"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Brak uprawnień"
+        )
+
+    # Reguła jest wyszukiwana po (id, building_id), więc nie da się wyłączyć
+    # reguły innego budynku; silnik jest aktualizowany dopiero po commicie
+    if not await AlertRuleCRUD.deactivate(db, alert_id, building_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Alert nie istnieje"
+        )
+    alert_engine.remove_rule(alert_id)
+    return {"status": "alert_deleted", "alert_id": alert_id}
+
 async def generate_esg_report(
     report_request: ReportRequest,
     db: AsyncSession = Depends(get_db),
-    current_user: dict = Depends(get_current_user)
+    current_user: User = Depends(get_current_user)
 ) -> dict:
     """
     Generuje raport ESG w wybranym formacie (PDF/JSON).
@@ -171,18 +311,101 @@ async def generate_esg_report(
             "download_url": f"/reports/{report_request.building_id}.pdf"
         }
 
+def _require_tenant_access(current_user: User, request: Request, tenant_id: str) -> None:
+    """
+    Administrator i zarządca budynków działają w imieniu dowolnego najemcy,
+    pozostali użytkownicy tylko najemcy z własnego tokenu (claim tenant_id).
+    """
+    if current_user.role in ("admin", "building_manager"):
+        return
+    if tenant_of(request) != tenant_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Brak dostępu do bilansu tego najemcy"
+        )
+
 async def purchase_carbon_offsets(
     offset_data: OffsetPurchase,
+    request: Request,
     db: AsyncSession = Depends(get_db),
-    current_user: dict = Depends(get_current_user)
+    current_user: User = Depends(get_current_user)
 ) -> dict:
     """
     Realizuje zakup offsetów węglowych.
+
+    Zakup jest jedną krótką transakcją: blokada wiersza bilansu najemcy
+    (SELECT ... FOR UPDATE), zapis transakcji i aktualizacja bilansu.
+
+    Raises:
+        HTTPException 403: Zakup dla innego najemcy
+        HTTPException 409: Jeśli ilość przekracza niezrównoważoną emisję
     """
-    # Symulacja transakcji
+    _require_tenant_access(current_user, request, offset_data.tenant_id)
+    cost_eur = offset_data.co2_amount_kg * 0.05  # 5 EUR/tonę
+    try:
+        transaction = await CarbonLedgerCRUD.purchase(
+            db,
+            offset_data.tenant_id,
+            offset_data.co2_amount_kg,
+            cost_eur,
+            offset_data.provider
+        )
+    except InsufficientBalance as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
     return {
-        "transaction_id": f"txn-{offset_data.tenant_id[:4]}",
-        "co2_offset_kg": offset_data.co2_amount_kg,
-        "certificate_url": f"https://offsets.globalworth.com/txn-{offset_data.tenant_id[:4]}.pdf",
-        "cost_eur": offset_data.co2_amount_kg * 0.05  # 5 EUR/tonę
-    }
\ No newline at end of file
+        "transaction_id": transaction.id,
+        "co2_offset_kg": transaction.co2_amount_kg,
+        "certificate_url": f"https://offsets.globalworth.com/{transaction.id}.pdf",
+        "cost_eur": transaction.cost_eur
+    }
+
+async def get_carbon_balance(
+    tenant_id: str,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+) -> dict:
+    """
+    Zwraca bilans CO2 najemcy (odczyt jednego wiersza po kluczu).
+
+    Raises:
+        HTTPException 403: Bilans innego najemcy
+    """
+    _require_tenant_access(current_user, request, tenant_id)
+    ledger = await CarbonLedgerCRUD.get_balance(db, tenant_id)
+    emitted = ledger.emitted_co2_kg if ledger else 0.0
+    offset = ledger.offset_co2_kg if ledger else 0.0
+    return {
+        "tenant_id": tenant_id,
+        "emitted_co2_kg": emitted,
+        "offset_co2_kg": offset,
+        "net_co2_kg": emitted - offset,
+        "updated_at": ledger.updated_at.isoformat() if ledger and ledger.updated_at else None
+    }
+
+async def assign_tenant_building(
+    assignment: TenantBuildingAssignment,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+) -> dict:
+    """
+    Przypisuje najemcy udział w emisjach budynku.
+
+    Udział decyduje, którym najemcom są naliczane emisje budynku, dlatego
+    może go zmieniać tylko administrator lub zarządca budynków. Działa
+    wyłącznie na kolejne zapisy, korekty i usunięcia odczytów: bilans z
+    wcześniejszych odczytów nie jest przeliczany, a ponowny import lub
+    korekta starych odczytów nalicza je już według nowego udziału.
+    """
+    if current_user.role not in ["admin", "building_manager"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Brak uprawnień"
+        )
+    await CarbonLedgerCRUD.assign_building(
+        db, assignment.tenant_id, assignment.building_id, assignment.share
+    )
+    return {"status": "assigned", **assignment.dict()}
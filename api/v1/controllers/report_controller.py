@@ -1,14 +1,19 @@
 from datetime import datetime
-from fastapi import HTTPException, Depends, status
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import HTTPException, Depends, Request, status
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
-from typing import Optional, Literal
+from typing import Optional, Literal, List
 import json
 import os
 from pathlib import Path
 from core.database import get_db
 from core.security import get_current_user
+from api.v1.models.user import User
+from core.http_cache import make_etag, not_modified, set_validators
+from api.v1.models.data_version import DataVersionCRUD, metrics_scope
+from api.v1.services.esg_service import ESGService
+from api.v1.services.report_service import ReportService
 
 # ----------------------------
 # Modele Pydantic
@@ -21,6 +26,11 @@ class ReportRequest(BaseModel):
     format: Literal["pdf", "json"] = "json"
     filters: Optional[dict] = None
 
+class PortfolioReportRequest(BaseModel):
+    year: int
+    building_ids: Optional[List[str]] = None  # domyślnie wszystkie budynki z danymi
+    format: Literal["pdf", "json"] = "json"
+
 class ReportResponse(BaseModel):
     report_id: str
     generated_at: datetime
@@ -35,7 +45,7 @@ class ReportResponse(BaseModel):
 async def generate_report(
     request: ReportRequest,
     db: AsyncSession = Depends(get_db),
-    current_user: dict = Depends(get_current_user)
+    current_user: User = Depends(get_current_user)
 ):
     """
     Generuje raport ESG w wybranym formacie (PDF/JSON).
@@ -54,7 +64,7 @@ async def generate_report(
     """
     
     # Sprawdzenie uprawnień
-    if current_user["role"] not in ["tenant_admin", "building_manager"]:
+    if current_user.role not in ["tenant_admin", "building_manager"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Wymagane uprawnienia administratora"
@@ -74,6 +84,73 @@ async def generate_report(
     else:
         return await _generate_pdf_report(report_data, request)
 
+async def get_report(
+    building_id: str,
+    year: int,
+    http_request: Request,
+    report_type: Literal["csrd", "annual", "custom"] = "csrd",
+    format: Literal["pdf", "json"] = "json",
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Wariant GET generowania raportu z obsługą zapytań warunkowych.
+
+    ETag i Last-Modified wynikają z wersji danych budynku, więc gdy od
+    poprzedniego pobrania nie było zapisów, zwracane jest 304 bez
+    odpytywania bazy i generowania raportu.
+    """
+    scope = metrics_scope(building_id)
+    version, last_modified = await DataVersionCRUD.get(db, scope)
+    etag = make_etag(scope, version, http_request)
+    cached = not_modified(http_request, etag, last_modified, exists=version > 0)
+    if cached is not None:
+        return cached
+
+    request = ReportRequest(
+        report_type=report_type,
+        building_id=building_id,
+        year=year,
+        format=format
+    )
+    response = await generate_report(request, db, current_user)
+    return set_validators(response, etag, last_modified)
+
+async def generate_portfolio_report(
+    request: PortfolioReportRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+) -> StreamingResponse:
+    """
+    Generuje raporty ESG dla całego portfela jako jedno archiwum ZIP.
+
+    Agregaty wszystkich budynków pochodzą z jednego zapytania grupującego,
+    dokumenty renderowane są równolegle w procesach roboczych, a archiwum
+    wysyłane jest w trakcie tworzenia.
+
+    Raises:
+        HTTPException 400: Nieprawidłowy format
+        HTTPException 403: Brak uprawnień
+    """
+    if current_user.role not in ["tenant_admin", "building_manager"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Wymagane uprawnienia administratora"
+        )
+
+    service = ReportService(ESGService(db))
+    stream = await service.generate_portfolio_report(
+        request.year,
+        request.building_ids,
+        request.format
+    )
+    filename = f"esg_portfolio_{request.year}_{request.format}.zip"
+    return StreamingResponse(
+        stream,
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 # ----------------------------
 # Funkcje prywatne
 # ----------------------------
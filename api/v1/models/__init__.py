@@ -6,6 +6,31 @@ from .esg_metrics import (
     EsgMetricResponse,
     EsgMetricsCRUD
 )
+from .sensor import (
+    DBSensorState,
+    DBSensorReading,
+    DBTrendLogCursor,
+    SensorStateCRUD,
+    SensorReadingCRUD
+)
+from .alert import DBAlertRule, AlertRuleCreate, AlertRuleResponse, AlertRuleCRUD
+from .data_version import DBDataVersion, DataVersionCRUD
+from .sketch import DBMetricSketch, MetricSketchCRUD
+from .compact_metrics import DBBuildingKey, DBMetricSource, DBCompactMetric, CompactMetricsCRUD
+from .emission_factors import (
+    DBGridIntensity,
+    DBBuildingGridZone,
+    DBEnergyContract,
+    DBScope2Emission,
+    GridIntensityPoint,
+    EmissionFactorCRUD
+)
+from .carbon_ledger import (
+    DBTenantBuilding,
+    DBCarbonLedger,
+    DBOffsetTransaction,
+    CarbonLedgerCRUD
+)
 
 __all__ = [
     "User",
@@ -15,5 +40,32 @@ __all__ = [
     "DBEscMetrics",
     "EsgMetricCreate",
     "EsgMetricResponse",
-    "EsgMetricsCRUD"
+    "EsgMetricsCRUD",
+    "DBSensorState",
+    "DBSensorReading",
+    "DBTrendLogCursor",
+    "SensorStateCRUD",
+    "SensorReadingCRUD",
+    "DBAlertRule",
+    "AlertRuleCreate",
+    "AlertRuleResponse",
+    "AlertRuleCRUD",
+    "DBDataVersion",
+    "DataVersionCRUD",
+    "DBMetricSketch",
+    "MetricSketchCRUD",
+    "DBBuildingKey",
+    "DBMetricSource",
+    "DBCompactMetric",
+    "CompactMetricsCRUD",
+    "DBGridIntensity",
+    "DBBuildingGridZone",
+    "DBEnergyContract",
+    "DBScope2Emission",
+    "GridIntensityPoint",
+    "EmissionFactorCRUD",
+    "DBTenantBuilding",
+    "DBCarbonLedger",
+    "DBOffsetTransaction",
+    "CarbonLedgerCRUD"
 ]
\ No newline at end of file
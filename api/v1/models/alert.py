@@ -0,0 +1,97 @@
+import uuid
+from datetime import datetime
+from typing import List, Literal, Optional
+from pydantic import BaseModel, Field
+from sqlalchemy import Column, String, Float, DateTime, JSON, Boolean, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from core.database import Base
+from api.v1.models.data_version import DataVersionCRUD, ALERT_RULES_SCOPE
+
+# ----------------------------
+# Database Model (SQLAlchemy)
+# ----------------------------
+
+class DBAlertRule(Base):
+    """Threshold alert rule for a sensor type in a building"""
+    __tablename__ = "alert_rules"
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    building_id = Column(String(36), index=True, nullable=False)
+    sensor_type = Column(String(32), nullable=False)
+    threshold = Column(Float, nullable=False)
+    direction = Column(String(5), nullable=False, default="above")
+    hysteresis = Column(Float, nullable=False, default=0.0)
+    debounce_seconds = Column(Float, nullable=False, default=0.0)
+    notify_emails = Column(JSON, default=[])
+    is_active = Column(Boolean, default=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+# ----------------------------
+# Pydantic Models (API)
+# ----------------------------
+
+class AlertRuleCreate(BaseModel):
+    building_id: str
+    sensor_type: str
+    threshold: float
+    direction: Literal["above", "below"] = "above"
+    hysteresis: float = Field(0.0, ge=0, description="Distance back past the threshold needed to clear the alert")
+    debounce_seconds: float = Field(0.0, ge=0, description="How long the condition must hold before firing")
+    notify_emails: List[str] = []
+
+class AlertRuleResponse(AlertRuleCreate):
+    id: str
+    created_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+# ----------------------------
+# CRUD Operations
+# ----------------------------
+
+class AlertRuleCRUD:
+    """Handles all database operations for alert rules"""
+
+    @staticmethod
+    async def create(db: AsyncSession, rule: AlertRuleCreate) -> DBAlertRule:
+        db_rule = DBAlertRule(**rule.dict())
+        db.add(db_rule)
+        await DataVersionCRUD.bump(db, ALERT_RULES_SCOPE)
+        await db.commit()
+        await db.refresh(db_rule)
+        return db_rule
+
+    @staticmethod
+    async def get_active(db: AsyncSession) -> List[DBAlertRule]:
+        result = await db.execute(
+            select(DBAlertRule).where(DBAlertRule.is_active.is_(True))
+        )
+        return result.scalars().all()
+
+    @staticmethod
+    async def get_by_building(db: AsyncSession, building_id: str) -> List[DBAlertRule]:
+        result = await db.execute(
+            select(DBAlertRule)
+            .where(DBAlertRule.building_id == building_id)
+            .where(DBAlertRule.is_active.is_(True))
+        )
+        return result.scalars().all()
+
+    @staticmethod
+    async def deactivate(db: AsyncSession, rule_id: str, building_id: str) -> bool:
+        """Deactivate a building's rule; False (nothing changed) if it is not an active rule of that building"""
+        result = await db.execute(
+            update(DBAlertRule)
+            .where(DBAlertRule.id == rule_id)
+            .where(DBAlertRule.building_id == building_id)
+            .where(DBAlertRule.is_active.is_(True))
+            .values(is_active=False)
+        )
+        if result.rowcount == 0:
+            await db.rollback()
+            return False
+        await DataVersionCRUD.bump(db, ALERT_RULES_SCOPE)
+        await db.commit()
+        return True
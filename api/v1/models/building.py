@@ -1,31 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Optional
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from typing import Annotated, List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from ..models.building import (
-    BuildingCreate,
-    BuildingResponse,
-    BuildingCRUD,
-    get_building_or_404,
-    DBBuilding
-)
-from core.database import get_db
+from sqlalchemy.future import select
+from core.database import Base, get_db
 from core.security import get_current_user
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import Column, String, DateTime, JSON
-import datetime
+from api.v1.models.user import User
+from core.admission import RateLimitDep
+from core.serialization import FastJSONResponse, rows_to_json
+from core.http_cache import make_etag, not_modified, set_validators
+from api.v1.models.data_version import DataVersionCRUD, BUILDINGS_SCOPE, building_scope
+from core.config import settings
+from sqlalchemy import Column, String, DateTime, JSON, func, true
+from api.v1.models.esg_metrics import DBEscMetrics
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
 from pydantic import BaseModel
-Base = declarative_base()
+import asyncio
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
 
 # Database Model
 class DBBuilding(Base):
     __tablename__ = "buildings"
-    id = Column(String(36), primary_key=True, index=True)
+    id = Column(String(36), primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
     name = Column(String(100), nullable=False)
     address = Column(String(200))
     certifications = Column(JSON, default=[])
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, onupdate=datetime.utcnow)
 
+# Columns returned by the fast (tuple-based) listing path
+BUILDING_ROW_COLUMNS = ("id", "name", "address", "created_at", "updated_at")
+
+# Metric columns of the latest reading / month-to-date totals in summary listings
+SUMMARY_METRICS = ("co2_kg", "energy_kwh", "water_m3", "waste_kg")
+
 # Pydantic Models
 class BuildingBase(BaseModel):
     name: str
@@ -41,16 +53,251 @@ class BuildingResponse(BuildingBase):
 
     class Config:
         orm_mode = True
-router = APIRouter(prefix="/buildings", tags=["Buildings"])
+
+# CRUD Operations
+class BuildingCRUD:
+    """Handles all database operations for buildings"""
+
+    @staticmethod
+    async def create(db: AsyncSession, building: BuildingCreate) -> DBBuilding:
+        db_building = DBBuilding(**building.dict())
+        db.add(db_building)
+        await db.flush()
+        await DataVersionCRUD.bump(db, BUILDINGS_SCOPE, building_scope(db_building.id))
+        await db.commit()
+        await db.refresh(db_building)
+        building_registry.put(db_building)
+        return db_building
+
+    @staticmethod
+    async def get(db: AsyncSession, building_id: str) -> Optional[DBBuilding]:
+        return await db.get(DBBuilding, building_id)
+
+    @staticmethod
+    def _page(query, skip: int, limit: int, after: Optional[str]):
+        """Keyset page by id when `after` (the last id of the previous page) is given, else offset"""
+        if after is not None:
+            query = query.where(DBBuilding.id > after)
+        return query.order_by(DBBuilding.id).offset(skip).limit(limit)
+
+    @staticmethod
+    async def get_all(
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[str] = None
+    ) -> List[DBBuilding]:
+        result = await db.execute(BuildingCRUD._page(select(DBBuilding), skip, limit, after))
+        return result.scalars().all()
+
+    @staticmethod
+    async def get_all_rows(db: AsyncSession, skip: int = 0, limit: int = 100, after: Optional[str] = None):
+        """Same as get_all but returns plain column tuples (no ORM entities)"""
+        columns = [getattr(DBBuilding, name) for name in BUILDING_ROW_COLUMNS]
+        result = await db.execute(BuildingCRUD._page(select(*columns), skip, limit, after))
+        return list(BUILDING_ROW_COLUMNS), result.all()
+
+    @staticmethod
+    async def get_summary_rows(
+        db: AsyncSession,
+        month_start: datetime,
+        limit: int = 100,
+        after: Optional[str] = None
+    ) -> List[dict]:
+        """
+        One page of buildings with each building's latest reading and its
+        totals since month_start, in a single query: the page is selected
+        first, then two LATERAL subqueries run once per building on it
+        (an index probe on (building_id, timestamp) each).
+        """
+        page = BuildingCRUD._page(
+            select(*(getattr(DBBuilding, name) for name in BUILDING_ROW_COLUMNS)), 0, limit, after
+        ).subquery("page")
+        latest = (
+            select(DBEscMetrics.timestamp, *(getattr(DBEscMetrics, name) for name in SUMMARY_METRICS))
+            .where(DBEscMetrics.building_id == page.c.id)
+            .order_by(DBEscMetrics.timestamp.desc())
+            .limit(1)
+            .lateral("latest")
+        )
+        month = (
+            select(*(func.sum(getattr(DBEscMetrics, name)).label(name) for name in SUMMARY_METRICS))
+            .where(DBEscMetrics.building_id == page.c.id)
+            .where(DBEscMetrics.timestamp >= month_start)
+            .lateral("month")
+        )
+        result = await db.execute(
+            select(
+                page,
+                latest.c.timestamp.label("latest_timestamp"),
+                *(latest.c[name].label(f"latest_{name}") for name in SUMMARY_METRICS),
+                *(month.c[name].label(f"month_{name}") for name in SUMMARY_METRICS)
+            )
+            .select_from(page.outerjoin(latest, true()).outerjoin(month, true()))
+            .order_by(page.c.id)
+        )
+        summaries = []
+        for row in result.mappings():
+            summary = {name: row[name] for name in BUILDING_ROW_COLUMNS}
+            summary["latest_reading"] = None if row["latest_timestamp"] is None else {
+                "timestamp": row["latest_timestamp"],
+                **{name: row[f"latest_{name}"] for name in SUMMARY_METRICS},
+            }
+            summary["month_to_date"] = {name: row[f"month_{name}"] or 0.0 for name in SUMMARY_METRICS}
+            summaries.append(summary)
+        return summaries
+
+    @staticmethod
+    async def update(db: AsyncSession, building_id: str, data: dict) -> Optional[DBBuilding]:
+        db_building = await db.get(DBBuilding, building_id)
+        if db_building is None:
+            return None
+        for key, value in data.items():
+            setattr(db_building, key, value)
+        await DataVersionCRUD.bump(db, BUILDINGS_SCOPE, building_scope(building_id))
+        await db.commit()
+        await db.refresh(db_building)
+        building_registry.put(db_building)
+        return db_building
+
+    @staticmethod
+    async def delete(db: AsyncSession, building_id: str) -> bool:
+        db_building = await db.get(DBBuilding, building_id)
+        if db_building is None:
+            return False
+        await db.delete(db_building)
+        await DataVersionCRUD.bump(db, BUILDINGS_SCOPE, building_scope(building_id))
+        await db.commit()
+        building_registry.remove(building_id)
+        return True
+
+# Building registry
+@dataclass(frozen=True)
+class CachedBuilding:
+    """Detached, immutable copy of a building row"""
+    id: str
+    name: str
+    address: Optional[str]
+    certifications: list
+    created_at: datetime
+    updated_at: Optional[datetime]
+
+    @classmethod
+    def from_db(cls, building: DBBuilding) -> "CachedBuilding":
+        return cls(
+            id=building.id,
+            name=building.name,
+            address=building.address,
+            certifications=list(building.certifications or []),
+            created_at=building.created_at,
+            updated_at=building.updated_at
+        )
+
+class BuildingRegistry:
+    """
+    In-process LRU of building metadata.
+
+    Local writes go through BuildingCRUD and update the registry directly.
+    Writes made by other processes are picked up by comparing the
+    "buildings" data version with the one the registry was loaded at. When
+    every building fits in memory the registry is complete, so a miss means
+    the building does not exist and no query is needed.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.version = -1
+        self.complete = False
+        self._items: "OrderedDict[str, CachedBuilding]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, building_id: str) -> Optional[CachedBuilding]:
+        building = self._items.get(building_id)
+        if building is not None:
+            self._items.move_to_end(building_id)
+        return building
+
+    def put(self, building: DBBuilding) -> CachedBuilding:
+        cached = CachedBuilding.from_db(building)
+        self._items[cached.id] = cached
+        self._items.move_to_end(cached.id)
+        if len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+            self.complete = False
+        return cached
+
+    def remove(self, building_id: str) -> None:
+        self._items.pop(building_id, None)
+
+    async def load(self, db: AsyncSession) -> int:
+        version, _ = await DataVersionCRUD.get(db, BUILDINGS_SCOPE)
+        buildings = await BuildingCRUD.get_all(db, 0, self.max_size + 1)
+        self._items = OrderedDict(
+            (b.id, CachedBuilding.from_db(b)) for b in buildings[:self.max_size]
+        )
+        self.complete = len(buildings) <= self.max_size
+        self.version = version
+        logger.info(f"Building registry loaded {len(self._items)} buildings (complete={self.complete})")
+        return len(self._items)
+
+    async def fetch(self, db: AsyncSession, building_id: str) -> Optional[CachedBuilding]:
+        cached = self.get(building_id)
+        if cached is not None:
+            return cached
+        if self.complete:
+            # Another process may have created it since the last load
+            version, _ = await DataVersionCRUD.get(db, BUILDINGS_SCOPE)
+            if version == self.version:
+                return None
+        building = await BuildingCRUD.get(db, building_id)
+        return self.put(building) if building is not None else None
+
+    async def refresh_if_stale(self, db: AsyncSession) -> bool:
+        version, _ = await DataVersionCRUD.get(db, BUILDINGS_SCOPE)
+        if version == self.version:
+            return False
+        await self.load(db)
+        return True
+
+    async def run_refresh(self, session_factory, interval: Optional[float] = None):
+        """Background loop reloading the registry when another process changed buildings"""
+        interval = interval or settings.BUILDING_REGISTRY_REFRESH
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with session_factory() as session:
+                    await self.refresh_if_stale(session)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Building registry refresh failed: {str(e)}")
+
+building_registry = BuildingRegistry(settings.BUILDING_REGISTRY_SIZE)
+
+async def get_building_or_404(
+    building_id: str,
+    db: AsyncSession = Depends(get_db)
+) -> CachedBuilding:
+    building = await building_registry.fetch(db, building_id)
+    if building is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Building not found"
+        )
+    return building
+
+router = APIRouter(prefix="/buildings", tags=["Buildings"], dependencies=[RateLimitDep])
 
 @router.post("/", response_model=BuildingResponse)
 async def create_building(
     building: BuildingCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: dict = Depends(get_current_user)
+    current_user: User = Depends(get_current_user)
 ):
     """Create new building (admin only)"""
-    if current_user["role"] != "admin":
+    if current_user.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only admins can create buildings"
@@ -59,29 +306,87 @@ async def create_building(
 
 @router.get("/{building_id}", response_model=BuildingResponse)
 async def read_building(
-    building: DBBuilding = Depends(get_building_or_404)
+    request: Request,
+    response: Response,
+    building: CachedBuilding = Depends(get_building_or_404),
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get building by ID"""
+    """Get building by ID (served from the registry, supports If-None-Match / If-Modified-Since)"""
+    scope = building_scope(building.id)
+    version, last_modified = await DataVersionCRUD.get(db, scope)
+    last_modified = last_modified or building.updated_at or building.created_at
+    etag = make_etag(scope, version, request)
+    cached = not_modified(request, etag, last_modified)
+    if cached is not None:
+        return cached
+
+    set_validators(response, etag, last_modified)
     return building
 
+def _next_cursor(response: Response, page_ids: List[str], limit: int) -> Response:
+    """A full page may have a successor: pass its last id back as ?after="""
+    if page_ids and len(page_ids) == limit:
+        response.headers["X-Next-Cursor"] = page_ids[-1]
+    return response
+
 @router.get("/", response_model=List[BuildingResponse])  # Use List[] for type hinting
 async def list_buildings(
-    skip: int = 0,
-    limit: int = 100,
+    request: Request,
+    response: Response,
+    skip: Annotated[int, Query(description="Offset pagination (deprecated, prefer after)")] = 0,
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+    after: Annotated[Optional[str], Query(description="Keyset cursor: X-Next-Cursor of the previous page")] = None,
+    include: Annotated[Optional[str], Query(
+        pattern="^summary$",
+        description="summary: add each building's latest reading and month-to-date totals"
+    )] = None,
+    fast: Annotated[bool, Query(description="Serialise column tuples directly, skipping ORM/Pydantic")] = False,
     db: AsyncSession = Depends(get_db)
 ):
-    """List all buildings"""
-    return await BuildingCRUD.get_all(db, skip, limit)
+    """
+    List buildings ordered by id (supports If-None-Match / If-Modified-Since).
+    Pages are walked with ?after=<X-Next-Cursor>; with include=summary each
+    building carries its latest reading and month-to-date totals.
+    """
+    if include == "summary":
+        if skip:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="include=summary is paged with after, not skip"
+            )
+        # Follows the metrics, which change far more often than the buildings
+        # scope, so this variant is not cached by validators
+        month_start = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        summaries = await BuildingCRUD.get_summary_rows(db, month_start, limit, after)
+        return _next_cursor(
+            FastJSONResponse(summaries), [summary["id"] for summary in summaries], limit
+        )
+
+    version, last_modified = await DataVersionCRUD.get(db, BUILDINGS_SCOPE)
+    etag = make_etag(BUILDINGS_SCOPE, version, request)
+    cached = not_modified(request, etag, last_modified)
+    if cached is not None:
+        return cached
+
+    if fast:
+        columns, rows = await BuildingCRUD.get_all_rows(db, skip, limit, after)
+        fast_response = FastJSONResponse(rows_to_json(columns, rows))
+        _next_cursor(fast_response, [row[0] for row in rows], limit)
+        return set_validators(fast_response, etag, last_modified)
+    set_validators(response, etag, last_modified)
+    buildings = await BuildingCRUD.get_all(db, skip, limit, after)
+    _next_cursor(response, [building.id for building in buildings], limit)
+    return buildings
 
 @router.put("/{building_id}", response_model=BuildingResponse)
 async def update_building(
     update_data: BuildingCreate,
-    building: DBBuilding = Depends(get_building_or_404),
+    building: CachedBuilding = Depends(get_building_or_404),
     db: AsyncSession = Depends(get_db),
-    current_user: dict = Depends(get_current_user)
+    current_user: User = Depends(get_current_user)
 ):
     """Update building details"""
-    if current_user["role"] not in ["admin", "building_manager"]:
+    if current_user.role not in ["admin", "building_manager"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Insufficient permissions"
@@ -90,13 +395,13 @@ async def update_building(
 
 @router.delete("/{building_id}")
 async def delete_building(
-    building: DBBuilding = Depends(get_building_or_404),
+    building: CachedBuilding = Depends(get_building_or_404),
     db: AsyncSession = Depends(get_db),
-    current_user: dict = Depends(get_current_user)
+    current_user: User = Depends(get_current_user)
 ):
     """Delete building (admin only)"""
-    if current_user["role"] != "admin":
+    if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
-    
+
     success = await BuildingCRUD.delete(db, building.id)
     return {"deleted": success}
\ No newline at end of file
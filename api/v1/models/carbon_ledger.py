@@ -0,0 +1,178 @@
+import uuid
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Column, String, Float, DateTime, DDL, event
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from core.database import Base
+from api.v1.models.esg_metrics import DBEscMetrics
+
+# ----------------------------
+# Database Models (SQLAlchemy)
+# ----------------------------
+
+class DBTenantBuilding(Base):
+    """Share of a building's emissions attributed to a tenant"""
+    __tablename__ = "tenant_buildings"
+
+    tenant_id = Column(String(36), primary_key=True)
+    building_id = Column(String(36), primary_key=True, index=True)
+    share = Column(Float, nullable=False, default=1.0)
+
+class DBCarbonLedger(Base):
+    """Running CO2 balance per tenant (emitted vs. offset)"""
+    __tablename__ = "tenant_carbon_ledger"
+
+    tenant_id = Column(String(36), primary_key=True)
+    emitted_co2_kg = Column(Float, nullable=False, default=0.0)
+    offset_co2_kg = Column(Float, nullable=False, default=0.0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class DBOffsetTransaction(Base):
+    __tablename__ = "carbon_offset_transactions"
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    tenant_id = Column(String(36), index=True, nullable=False)
+    co2_amount_kg = Column(Float, nullable=False)
+    cost_eur = Column(Float, nullable=False)
+    provider = Column(String(100), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+# ----------------------------
+# Ledger maintenance on ingest
+# ----------------------------
+
+# Every insert, upsert-overwrite or delete of metric rows adds the *difference*
+# in co2_kg to the ledgers of the buildings' tenants, inside the same
+# transaction. This keeps the single, bulk and CSV paths (and idempotent
+# retries) consistent without a read-before-write in the application.
+#
+# The triggers are per statement and read the transition tables: a batch is
+# summed per tenant first and each ledger row is then updated once, in
+# tenant_id order. Concurrent batches touching overlapping tenants therefore
+# take the row locks in the same order and cannot deadlock, and a batch of n
+# rows costs one ledger statement instead of n.
+_APPLY_DELTAS = """
+        INSERT INTO tenant_carbon_ledger (tenant_id, emitted_co2_kg, offset_co2_kg, updated_at)
+        SELECT tb.tenant_id, SUM(d.co2_kg * tb.share), 0, now()
+        FROM ({deltas}) d
+        JOIN tenant_buildings tb ON tb.building_id = d.building_id
+        GROUP BY tb.tenant_id
+        HAVING SUM(d.co2_kg * tb.share) <> 0
+        ORDER BY tb.tenant_id
+        ON CONFLICT (tenant_id) DO UPDATE
+        SET emitted_co2_kg = tenant_carbon_ledger.emitted_co2_kg + EXCLUDED.emitted_co2_kg,
+            updated_at = EXCLUDED.updated_at;"""
+
+LEDGER_TRIGGER_DDL = (
+    f"""
+CREATE OR REPLACE FUNCTION esg_metrics_carbon_ledger() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN{_APPLY_DELTAS.format(deltas="SELECT building_id, co2_kg FROM new_rows")}
+    ELSIF TG_OP = 'UPDATE' THEN{_APPLY_DELTAS.format(deltas=(
+        "SELECT building_id, co2_kg FROM new_rows "
+        "UNION ALL SELECT building_id, -co2_kg AS co2_kg FROM old_rows"
+    ))}
+    ELSE{_APPLY_DELTAS.format(deltas="SELECT building_id, -co2_kg AS co2_kg FROM old_rows")}
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+""",
+    # Per-row trigger of earlier deployments
+    "DROP TRIGGER IF EXISTS trg_esg_metrics_carbon_ledger ON esg_metrics",
+    # Transition tables require one trigger per event
+    "DROP TRIGGER IF EXISTS trg_esg_metrics_carbon_ledger_insert ON esg_metrics",
+    """
+CREATE TRIGGER trg_esg_metrics_carbon_ledger_insert
+AFTER INSERT ON esg_metrics
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION esg_metrics_carbon_ledger()
+""",
+    "DROP TRIGGER IF EXISTS trg_esg_metrics_carbon_ledger_update ON esg_metrics",
+    """
+CREATE TRIGGER trg_esg_metrics_carbon_ledger_update
+AFTER UPDATE ON esg_metrics
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION esg_metrics_carbon_ledger()
+""",
+    "DROP TRIGGER IF EXISTS trg_esg_metrics_carbon_ledger_delete ON esg_metrics",
+    """
+CREATE TRIGGER trg_esg_metrics_carbon_ledger_delete
+AFTER DELETE ON esg_metrics
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION esg_metrics_carbon_ledger()
+""",
+)
+
+for _statement in LEDGER_TRIGGER_DDL:
+    event.listen(
+        DBEscMetrics.__table__,
+        "after_create",
+        DDL(_statement.replace("%", "%%")).execute_if(dialect="postgresql")
+    )
+
+class InsufficientBalance(Exception):
+    """Raised when a purchase exceeds the tenant's outstanding emissions"""
+
+# ----------------------------
+# CRUD Operations
+# ----------------------------
+
+class CarbonLedgerCRUD:
+    """Handles tenant carbon balances and offset purchases"""
+
+    @staticmethod
+    async def get_balance(db: AsyncSession, tenant_id: str) -> Optional[DBCarbonLedger]:
+        return await db.get(DBCarbonLedger, tenant_id)
+
+    @staticmethod
+    async def assign_building(db: AsyncSession, tenant_id: str, building_id: str, share: float) -> None:
+        """
+        Set a tenant's share of a building. The ledger triggers read the
+        current share, so it applies to readings written, changed or deleted
+        from now on; already credited emissions are not moved, and re-ingested
+        or corrected old readings are credited under the new share.
+        """
+        stmt = insert(DBTenantBuilding).values(tenant_id=tenant_id, building_id=building_id, share=share)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DBTenantBuilding.tenant_id, DBTenantBuilding.building_id],
+            set_={"share": stmt.excluded.share}
+        )
+        await db.execute(stmt)
+        await db.commit()
+
+    @staticmethod
+    async def purchase(
+        db: AsyncSession,
+        tenant_id: str,
+        co2_amount_kg: float,
+        cost_eur: float,
+        provider: str
+    ) -> DBOffsetTransaction:
+        """Record a purchase in one short transaction, holding the ledger row lock"""
+        result = await db.execute(
+            select(DBCarbonLedger)
+            .where(DBCarbonLedger.tenant_id == tenant_id)
+            .with_for_update()
+        )
+        ledger = result.scalar_one_or_none()
+        outstanding = ledger.emitted_co2_kg - ledger.offset_co2_kg if ledger else 0.0
+        if co2_amount_kg > outstanding:
+            await db.rollback()
+            raise InsufficientBalance(
+                f"Requested {co2_amount_kg} kg exceeds outstanding {max(outstanding, 0.0)} kg"
+            )
+
+        ledger.offset_co2_kg += co2_amount_kg
+        ledger.updated_at = datetime.utcnow()
+        transaction = DBOffsetTransaction(
+            tenant_id=tenant_id,
+            co2_amount_kg=co2_amount_kg,
+            cost_eur=cost_eur,
+            provider=provider
+        )
+        db.add(transaction)
+        await db.commit()
+        return transaction
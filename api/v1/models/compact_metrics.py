@@ -0,0 +1,201 @@
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import (
+    Column, String, Integer, SmallInteger, DateTime, REAL, Identity,
+    ForeignKey, Index, PrimaryKeyConstraint, Float, cast, func
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from core.database import Base
+
+# ----------------------------
+# Database Models (SQLAlchemy)
+# ----------------------------
+
+class DBBuildingKey(Base):
+    """Integer surrogate for a building's UUID, used by the compact metric table"""
+    __tablename__ = "building_keys"
+
+    id = Column(Integer, Identity(), primary_key=True)
+    building_id = Column(String(36), ForeignKey("buildings.id"), unique=True, nullable=False)
+
+class DBMetricSource(Base):
+    __tablename__ = "metric_sources"
+
+    id = Column(SmallInteger, Identity(), primary_key=True)
+    name = Column(String(64), unique=True, nullable=False)
+
+class DBCompactMetric(Base):
+    """
+    Compact layout of esg_metrics: ~40 bytes of row data instead of ~130.
+
+    Keys are integer surrogates, values are float4 (7 significant digits,
+    plenty for meter readings), and the primary key (building, time,
+    source) doubles as the clustered index for per-building range scans.
+    Columns are declared widest first so no alignment padding is needed.
+    A BRIN index serves portfolio-wide time-range scans at a few pages.
+    """
+    __tablename__ = "esg_metrics_compact"
+    __table_args__ = (
+        PrimaryKeyConstraint("building_key", "timestamp", "source_key", name="esg_metrics_compact_pkey"),
+        Index("ix_esg_metrics_compact_timestamp_brin", "timestamp", postgresql_using="brin"),
+    )
+
+    timestamp = Column(DateTime, nullable=False)
+    building_key = Column(Integer, ForeignKey("building_keys.id"), nullable=False)
+    co2_kg = Column(REAL, nullable=False)
+    energy_kwh = Column(REAL, nullable=False)
+    water_m3 = Column(REAL, nullable=False)
+    waste_kg = Column(REAL, nullable=False)
+    source_key = Column(SmallInteger, ForeignKey("metric_sources.id"), nullable=False)
+
+# ----------------------------
+# Dual write from esg_metrics
+# ----------------------------
+
+# Mirrors every write to esg_metrics (single, bulk, COPY, write-behind,
+# Scope 2 recalculation) into the compact table while both layouts exist.
+# Installed by scripts/migrate_compact_metrics.py; drop it once esg_metrics
+# is retired. Statement-level triggers with transition tables, so a
+# multi-row write is mirrored by a few set-based statements instead of
+# three lookups and an upsert per row. Missing surrogates are inserted
+# first, only when absent, so identity values are not burnt.
+COMPACT_MIRROR_DDL = (
+    """
+CREATE OR REPLACE FUNCTION esg_metrics_compact_mirror() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        DELETE FROM esg_metrics_compact c
+        USING old_rows o, building_keys bk, metric_sources ms
+        WHERE bk.building_id = o.building_id AND ms.name = o.source
+          AND c.building_key = bk.id AND c.source_key = ms.id AND c.timestamp = o.timestamp;
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP = 'UPDATE' THEN
+        -- An update of building_id, source or timestamp moves the row: drop the old key
+        DELETE FROM esg_metrics_compact c
+        USING old_rows o, building_keys bk, metric_sources ms
+        WHERE bk.building_id = o.building_id AND ms.name = o.source
+          AND c.building_key = bk.id AND c.source_key = ms.id AND c.timestamp = o.timestamp
+          AND NOT EXISTS (
+              SELECT 1 FROM new_rows n
+              WHERE n.building_id = o.building_id AND n.source = o.source AND n.timestamp = o.timestamp
+          );
+    END IF;
+
+    INSERT INTO building_keys (building_id)
+    SELECT DISTINCT n.building_id FROM new_rows n
+    WHERE n.building_id IS NOT NULL
+      AND NOT EXISTS (SELECT 1 FROM building_keys bk WHERE bk.building_id = n.building_id)
+    ORDER BY n.building_id
+    ON CONFLICT (building_id) DO NOTHING;
+    INSERT INTO metric_sources (name)
+    SELECT DISTINCT n.source FROM new_rows n
+    WHERE n.building_id IS NOT NULL
+      AND NOT EXISTS (SELECT 1 FROM metric_sources ms WHERE ms.name = n.source)
+    ORDER BY n.source
+    ON CONFLICT (name) DO NOTHING;
+
+    INSERT INTO esg_metrics_compact (timestamp, building_key, co2_kg, energy_kwh, water_m3, waste_kg, source_key)
+    SELECT n.timestamp, bk.id, n.co2_kg, n.energy_kwh, n.water_m3, n.waste_kg, ms.id
+    FROM new_rows n
+    JOIN building_keys bk ON bk.building_id = n.building_id
+    JOIN metric_sources ms ON ms.name = n.source
+    ORDER BY bk.id, n.timestamp, ms.id
+    ON CONFLICT (building_key, timestamp, source_key) DO UPDATE
+    SET co2_kg = EXCLUDED.co2_kg,
+        energy_kwh = EXCLUDED.energy_kwh,
+        water_m3 = EXCLUDED.water_m3,
+        waste_kg = EXCLUDED.waste_kg;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+""",
+    # Per-row trigger of earlier deployments
+    "DROP TRIGGER IF EXISTS trg_esg_metrics_compact_mirror ON esg_metrics",
+    # Transition tables require one trigger per event
+    "DROP TRIGGER IF EXISTS trg_esg_metrics_compact_mirror_insert ON esg_metrics",
+    """
+CREATE TRIGGER trg_esg_metrics_compact_mirror_insert
+AFTER INSERT ON esg_metrics
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION esg_metrics_compact_mirror()
+""",
+    "DROP TRIGGER IF EXISTS trg_esg_metrics_compact_mirror_update ON esg_metrics",
+    """
+CREATE TRIGGER trg_esg_metrics_compact_mirror_update
+AFTER UPDATE ON esg_metrics
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION esg_metrics_compact_mirror()
+""",
+    "DROP TRIGGER IF EXISTS trg_esg_metrics_compact_mirror_delete ON esg_metrics",
+    """
+CREATE TRIGGER trg_esg_metrics_compact_mirror_delete
+AFTER DELETE ON esg_metrics
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION esg_metrics_compact_mirror()
+""",
+)
+
+# ----------------------------
+# CRUD Operations
+# ----------------------------
+
+def _building(building_id: str):
+    return (
+        select(DBBuildingKey.id)
+        .where(DBBuildingKey.building_id == building_id)
+        .scalar_subquery()
+    )
+
+class CompactMetricsCRUD:
+    """Read path over esg_metrics_compact (enabled with METRIC_COMPACT_READS)"""
+
+    @staticmethod
+    async def get_aggregates(
+        db: AsyncSession,
+        building_id: str,
+        start_date: datetime,
+        end_date: datetime
+    ) -> dict:
+        """Same result as EsgMetricsCRUD.get_aggregates; sums are taken in float8"""
+        result = await db.execute(
+            select(
+                func.sum(cast(DBCompactMetric.co2_kg, Float)).label("total_co2"),
+                func.sum(cast(DBCompactMetric.energy_kwh, Float)).label("total_energy"),
+                func.sum(cast(DBCompactMetric.water_m3, Float)).label("total_water"),
+                func.sum(cast(DBCompactMetric.waste_kg, Float)).label("total_waste")
+            )
+            .where(DBCompactMetric.building_key == _building(building_id))
+            .where(DBCompactMetric.timestamp >= start_date)
+            .where(DBCompactMetric.timestamp <= end_date)
+        )
+        return result.mappings().one()
+
+    @staticmethod
+    async def get_series(
+        db: AsyncSession,
+        building_id: str,
+        metric: str,
+        start_date: datetime,
+        end_date: datetime,
+        step: Optional[int] = None
+    ) -> List[Tuple[datetime, float]]:
+        """Same result as EsgMetricsCRUD.get_series"""
+        column = cast(getattr(DBCompactMetric, metric), Float)
+        if step:
+            # to_timestamp() gives timestamptz; back to naive UTC like the stored timestamps
+            bucket = func.timezone("UTC", func.to_timestamp(
+                func.floor(func.extract("epoch", DBCompactMetric.timestamp) / step) * step
+            )).label("bucket")
+            query = select(bucket, func.avg(column)).group_by(bucket).order_by(bucket)
+        else:
+            query = select(DBCompactMetric.timestamp, column).order_by(DBCompactMetric.timestamp)
+        result = await db.execute(
+            query
+            .where(DBCompactMetric.building_key == _building(building_id))
+            .where(DBCompactMetric.timestamp >= start_date)
+            .where(DBCompactMetric.timestamp <= end_date)
+        )
+        return [tuple(row) for row in result.all()]
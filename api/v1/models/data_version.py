@@ -0,0 +1,83 @@
+from datetime import datetime
+from typing import Optional, Tuple
+from sqlalchemy import Column, String, BigInteger, DateTime, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from core.database import Base
+
+# ----------------------------
+# Database Model (SQLAlchemy)
+# ----------------------------
+
+class DBDataVersion(Base):
+    """Monotonic version counter per data scope, bumped by every write to that scope"""
+    __tablename__ = "data_versions"
+
+    scope = Column(String(64), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=1)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+# Scope names
+BUILDINGS_SCOPE = "buildings"
+ALERT_RULES_SCOPE = "alert_rules"
+
+def building_scope(building_id: str) -> str:
+    """Building metadata (name, address, ...)"""
+    return f"building:{building_id}"
+
+def metrics_scope(building_id: str) -> str:
+    """Metric rows of a building and everything derived from them (listings, reports)"""
+    return f"metrics:{building_id}"
+
+# ----------------------------
+# CRUD Operations
+# ----------------------------
+
+class DataVersionCRUD:
+    """Version lookups are a single primary-key read, so they are cheap enough for every poll"""
+
+    @staticmethod
+    async def bump(db: AsyncSession, *scopes: str) -> None:
+        """Increment the scopes inside the caller's transaction (no commit)"""
+        scopes = sorted(set(scopes))  # one statement, rows locked in a fixed order
+        if not scopes:
+            return
+        now = datetime.utcnow()
+        stmt = insert(DBDataVersion).values([
+            {"scope": scope, "version": 1, "updated_at": now} for scope in scopes
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DBDataVersion.scope],
+            set_={"version": DBDataVersion.version + 1, "updated_at": now}
+        )
+        await db.execute(stmt)
+
+    @staticmethod
+    async def bump_committed(db: AsyncSession, *scopes: str) -> None:
+        """
+        Increment the scopes in their own short transaction, after the caller
+        has committed the data they cover.
+
+        High-rate writers (metrics) use this so concurrent writes to a
+        building do not queue on its version row for the length of their
+        whole transaction. The row lock is held for one statement and the
+        commit does not wait for the WAL flush: a bump lost in a crash only
+        leaves a validator stale until the next write to the scope, while
+        bumping before the data is visible would let clients cache old data
+        under the new version.
+        """
+        if not scopes:
+            return
+        await db.execute(text("SET LOCAL synchronous_commit TO off"))
+        await DataVersionCRUD.bump(db, *scopes)
+        await db.commit()
+
+    @staticmethod
+    async def get(db: AsyncSession, scope: str) -> Tuple[int, Optional[datetime]]:
+        result = await db.execute(
+            select(DBDataVersion.version, DBDataVersion.updated_at)
+            .where(DBDataVersion.scope == scope)
+        )
+        row = result.one_or_none()
+        return (row.version, row.updated_at) if row else (0, None)
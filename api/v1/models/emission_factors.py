@@ -0,0 +1,292 @@
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+from pydantic import BaseModel, Field
+from sqlalchemy import Boolean, Column, String, Float, DateTime, ForeignKey, func, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from core.database import Base
+from core.config import settings
+import uuid
+
+# ----------------------------
+# Database Models (SQLAlchemy)
+# ----------------------------
+
+class DBGridIntensity(Base):
+    """Location-based grid carbon intensity; each value holds until the next valid_from of its zone"""
+    __tablename__ = "grid_intensity"
+
+    zone = Column(String(32), primary_key=True)  # country or grid zone, e.g. "PL", "RO"
+    valid_from = Column(DateTime, primary_key=True)  # UTC, typically hourly
+    g_co2_per_kwh = Column(Float, nullable=False)
+
+class DBBuildingGridZone(Base):
+    __tablename__ = "building_grid_zones"
+
+    building_id = Column(String(36), ForeignKey("buildings.id"), primary_key=True)
+    zone = Column(String(32), nullable=False)
+
+class DBEnergyContract(Base):
+    """Contractual instrument (PPA, guarantee of origin, supplier mix) for market-based Scope 2"""
+    __tablename__ = "energy_contracts"
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    building_id = Column(String(36), ForeignKey("buildings.id"), index=True, nullable=False)
+    instrument = Column(String(64), nullable=False)
+    valid_from = Column(DateTime, nullable=False)
+    valid_to = Column(DateTime)  # exclusive; open-ended when NULL
+    kg_co2_per_kwh = Column(Float, nullable=False)
+
+class DBScope2Emission(Base):
+    """Both Scope 2 figures of one esg_metrics row, as of the last recalculation"""
+    __tablename__ = "scope2_emissions"
+
+    metric_id = Column(String(36), primary_key=True)  # esg_metrics.id
+    building_id = Column(String(36), index=True, nullable=False)
+    timestamp = Column(DateTime, nullable=False)
+    reported_co2_kg = Column(Float)  # esg_metrics.co2_kg as the client sent it, before it was replaced
+    co2_calculated = Column(Boolean, nullable=False, default=False)  # esg_metrics.co2_kg holds our figure
+    location_co2_kg = Column(Float, nullable=False)
+    market_co2_kg = Column(Float, nullable=False)
+    calculated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+# ----------------------------
+# Pydantic Models (API)
+# ----------------------------
+
+class GridIntensityPoint(BaseModel):
+    zone: str = Field(..., max_length=32, example="PL")
+    valid_from: datetime
+    g_co2_per_kwh: float = Field(..., ge=0, example=650.0)
+
+# ----------------------------
+# Scope 2 calculation
+# ----------------------------
+
+def scope2_emissions(
+    timestamps: Sequence[datetime],
+    energy_kwh: Sequence[float],
+    intensity: Sequence[Tuple[datetime, float]],
+    contracts: Sequence[DBEnergyContract] = (),
+    residual_mix: Optional[float] = None
+):
+    """
+    Location- and market-based kg CO2 for each reading, as numpy arrays.
+
+    Intensity points (valid_from, g CO2/kWh, sorted) are as-of joined to
+    the readings: each reading takes the latest point at or before its
+    timestamp, NaN if there is none. Market-based factors start from the
+    residual mix (or the location factor when none is configured) and are
+    overridden by each contract over its validity, later contracts last.
+    """
+    import numpy as np
+
+    ts = np.array(timestamps, dtype="datetime64[us]")
+    energy = np.asarray(energy_kwh, dtype=np.float64)
+    location_factor = np.full(ts.size, np.nan)
+    if intensity:
+        valid_from = np.array([point[0] for point in intensity], dtype="datetime64[us]")
+        values = np.array([point[1] for point in intensity], dtype=np.float64) / 1000.0  # kg/kWh
+        position = np.searchsorted(valid_from, ts, side="right") - 1
+        known = position >= 0
+        location_factor[known] = values[position[known]]
+
+    market_factor = location_factor.copy() if residual_mix is None else np.full(ts.size, residual_mix)
+    for contract in contracts:
+        covered = ts >= np.datetime64(contract.valid_from, "us")
+        if contract.valid_to is not None:
+            covered &= ts < np.datetime64(contract.valid_to, "us")
+        market_factor[covered] = contract.kg_co2_per_kwh
+
+    return energy * location_factor, energy * market_factor
+
+# ----------------------------
+# CRUD Operations
+# ----------------------------
+
+# Scope 2 results are written for a whole building range at once from arrays.
+# The reported value is taken from esg_metrics.co2_kg unless co2_calculated
+# says that column holds a figure written by us, in which case the reported
+# value kept then still stands. Client writes clear the flag (_MARK_REPORTED).
+_SAVE_EMISSIONS = """
+INSERT INTO scope2_emissions (
+    metric_id, building_id, timestamp, reported_co2_kg, co2_calculated, location_co2_kg, market_co2_kg, calculated_at
+)
+SELECT v.id, :building_id, v.ts, m.co2_kg, :calculated, v.location, v.market, now()
+FROM unnest(
+    CAST(:ids AS varchar[]), CAST(:timestamps AS timestamp[]),
+    CAST(:location AS float8[]), CAST(:market AS float8[])
+) AS v(id, ts, location, market)
+JOIN esg_metrics m ON m.id = v.id
+ON CONFLICT (metric_id) DO UPDATE
+SET reported_co2_kg = CASE
+        WHEN scope2_emissions.co2_calculated THEN scope2_emissions.reported_co2_kg
+        ELSE EXCLUDED.reported_co2_kg
+    END,
+    co2_calculated = scope2_emissions.co2_calculated OR EXCLUDED.co2_calculated,
+    location_co2_kg = EXCLUDED.location_co2_kg,
+    market_co2_kg = EXCLUDED.market_co2_kg,
+    calculated_at = EXCLUDED.calculated_at
+"""
+
+# Only changed rows are touched, so unchanged readings write no row version
+# and stay out of the transition tables of the (statement-level) ledger and
+# mirror triggers on esg_metrics
+_UPDATE_CO2 = """
+UPDATE esg_metrics m
+SET co2_kg = v.co2
+FROM unnest(CAST(:ids AS varchar[]), CAST(:co2 AS float8[])) AS v(id, co2)
+WHERE m.id = v.id AND m.co2_kg IS DISTINCT FROM v.co2
+"""
+
+# A client wrote co2_kg of these readings as sent (Scope 2 was not applied on
+# the way in): that value is now the reported one. Only readings that already
+# have a calculated figure are touched.
+_MARK_REPORTED = """
+UPDATE scope2_emissions s
+SET reported_co2_kg = v.co2, co2_calculated = false
+FROM unnest(CAST(:ids AS varchar[]), CAST(:co2 AS float8[])) AS v(id, co2)
+WHERE s.metric_id = v.id AND s.co2_calculated
+"""
+
+class EmissionFactorCRUD:
+    """Factor series lookups and bulk persistence of Scope 2 results"""
+
+    @staticmethod
+    async def get_zone(db: AsyncSession, building_id: str) -> str:
+        zone = await db.scalar(
+            select(DBBuildingGridZone.zone).where(DBBuildingGridZone.building_id == building_id)
+        )
+        return zone or settings.DEFAULT_GRID_ZONE
+
+    @staticmethod
+    async def get_intensity_series(
+        db: AsyncSession,
+        zone: str,
+        start: datetime,
+        end: datetime
+    ) -> List[Tuple[datetime, float]]:
+        """Points inside [start, end] plus the one in force at start, ordered by valid_from"""
+        in_force = (
+            select(func.max(DBGridIntensity.valid_from))
+            .where(DBGridIntensity.zone == zone)
+            .where(DBGridIntensity.valid_from <= start)
+            .scalar_subquery()
+        )
+        result = await db.execute(
+            select(DBGridIntensity.valid_from, DBGridIntensity.g_co2_per_kwh)
+            .where(DBGridIntensity.zone == zone)
+            .where(DBGridIntensity.valid_from >= func.coalesce(in_force, start))
+            .where(DBGridIntensity.valid_from <= end)
+            .order_by(DBGridIntensity.valid_from)
+        )
+        return [tuple(row) for row in result.all()]
+
+    @staticmethod
+    async def get_contracts(
+        db: AsyncSession,
+        building_id: str,
+        start: datetime,
+        end: datetime
+    ) -> List[DBEnergyContract]:
+        """Contracts overlapping [start, end], oldest first (later contracts take precedence)"""
+        result = await db.execute(
+            select(DBEnergyContract)
+            .where(DBEnergyContract.building_id == building_id)
+            .where(DBEnergyContract.valid_from <= end)
+            .where((DBEnergyContract.valid_to.is_(None)) | (DBEnergyContract.valid_to > start))
+            .order_by(DBEnergyContract.valid_from)
+        )
+        return result.scalars().all()
+
+    @staticmethod
+    async def get_emissions(
+        db: AsyncSession,
+        building_id: str,
+        timestamps: Sequence[datetime],
+        energy_kwh: Sequence[float]
+    ):
+        """Location- and market-based kg CO2 of a building's readings (see scope2_emissions)"""
+        zone = await EmissionFactorCRUD.get_zone(db, building_id)
+        start, end = min(timestamps), max(timestamps)
+        intensity = await EmissionFactorCRUD.get_intensity_series(db, zone, start, end)
+        contracts = await EmissionFactorCRUD.get_contracts(db, building_id, start, end)
+        return scope2_emissions(
+            timestamps, energy_kwh, intensity, contracts, settings.SCOPE2_RESIDUAL_MIX.get(zone)
+        )
+
+    @staticmethod
+    async def upsert_intensity(db: AsyncSession, points: Sequence[GridIntensityPoint]) -> int:
+        """
+        Insert or revise intensity points (no commit). Points are bound as
+        executemany parameters, so a year of hourly data for several zones
+        stays under the driver's bind-parameter limit; a point repeated in
+        the same call takes its last value.
+        """
+        if not points:
+            return 0
+        stmt = insert(DBGridIntensity)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DBGridIntensity.zone, DBGridIntensity.valid_from],
+            set_={"g_co2_per_kwh": stmt.excluded.g_co2_per_kwh}
+        )
+        await db.execute(stmt, [point.dict() for point in points])
+        return len(points)
+
+    @staticmethod
+    async def save_emissions(
+        db: AsyncSession,
+        building_id: str,
+        ids: List[str],
+        timestamps: List[datetime],
+        location: List[float],
+        market: List[float],
+        co2: Optional[List[float]] = None
+    ) -> int:
+        """
+        Store both figures and, when `co2` is given, write it to
+        esg_metrics.co2_kg; returns the number of changed metric rows (no commit)
+        """
+        await db.execute(text(_SAVE_EMISSIONS), {
+            "building_id": building_id,
+            "ids": ids,
+            "timestamps": timestamps,
+            "location": location,
+            "market": market,
+            "calculated": co2 is not None,
+        })
+        if co2 is None:
+            return 0
+        result = await db.execute(text(_UPDATE_CO2), {"ids": ids, "co2": co2})
+        return result.rowcount
+
+    @staticmethod
+    async def save_ingested(db: AsyncSession, rows: List[dict]) -> None:
+        """
+        Figures of readings whose co2_kg was calculated on ingest;
+        reported_co2_kg is the value the client sent (no commit)
+        """
+        if not rows:
+            return
+        stmt = insert(DBScope2Emission)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DBScope2Emission.metric_id],
+            set_={
+                column: stmt.excluded[column]
+                for column in (
+                    "reported_co2_kg", "co2_calculated", "location_co2_kg", "market_co2_kg", "calculated_at"
+                )
+            }
+        )
+        await db.execute(stmt, rows)
+
+    @staticmethod
+    async def mark_reported(db: AsyncSession, rows: List[dict]) -> None:
+        """Readings written with the client's co2_kg, which becomes their reported value (no commit)"""
+        if not rows:
+            return
+        await db.execute(text(_MARK_REPORTED), {
+            "ids": [row["id"] for row in rows],
+            "co2": [row["co2_kg"] for row in rows],
+        })
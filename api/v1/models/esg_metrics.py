@@ -1,14 +1,19 @@
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Optional, List, Set, Tuple
 from pydantic import BaseModel, Field, validator
-from sqlalchemy import Column, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, String, Float, DateTime, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import declarative_base
+import math
 import uuid
-from sqlalchemy import func
-
-Base = declarative_base()
+from sqlalchemy import func, or_
+from api.v1.models.data_version import DataVersionCRUD, metrics_scope
+from api.v1.models.compact_metrics import CompactMetricsCRUD
+from api.v1.models.emission_factors import EmissionFactorCRUD
+from api.v1.services.single_flight import forget_aggregates
+from core.config import settings
+from core.database import Base
 
 # ----------------------------
 # Database Model (SQLAlchemy)
@@ -17,15 +22,25 @@ Base = declarative_base()
 class DBEscMetrics(Base):
     """Raw ESG metrics storage"""
     __tablename__ = "esg_metrics"
+    __table_args__ = (
+        # Natural key: a retried reading hits this instead of creating a duplicate
+        UniqueConstraint("building_id", "source", "timestamp", name="uq_esg_metrics_natural_key"),
+        # Latest reading / time range of one building regardless of source
+        Index("ix_esg_metrics_building_timestamp", "building_id", "timestamp"),
+    )
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     building_id = Column(String(36), ForeignKey("buildings.id"), index=True)
+    source = Column(String(64), nullable=False, default="api")  # device / sensor / importer
     timestamp = Column(DateTime, default=datetime.utcnow, index=True)
     co2_kg = Column(Float, nullable=False)  # CO2 emissions in kilograms
     energy_kwh = Column(Float, nullable=False)
     water_m3 = Column(Float, nullable=False)
     waste_kg = Column(Float, nullable=False)
 
+# Columns returned by the fast (tuple-based) listing path
+METRIC_ROW_COLUMNS = ("id", "building_id", "source", "timestamp", "co2_kg", "energy_kwh", "water_m3", "waste_kg")
+
 # ----------------------------
 # Pydantic Models (API)
 # ----------------------------
@@ -36,9 +51,10 @@ class EsgMetricBase(BaseModel):
     energy_kwh: float = Field(..., gt=0, example=5000)
     water_m3: float = Field(..., gt=0, example=200)
     waste_kg: float = Field(..., gt=0, example=150)
+    source: str = Field("api", max_length=64, description="Device, sensor or importer that produced the reading")
     timestamp: Optional[datetime] = None
 
-    @validator('timestamp')
+    @validator('timestamp', always=True)
     def set_timestamp(cls, v):
         return v or datetime.utcnow()
 
@@ -52,6 +68,148 @@ class EsgMetricResponse(EsgMetricBase):
     class Config:
         orm_mode = True
 
+# ----------------------------
+# Natural key helpers
+# ----------------------------
+
+_METRIC_ID_NAMESPACE = uuid.UUID("6f1c8a4e-2b7d-4e55-9a0c-3d9f5e2a7b10")
+_UPSERT_KEY = ("building_id", "source", "timestamp")
+_UPSERT_COLUMNS = ("co2_kg", "energy_kwh", "water_m3", "waste_kg")
+
+def metric_row(metric: EsgMetricCreate) -> dict:
+    """
+    Column values for a metric with its natural key normalised.
+
+    The id is derived from (building, source, timestamp), so a retried
+    reading gets the same id and the caller can return it without a read.
+    """
+    row = metric.dict()
+    timestamp = row.get("timestamp") or datetime.utcnow()
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    row["timestamp"] = timestamp
+    row["source"] = row.get("source") or "api"
+    row["id"] = str(uuid.uuid5(
+        _METRIC_ID_NAMESPACE,
+        f"{row['building_id']}|{row['source']}|{timestamp.isoformat()}"
+    ))
+    return row
+
+def _upsert_statement():
+    """
+    Upsert returning the ids of rows inserted or changed. A replay with
+    identical values fails the DO UPDATE condition, so it writes no row
+    version, fires no triggers and is not returned.
+    """
+    stmt = insert(DBEscMetrics)
+    return stmt.on_conflict_do_update(
+        index_elements=[getattr(DBEscMetrics, column) for column in _UPSERT_KEY],
+        set_={column: stmt.excluded[column] for column in _UPSERT_COLUMNS},
+        where=or_(*(
+            getattr(DBEscMetrics, column).is_distinct_from(stmt.excluded[column])
+            for column in _UPSERT_COLUMNS
+        ))
+    ).returning(DBEscMetrics.id)
+
+def _dedupe(rows: List[dict]) -> List[dict]:
+    # ON CONFLICT cannot touch the same row twice in one statement; last value wins
+    return list({tuple(row[key] for key in _UPSERT_KEY): row for row in rows}.values())
+
+async def _apply_scope2(db: AsyncSession, rows: List[dict]) -> Tuple[List[dict], List[dict]]:
+    """
+    Copies of `rows` with co2_kg replaced by their SCOPE2_CO2_METHOD figure
+    as of each reading's timestamp, plus the scope2_emissions rows that keep
+    the reported value. Readings without a known grid factor keep the
+    reported value until a recalculation finds one. The caller's rows are
+    left as they are, so a retried batch starts from the reported values.
+    """
+    method = settings.SCOPE2_CO2_METHOD
+    if not method:
+        return rows, []
+    by_building: Dict[str, List[dict]] = {}
+    for row in rows:
+        by_building.setdefault(row["building_id"], []).append(row)
+
+    calculated_at = datetime.utcnow()
+    stored, emissions = [], []
+    for building_id, group in by_building.items():
+        location, market = await EmissionFactorCRUD.get_emissions(
+            db, building_id, [row["timestamp"] for row in group], [row["energy_kwh"] for row in group]
+        )
+        for row, location_co2, market_co2 in zip(group, location.tolist(), market.tolist()):
+            if math.isnan(location_co2) or math.isnan(market_co2):
+                stored.append(row)
+                continue
+            stored.append({**row, "co2_kg": location_co2 if method == "location" else market_co2})
+            emissions.append({
+                "metric_id": row["id"],
+                "building_id": building_id,
+                "timestamp": row["timestamp"],
+                "reported_co2_kg": row["co2_kg"],
+                "co2_calculated": True,
+                "location_co2_kg": location_co2,
+                "market_co2_kg": market_co2,
+                "calculated_at": calculated_at,
+            })
+    return stored, emissions
+
+# ----------------------------
+# Bulk load (COPY into a staging table)
+# ----------------------------
+
+# Column order expected in CSV chunks passed to EsgMetricsCRUD.bulk_load
+BULK_LOAD_COLUMNS = ("building_id", "source", "timestamp", "co2_kg", "energy_kwh", "water_m3", "waste_kg")
+
+_STAGING_DDL = """
+CREATE TEMP TABLE IF NOT EXISTS esg_metrics_import (
+    seq bigserial,
+    building_id varchar(36) NOT NULL,
+    source varchar(64) NOT NULL,
+    timestamp timestamp NOT NULL,
+    co2_kg float8 NOT NULL,
+    energy_kwh float8 NOT NULL,
+    water_m3 float8 NOT NULL,
+    waste_kg float8 NOT NULL
+) ON COMMIT DELETE ROWS
+"""
+
+# Same id as metric_row(): uuid5(namespace, "building|source|isoformat(timestamp)")
+# (needs the uuid-ossp extension). DISTINCT ON keeps the last row per natural key.
+_STAGING_MERGE = f"""
+INSERT INTO esg_metrics (id, building_id, source, timestamp, co2_kg, energy_kwh, water_m3, waste_kg)
+SELECT
+    uuid_generate_v5(
+        '{_METRIC_ID_NAMESPACE}'::uuid,
+        building_id || '|' || source || '|' || to_char(timestamp, 'YYYY-MM-DD"T"HH24:MI:SS')
+            || CASE WHEN mod(date_part('microseconds', timestamp)::bigint, 1000000) <> 0
+                    THEN to_char(timestamp, '.US') ELSE '' END
+    )::text,
+    building_id, source, timestamp, co2_kg, energy_kwh, water_m3, waste_kg
+FROM (
+    SELECT DISTINCT ON (building_id, source, timestamp) *
+    FROM esg_metrics_import
+    ORDER BY building_id, source, timestamp, seq DESC
+) latest
+ON CONFLICT (building_id, source, timestamp) DO UPDATE
+SET co2_kg = EXCLUDED.co2_kg,
+    energy_kwh = EXCLUDED.energy_kwh,
+    water_m3 = EXCLUDED.water_m3,
+    waste_kg = EXCLUDED.waste_kg
+WHERE (esg_metrics.co2_kg, esg_metrics.energy_kwh, esg_metrics.water_m3, esg_metrics.waste_kg)
+    IS DISTINCT FROM (EXCLUDED.co2_kg, EXCLUDED.energy_kwh, EXCLUDED.water_m3, EXCLUDED.waste_kg)
+"""
+
+# Loaded co2_kg values are as sent: they become the reported value of readings
+# that had a calculated one (see EmissionFactorCRUD.mark_reported)
+_STAGING_MARK_REPORTED = """
+UPDATE scope2_emissions s
+SET reported_co2_kg = m.co2_kg, co2_calculated = false
+FROM esg_metrics m
+JOIN (SELECT DISTINCT building_id, source, timestamp FROM esg_metrics_import) i
+    USING (building_id, source, timestamp)
+WHERE s.metric_id = m.id AND s.co2_calculated
+"""
+
 # ----------------------------
 # CRUD Operations
 # ----------------------------
@@ -61,12 +219,138 @@ class EsgMetricsCRUD:
     
     @staticmethod
     async def create(db: AsyncSession, metric: EsgMetricCreate) -> DBEscMetrics:
-        db_metric = DBEscMetrics(**metric.dict())
-        db.add(db_metric)
-        await db.commit()
-        await db.refresh(db_metric)
+        """Idempotent insert: a retry with the same natural key overwrites instead of duplicating"""
+        db_metric, _ = await EsgMetricsCRUD.upsert(db, metric)
         return db_metric
 
+    @staticmethod
+    async def upsert(db: AsyncSession, metric: EsgMetricCreate) -> Tuple[DBEscMetrics, bool]:
+        """Same as create, also telling whether the row was inserted or changed"""
+        (row,), emissions = await _apply_scope2(db, [metric_row(metric)])
+        written = bool((await db.execute(_upsert_statement(), [row])).all())
+        if written:
+            await EmissionFactorCRUD.save_ingested(db, emissions)
+            if not emissions:
+                await EmissionFactorCRUD.mark_reported(db, [row])
+        await db.commit()
+        if written:
+            forget_aggregates(metric.building_id)
+            await DataVersionCRUD.bump_committed(db, metrics_scope(metric.building_id))
+        return DBEscMetrics(**row), written
+
+    @staticmethod
+    async def create_many(db: AsyncSession, rows: List[dict]) -> Dict[str, dict]:
+        """
+        Upsert many rows built with metric_row() in one transaction; returns
+        the rows inserted or changed, by id, with the values stored (co2_kg
+        may have been calculated on the way in)
+        """
+        if not rows:
+            return {}
+        rows, emissions = await _apply_scope2(db, _dedupe(rows))
+        ids = set((await db.execute(_upsert_statement(), rows)).scalars().all())
+        await EmissionFactorCRUD.save_ingested(db, [row for row in emissions if row["metric_id"] in ids])
+        calculated = {row["metric_id"] for row in emissions}
+        await EmissionFactorCRUD.mark_reported(
+            db, [row for row in rows if row["id"] in ids and row["id"] not in calculated]
+        )
+        await db.commit()
+        written = {row["id"]: row for row in rows if row["id"] in ids}
+        buildings = {row["building_id"] for row in written.values()}
+        forget_aggregates(*buildings)
+        # Once per batch and building, outside the write transaction
+        await DataVersionCRUD.bump_committed(db, *map(metrics_scope, buildings))
+        return written
+
+    @staticmethod
+    async def bulk_load(db: AsyncSession, csv_source) -> int:
+        """
+        COPY a CSV chunk (header row, BULK_LOAD_COLUMNS order) into a staging
+        table and upsert it set-based in one transaction. Rows never become
+        Python objects; this is the path for large imports. co2_kg is stored
+        as sent, so the importer recalculates Scope 2 over the loaded range.
+        """
+        conn = await db.connection()
+        await conn.exec_driver_sql(_STAGING_DDL)
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_to_table(
+            "esg_metrics_import",
+            source=csv_source,
+            columns=list(BULK_LOAD_COLUMNS),
+            format="csv",
+            header=True
+        )
+        result = await conn.exec_driver_sql(_STAGING_MERGE)
+        await conn.exec_driver_sql(_STAGING_MARK_REPORTED)
+        buildings = await conn.exec_driver_sql(
+            "SELECT DISTINCT building_id FROM esg_metrics_import ORDER BY building_id"
+        )
+        # Read before commit: the staging table is emptied ON COMMIT
+        building_ids = [row[0] for row in buildings]
+        await db.commit()
+        forget_aggregates(*building_ids)
+        await DataVersionCRUD.bump_committed(db, *map(metrics_scope, building_ids))
+        return result.rowcount
+
+    @staticmethod
+    async def get_by_building(
+        db: AsyncSession,
+        building_id: str,
+        limit: int = 100
+    ) -> list[DBEscMetrics]:
+        result = await db.execute(
+            select(DBEscMetrics)
+            .where(DBEscMetrics.building_id == building_id)
+            .order_by(DBEscMetrics.timestamp.desc())
+            .limit(limit)
+        )
+        return result.scalars().all()
+
+    @staticmethod
+    async def get_rows_by_building(
+        db: AsyncSession,
+        building_id: str,
+        limit: int = 100
+    ) -> Tuple[List[str], list[tuple]]:
+        """Same as get_by_building but returns plain column tuples (no ORM entities)"""
+        columns = [getattr(DBEscMetrics, name) for name in METRIC_ROW_COLUMNS]
+        result = await db.execute(
+            select(*columns)
+            .where(DBEscMetrics.building_id == building_id)
+            .order_by(DBEscMetrics.timestamp.desc())
+            .limit(limit)
+        )
+        return list(METRIC_ROW_COLUMNS), result.all()
+
+    @staticmethod
+    async def get_series(
+        db: AsyncSession,
+        building_id: str,
+        metric: str,
+        start_date: datetime,
+        end_date: datetime,
+        step: Optional[int] = None
+    ) -> List[Tuple[datetime, float]]:
+        """Single metric column over time, optionally averaged into step-second buckets"""
+        if settings.METRIC_COMPACT_READS:
+            return await CompactMetricsCRUD.get_series(db, building_id, metric, start_date, end_date, step)
+        column = getattr(DBEscMetrics, metric)
+        if step:
+            # to_timestamp() gives timestamptz; back to naive UTC like the stored timestamps
+            bucket = func.timezone("UTC", func.to_timestamp(
+                func.floor(func.extract("epoch", DBEscMetrics.timestamp) / step) * step
+            )).label("bucket")
+            query = select(bucket, func.avg(column)).group_by(bucket).order_by(bucket)
+        else:
+            query = select(DBEscMetrics.timestamp, column).order_by(DBEscMetrics.timestamp)
+        result = await db.execute(
+            query
+            .where(DBEscMetrics.building_id == building_id)
+            .where(DBEscMetrics.timestamp >= start_date)
+            .where(DBEscMetrics.timestamp <= end_date)
+        )
+        return [tuple(row) for row in result.all()]
+
     @staticmethod
     async def get_latest(
         db: AsyncSession, 
@@ -89,6 +373,8 @@ class EsgMetricsCRUD:
         end_date: datetime
     ) -> dict:
         """Returns sum of metrics for a date range"""
+        if settings.METRIC_COMPACT_READS:
+            return await CompactMetricsCRUD.get_aggregates(db, building_id, start_date, end_date)
         result = await db.execute(
             select(
                 func.sum(DBEscMetrics.co2_kg).label("total_co2"),
@@ -100,4 +386,60 @@ class EsgMetricsCRUD:
             .where(DBEscMetrics.timestamp >= start_date)
             .where(DBEscMetrics.timestamp <= end_date)
         )
-        return result.mappings().one()
\ No newline at end of file
+        return result.mappings().one()
+
+    @staticmethod
+    async def get_aggregates_by_building(
+        db: AsyncSession,
+        start_date: datetime,
+        end_date: datetime,
+        building_ids: Optional[List[str]] = None
+    ) -> dict:
+        """Sums of metrics per building in one grouped query (all buildings with data if none given)"""
+        query = (
+            select(
+                DBEscMetrics.building_id,
+                func.sum(DBEscMetrics.co2_kg).label("total_co2"),
+                func.sum(DBEscMetrics.energy_kwh).label("total_energy"),
+                func.sum(DBEscMetrics.water_m3).label("total_water"),
+                func.sum(DBEscMetrics.waste_kg).label("total_waste")
+            )
+            .where(DBEscMetrics.timestamp >= start_date)
+            .where(DBEscMetrics.timestamp <= end_date)
+            .group_by(DBEscMetrics.building_id)
+        )
+        if building_ids:
+            query = query.where(DBEscMetrics.building_id.in_(building_ids))
+        result = await db.execute(query)
+        aggregates = {}
+        for mapping in result.mappings():
+            row = dict(mapping)
+            aggregates[row.pop("building_id")] = row
+        empty = {"total_co2": None, "total_energy": None, "total_water": None, "total_waste": None}
+        for building_id in building_ids or ():
+            aggregates.setdefault(building_id, dict(empty))
+        return aggregates
+
+    @staticmethod
+    async def get_daily_totals(
+        db: AsyncSession,
+        building_id: str,
+        start: date,
+        end: date
+    ) -> Dict[date, dict]:
+        """Sums of each metric per UTC day in [start, end]; days without rows are absent"""
+        day = func.date_trunc("day", DBEscMetrics.timestamp).label("day")
+        result = await db.execute(
+            select(
+                day,
+                *(func.sum(getattr(DBEscMetrics, name)).label(name) for name in _UPSERT_COLUMNS)
+            )
+            .where(DBEscMetrics.building_id == building_id)
+            .where(DBEscMetrics.timestamp >= datetime.combine(start, time.min))
+            .where(DBEscMetrics.timestamp < datetime.combine(end + timedelta(days=1), time.min))
+            .group_by(day)
+        )
+        return {
+            row["day"].date(): {name: row[name] for name in _UPSERT_COLUMNS}
+            for row in result.mappings()
+        }
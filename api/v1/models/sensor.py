@@ -0,0 +1,110 @@
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import Column, String, Float, DateTime, BigInteger
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from core.database import Base
+
+# ----------------------------
+# Database Model (SQLAlchemy)
+# ----------------------------
+
+class DBSensorState(Base):
+    """Last known value of every sensor (snapshot of the in-memory registry)"""
+    __tablename__ = "sensor_states"
+
+    building_id = Column(String(36), primary_key=True)
+    sensor_id = Column(String(64), primary_key=True)
+    type = Column(String(32), nullable=False)
+    unit = Column(String(16), nullable=False, default="")
+    last_value = Column(Float, nullable=False)
+    last_update = Column(DateTime, nullable=False)
+
+class DBSensorReading(Base):
+    """Historical sensor samples (e.g. recovered from BACnet trend logs)"""
+    __tablename__ = "sensor_readings"
+
+    building_id = Column(String(36), primary_key=True)
+    sensor_id = Column(String(64), primary_key=True)
+    timestamp = Column(DateTime, primary_key=True)
+    value = Column(Float, nullable=False)
+
+class DBTrendLogCursor(Base):
+    """Last trend-log record read per device object, so backfills resume where they stopped"""
+    __tablename__ = "trend_log_cursors"
+
+    device_address = Column(String(64), primary_key=True)
+    object_id = Column(String(64), primary_key=True)
+    last_sequence = Column(BigInteger, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+# ----------------------------
+# CRUD Operations
+# ----------------------------
+
+class SensorStateCRUD:
+    """Handles snapshot persistence of the sensor registry"""
+
+    @staticmethod
+    async def upsert_many(db: AsyncSession, rows: List[dict]) -> int:
+        """
+        Insert or overwrite sensor states. Rows are bound as executemany
+        parameters (batched by SQLAlchemy), so the statement never grows
+        past the driver's bind-parameter limit however many sensors there are.
+        """
+        if not rows:
+            return 0
+        stmt = insert(DBSensorState)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DBSensorState.building_id, DBSensorState.sensor_id],
+            set_={
+                "type": stmt.excluded.type,
+                "unit": stmt.excluded.unit,
+                "last_value": stmt.excluded.last_value,
+                "last_update": stmt.excluded.last_update,
+            },
+            where=DBSensorState.last_update <= stmt.excluded.last_update
+        )
+        await db.execute(stmt, rows)
+        return len(rows)
+
+    @staticmethod
+    async def get_all(db: AsyncSession) -> List[DBSensorState]:
+        result = await db.execute(select(DBSensorState))
+        return result.scalars().all()
+
+class SensorReadingCRUD:
+    """Handles bulk persistence of sensor history and trend-log cursors"""
+
+    @staticmethod
+    async def create_many(db: AsyncSession, rows: List[dict]) -> int:
+        """Insert samples, ignoring ones already stored (no commit)"""
+        if not rows:
+            return 0
+        stmt = insert(DBSensorReading).on_conflict_do_nothing(
+            index_elements=[DBSensorReading.building_id, DBSensorReading.sensor_id, DBSensorReading.timestamp]
+        )
+        await db.execute(stmt, rows)
+        return len(rows)
+
+    @staticmethod
+    async def get_cursor(db: AsyncSession, device_address: str, object_id: str) -> Optional[int]:
+        cursor = await db.get(DBTrendLogCursor, (device_address, object_id))
+        return cursor.last_sequence if cursor else None
+
+    @staticmethod
+    async def advance_cursor(db: AsyncSession, device_address: str, object_id: str, sequence: int) -> None:
+        """Move the cursor forward inside the caller's transaction (no commit)"""
+        stmt = insert(DBTrendLogCursor).values(
+            device_address=device_address,
+            object_id=object_id,
+            last_sequence=sequence,
+            updated_at=datetime.utcnow()
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DBTrendLogCursor.device_address, DBTrendLogCursor.object_id],
+            set_={"last_sequence": stmt.excluded.last_sequence, "updated_at": stmt.excluded.updated_at},
+            where=DBTrendLogCursor.last_sequence < stmt.excluded.last_sequence
+        )
+        await db.execute(stmt)
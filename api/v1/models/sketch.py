@@ -0,0 +1,99 @@
+from datetime import date
+from typing import Dict, List, Optional
+from sqlalchemy import Column, String, Date, LargeBinary
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from core.database import Base
+
+# ----------------------------
+# Database Model (SQLAlchemy)
+# ----------------------------
+
+class DBMetricSketch(Base):
+    """Serialized per-building, per-day sketch (t-digest of a metric or HyperLogLog of visitors)"""
+    __tablename__ = "metric_sketches"
+
+    building_id = Column(String(36), primary_key=True)
+    day = Column(Date, primary_key=True)
+    kind = Column(String(16), primary_key=True)  # "tdigest" | "hll"
+    metric = Column(String(32), primary_key=True)  # metric name (or <metric>_per_person), "visitors" for hll
+    payload = Column(LargeBinary, nullable=False)
+
+# ----------------------------
+# CRUD Operations
+# ----------------------------
+
+class MetricSketchCRUD:
+    """Handles persistence of mergeable sketches"""
+
+    @staticmethod
+    async def get_for_update(
+        db: AsyncSession,
+        building_id: str,
+        day: date,
+        kind: str,
+        metric: str
+    ) -> Optional[DBMetricSketch]:
+        result = await db.execute(
+            select(DBMetricSketch)
+            .where(DBMetricSketch.building_id == building_id)
+            .where(DBMetricSketch.day == day)
+            .where(DBMetricSketch.kind == kind)
+            .where(DBMetricSketch.metric == metric)
+            .with_for_update()
+        )
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    async def get_payloads(
+        db: AsyncSession,
+        kind: str,
+        metric: str,
+        start: date,
+        end: date,
+        building_ids: Optional[List[str]] = None
+    ) -> List[bytes]:
+        query = (
+            select(DBMetricSketch.payload)
+            .where(DBMetricSketch.kind == kind)
+            .where(DBMetricSketch.metric == metric)
+            .where(DBMetricSketch.day >= start)
+            .where(DBMetricSketch.day <= end)
+        )
+        if building_ids:
+            query = query.where(DBMetricSketch.building_id.in_(building_ids))
+        result = await db.execute(query)
+        return result.scalars().all()
+
+    @staticmethod
+    async def get_daily_payloads(
+        db: AsyncSession,
+        building_id: str,
+        kind: str,
+        metric: str,
+        start: date,
+        end: date
+    ) -> Dict[date, bytes]:
+        result = await db.execute(
+            select(DBMetricSketch.day, DBMetricSketch.payload)
+            .where(DBMetricSketch.building_id == building_id)
+            .where(DBMetricSketch.kind == kind)
+            .where(DBMetricSketch.metric == metric)
+            .where(DBMetricSketch.day >= start)
+            .where(DBMetricSketch.day <= end)
+        )
+        return {day: payload for day, payload in result.all()}
+
+    @staticmethod
+    async def put_many(db: AsyncSession, rows: List[dict], chunk_size: int = 1000) -> None:
+        """Insert or replace sketches (no commit)"""
+        for offset in range(0, len(rows), chunk_size):
+            stmt = insert(DBMetricSketch).values(rows[offset:offset + chunk_size])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[
+                    DBMetricSketch.building_id, DBMetricSketch.day, DBMetricSketch.kind, DBMetricSketch.metric
+                ],
+                set_={"payload": stmt.excluded.payload}
+            )
+            await db.execute(stmt)
@@ -3,8 +3,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from pydantic import BaseModel, EmailStr
 from core.database import Base
-from core.security import pwd_context  # Import pwd_context
+from passlib.context import CryptContext
 from typing import Optional, Annotated
+
+# Password hashing (lives here rather than in core.security to avoid a circular import)
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
 class DBUser(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True, index=True)  # Fixed Integer
@@ -44,6 +48,11 @@ class UserCRUD:
         result = await db.execute(select(DBUser).where(DBUser.email == email))
         return result.scalar_one_or_none()
 
+    @staticmethod
+    async def get_by_username(db: AsyncSession, username: str) -> Optional[DBUser]:
+        """Tokens carry the e-mail address as their subject"""
+        return await UserCRUD.get_by_email(db, username)
+
     @staticmethod
     async def create_user(db: AsyncSession, user: UserCreate):
         db_user = user.create_db_user()
@@ -1,6 +1,16 @@
 # routes/__init__.py
 from .esg_routes import router as esg_router
+from .live_routes import router as live_router
+from .profile_routes import router as profile_router
+from .building_data_routes import router as building_data_router
+from .carbon_routes import router as carbon_router
+from .report_routes import router as report_router
 
 __all__ = [
-    "esg_router"
+    "esg_router",
+    "live_router",
+    "profile_router",
+    "building_data_router",
+    "carbon_router",
+    "report_router"
 ]
\ No newline at end of file
@@ -0,0 +1,20 @@
+from fastapi import APIRouter
+from core.admission import RateLimitDep
+from api.v1.controllers.esg_controller import (
+    ESGDataResponse,
+    Sensor,
+    get_esg_data,
+    list_building_sensors,
+    get_sensor_latest,
+    create_alert,
+    delete_alert
+)
+
+# Per-building overview, live sensor state and alert rules (handlers live in esg_controller)
+router = APIRouter(prefix="/buildings/{building_id}", tags=["Building Data"], dependencies=[RateLimitDep])
+
+router.add_api_route("/esg", get_esg_data, methods=["GET"], response_model=ESGDataResponse)
+router.add_api_route("/sensors", list_building_sensors, methods=["GET"], response_model=list[Sensor])
+router.add_api_route("/sensors/{sensor_id}", get_sensor_latest, methods=["GET"], response_model=Sensor)
+router.add_api_route("/alerts", create_alert, methods=["POST"])
+router.add_api_route("/alerts/{alert_id}", delete_alert, methods=["DELETE"])
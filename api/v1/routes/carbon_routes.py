@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+from core.admission import RateLimitDep
+from api.v1.controllers.esg_controller import (
+    purchase_carbon_offsets,
+    get_carbon_balance,
+    assign_tenant_building
+)
+
+# Tenant carbon ledger (handlers live in esg_controller)
+router = APIRouter(prefix="/carbon", tags=["Carbon Ledger"], dependencies=[RateLimitDep])
+
+router.add_api_route("/offsets", purchase_carbon_offsets, methods=["POST"])
+router.add_api_route("/balance/{tenant_id}", get_carbon_balance, methods=["GET"])
+router.add_api_route("/tenant-buildings", assign_tenant_building, methods=["POST"])
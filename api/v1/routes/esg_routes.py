@@ -1,31 +1,223 @@
-from datetime import datetime
-from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, Query
+from datetime import date, datetime
+from typing import Annotated, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from core.database import get_db
-from core.security import AdminDep, BuildingManagerDep
-from models.esg_metrics import EsgMetricCreate, EsgMetricsCRUD
+from core.database import get_db, pooled_session
+from core.security import AdminDep, BuildingManagerDep, authorize, oauth2_scheme
+from core.admission import RateLimitDep
+from core.serialization import FastJSONResponse, rows_to_json
+from core.http_cache import make_etag, not_modified, set_validators
+from api.v1.models.data_version import DataVersionCRUD, metrics_scope
+from api.v1.models.esg_metrics import EsgMetricCreate, EsgMetricsCRUD
+from api.v1.services.ingestion import ingest_metric, ingest_gate_event, METRIC_FIELDS
+from api.v1.services.sketches import merge_payloads
+from api.v1.services.hot_store import hot_store
+from api.v1.services.anomaly import anomaly_detector, score_batch
+from api.v1.models.sketch import MetricSketchCRUD
+from api.v1.models.emission_factors import EmissionFactorCRUD, GridIntensityPoint
+from api.v1.services.scope2 import SCOPE2_METHODS, recalculate_portfolio
+from pydantic import BaseModel
+from api.v1.models.building import building_registry
+from api.v1.services.metric_writer import metric_writer
+from core.config import settings
 
-router = APIRouter(prefix="/esg", tags=["ESG Data"])
+router = APIRouter(prefix="/esg", tags=["ESG Data"], dependencies=[RateLimitDep])
+
+class GateEvent(BaseModel):
+    building_id: str
+    badge_id: str
+    timestamp: Optional[datetime] = None
+
+class Scope2Recalculation(BaseModel):
+    year: int
+    building_ids: Optional[List[str]] = None  # whole portfolio when omitted
+    method: Optional[str] = None  # figure written to co2_kg, defaults to SCOPE2_CO2_METHOD
 
 @router.post("/metrics")
 async def create_esg_metric(
     metric: EsgMetricCreate,
-    db: Annotated[AsyncSession, Depends(get_db)],
-    _: Annotated[None, AdminDep]  # Enforces admin role
+    token: Annotated[str, Depends(oauth2_scheme)]  # admin role, checked below
 ):
-    try:
-        return await EsgMetricsCRUD.create(db, metric)
-    except Exception as e:
-        raise HTTPException(400, detail=str(e))
+    """
+    Store one reading. The session is opened here rather than through
+    get_db so that, in write-behind mode, it is released before the
+    reading waits for its group commit and the writer owns the only
+    connection; waiting callers then hold no admission slot.
+    """
+    async with pooled_session() as db:
+        await authorize(token, "admin", db)
+        if await building_registry.fetch(db, metric.building_id) is None:
+            raise HTTPException(404, detail="Building not found")
+        if not settings.METRIC_WRITE_BEHIND:
+            try:
+                db_metric, written = await EsgMetricsCRUD.upsert(db, metric)
+            except Exception as e:
+                raise HTTPException(400, detail=str(e))
+    if settings.METRIC_WRITE_BEHIND:
+        try:
+            db_metric, written = await metric_writer.submit(metric)
+        except Exception as e:
+            raise HTTPException(400, detail=str(e))
+    if written:  # a retried reading with unchanged values is not alerted/streamed again
+        ingest_metric(db_metric)
+    return db_metric
 
 @router.get("/metrics/{building_id}")
 async def get_esg_metrics(
     building_id: str,
+    request: Request,
+    response: Response,
     db: Annotated[AsyncSession, Depends(get_db)],
-    _: Annotated[None, BuildingManagerDep]  # Enforces manager role
+    _: Annotated[None, BuildingManagerDep],  # Enforces manager role
+    limit: Annotated[int, Query(ge=1, le=50000)] = 100,
+    fast: Annotated[bool, Query(description="Serialise column tuples directly, skipping ORM/Pydantic")] = False
 ):
+    scope = metrics_scope(building_id)
+    version, last_modified = await DataVersionCRUD.get(db, scope)
+    etag = make_etag(scope, version, request)
+    cached = not_modified(request, etag, last_modified, exists=version > 0)
+    if cached is not None:
+        return cached
+
     try:
-        return await EsgMetricsCRUD.get_by_building(db, building_id)
+        if fast:
+            columns, rows = await EsgMetricsCRUD.get_rows_by_building(db, building_id, limit)
+            return set_validators(FastJSONResponse(rows_to_json(columns, rows)), etag, last_modified)
+        set_validators(response, etag, last_modified)
+        return await EsgMetricsCRUD.get_by_building(db, building_id, limit)
     except Exception as e:
-        raise HTTPException(500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(500, detail=str(e))
+
+@router.get("/metrics/{building_id}/series")
+async def get_esg_series(
+    building_id: str,
+    series: str,
+    start: datetime,
+    end: datetime,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    _: Annotated[None, BuildingManagerDep],
+    step: Annotated[Optional[int], Query(ge=1, description="Bucket size in seconds for downsampling")] = None
+):
+    """
+    Time series of one metric (co2_kg, energy_kwh, water_m3, waste_kg) or
+    sensor ("sensor:<id>"). Recent ranges come from the in-memory hot
+    window; anything older falls back to PostgreSQL.
+    """
+    points = None
+    if settings.HOT_STORE_ENABLED:
+        points = hot_store.query(building_id, series, start, end, step)
+    source = "hot_store"
+    if points is None:
+        if series not in METRIC_FIELDS:
+            raise HTTPException(404, detail="Series not available for this range")
+        points = await EsgMetricsCRUD.get_series(db, building_id, series, start, end, step)
+        source = "database"
+    return FastJSONResponse({
+        "series": series,
+        "source": source,
+        "points": [[ts, value] for ts, value in points]
+    })
+
+@router.get("/anomalies/{building_id}")
+async def get_recent_anomalies(
+    building_id: str,
+    _: Annotated[None, BuildingManagerDep]
+):
+    """Anomalies flagged by the streaming detector since this process started"""
+    return {"building_id": building_id, "anomalies": anomaly_detector.recent(building_id)}
+
+@router.get("/anomalies/{building_id}/rescore")
+async def rescore_anomalies(
+    building_id: str,
+    metric: str,
+    start: datetime,
+    end: datetime,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    _: Annotated[None, BuildingManagerDep],
+    threshold: Annotated[Optional[float], Query(gt=0)] = None
+):
+    """Re-score a historical range in one vectorised pass"""
+    if metric not in METRIC_FIELDS:
+        raise HTTPException(400, detail="Unknown metric")
+    points = await EsgMetricsCRUD.get_series(db, building_id, metric, start, end)
+    anomalies = score_batch([ts for ts, _ in points], [v for _, v in points], threshold)
+    return {"building_id": building_id, "metric": metric, "scored": len(points), "anomalies": anomalies}
+
+@router.post("/gate-events")
+async def create_gate_events(
+    events: List[GateEvent],
+    _: Annotated[None, AdminDep]
+):
+    for event in events:
+        ingest_gate_event(event.building_id, event.badge_id, event.timestamp)
+    return {"accepted": len(events)}
+
+@router.get("/portfolio/percentile")
+async def get_portfolio_percentile(
+    metric: str,
+    start: date,
+    end: date,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    _: Annotated[None, BuildingManagerDep],
+    q: Annotated[float, Query(gt=0, lt=1)] = 0.9,
+    buildings: Annotated[Optional[List[str]], Query()] = None
+):
+    """
+    Quantile of a metric's daily building totals across buildings and days,
+    merged from per-day t-digests; `<metric>_per_person` divides each day's
+    total by its distinct visitors (e.g. energy_kwh_per_person)
+    """
+    payloads = await MetricSketchCRUD.get_payloads(db, "tdigest", metric, start, end, buildings)
+    digest = merge_payloads("tdigest", payloads)
+    if digest is None:
+        raise HTTPException(404, detail="No data for given criteria")
+    return {
+        "metric": metric,
+        "quantile": q,
+        "value": digest.quantile(q),
+        "samples": digest.total,
+        "sketches_merged": len(payloads)
+    }
+
+@router.get("/portfolio/visitors")
+async def get_portfolio_visitors(
+    start: date,
+    end: date,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    _: Annotated[None, BuildingManagerDep],
+    buildings: Annotated[Optional[List[str]], Query()] = None
+):
+    """Approximate distinct visitors, merged from per-day HyperLogLogs"""
+    payloads = await MetricSketchCRUD.get_payloads(db, "hll", "visitors", start, end, buildings)
+    hll = merge_payloads("hll", payloads)
+    if hll is None:
+        return {"distinct_visitors": 0, "relative_error": 0.0, "sketches_merged": 0}
+    return {
+        "distinct_visitors": round(hll.count()),
+        "relative_error": hll.standard_error,
+        "sketches_merged": len(payloads)
+    }
+
+@router.put("/scope2/grid-intensity")
+async def upload_grid_intensity(
+    points: List[GridIntensityPoint],
+    db: Annotated[AsyncSession, Depends(get_db)],
+    _: Annotated[None, AdminDep]
+):
+    """Insert or revise grid carbon-intensity points; follow with /scope2/recalculate"""
+    count = await EmissionFactorCRUD.upsert_intensity(db, points)
+    await db.commit()
+    return {"upserted": count}
+
+@router.post("/scope2/recalculate")
+async def recalculate_scope2(
+    request: Scope2Recalculation,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    _: Annotated[None, AdminDep]
+):
+    """Recompute location- and market-based Scope 2 CO2 for a year (per building or portfolio)"""
+    if request.method and request.method not in SCOPE2_METHODS:
+        raise HTTPException(400, detail="Unknown method")
+    start = datetime(request.year, 1, 1)
+    end = datetime(request.year, 12, 31, 23, 59, 59, 999999)
+    return await recalculate_portfolio(db, start, end, request.building_ids, request.method)
@@ -0,0 +1,90 @@
+import asyncio
+from typing import Annotated, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from core.security import authorize, oauth2_scheme
+from api.v1.services.live_feed import live_feed
+
+router = APIRouter(prefix="/live", tags=["Live Data"])
+
+# Comment line sent on idle SSE streams so proxies keep the connection open
+_SSE_KEEPALIVE = b": keepalive\n\n"
+
+
+def _parse_buildings(buildings: str) -> List[str]:
+    return [b for b in buildings.split(",") if b]
+
+
+async def _websocket_role(token: str) -> Optional[int]:
+    """Same check as BuildingManagerDep; None when allowed, else the close code"""
+    try:
+        await authorize(token, "building_manager")
+    except HTTPException as e:
+        if e.status_code == status.HTTP_503_SERVICE_UNAVAILABLE:
+            return status.WS_1013_TRY_AGAIN_LATER
+        return status.WS_1008_POLICY_VIOLATION
+    return None
+
+
+@router.websocket("/ws")
+async def live_websocket(
+    websocket: WebSocket,
+    buildings: str,
+    token: str
+):
+    """Stream live readings and alerts for a comma-separated list of buildings"""
+    close_code = await _websocket_role(token)
+    if close_code is not None:
+        await websocket.close(code=close_code)
+        return
+
+    await websocket.accept()
+    subscriber = live_feed.subscribe(_parse_buildings(buildings))
+
+    async def send():
+        while True:
+            for message in await subscriber.get():
+                await websocket.send_text(message.text)
+
+    # Clients send nothing, but reading is how a close frame (or a failed
+    # server ping) surfaces while the building is quiet
+    sender = asyncio.create_task(send())
+    try:
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    finally:
+        sender.cancel()
+        live_feed.unsubscribe(subscriber)
+
+
+@router.get("/sse")
+async def live_sse(
+    request: Request,
+    buildings: Annotated[str, Query(description="Comma-separated building IDs")],
+    token: Annotated[str, Depends(oauth2_scheme)]
+):
+    """
+    Server-Sent Events variant of the live stream. The role is checked on a
+    session released before streaming: a yield dependency such as get_db
+    would hold its pool slot until the client disconnects.
+    """
+    await authorize(token, "building_manager")
+    subscriber = live_feed.subscribe(_parse_buildings(buildings))
+
+    async def stream():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    messages = await asyncio.wait_for(subscriber.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield _SSE_KEEPALIVE
+                    continue
+                yield b"".join(message.sse for message in messages)
+        finally:
+            live_feed.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,35 @@
+from typing import Annotated
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+from core.security import AdminDep
+from core.profiling import request_profiler
+
+router = APIRouter(prefix="/admin/profiles", tags=["Profiling"])
+
+
+def _profile(profile_id: str):
+    profile = request_profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(404, detail="Profile not found (only the most recent ones are kept)")
+    return profile
+
+
+@router.get("/")
+async def list_profiles(_: Annotated[None, AdminDep]):
+    """Recently profiled requests, newest first"""
+    return request_profiler.recent()
+
+
+@router.get("/{profile_id}")
+async def get_profile(profile_id: str, _: Annotated[None, AdminDep]):
+    """Time breakdown and per-statement DB timings of one profiled request"""
+    return _profile(profile_id).summary()
+
+
+@router.get("/{profile_id}/flamegraph")
+async def download_flamegraph(profile_id: str, _: Annotated[None, AdminDep]):
+    """Folded stacks for flamegraph.pl, speedscope or inferno"""
+    return PlainTextResponse(
+        _profile(profile_id).collapsed(),
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.folded"'}
+    )
@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+from core.admission import RateLimitDep
+from api.v1.controllers.report_controller import (
+    generate_report,
+    get_report,
+    generate_portfolio_report
+)
+
+# ESG reports (handlers live in report_controller)
+router = APIRouter(prefix="/reports", tags=["Reports"], dependencies=[RateLimitDep])
+
+router.add_api_route("/", generate_report, methods=["POST"])
+router.add_api_route("/portfolio", generate_portfolio_report, methods=["POST"])
+router.add_api_route("/{building_id}/{year}", get_report, methods=["GET"])
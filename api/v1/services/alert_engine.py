@@ -0,0 +1,240 @@
+import asyncio
+import logging
+from array import array
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from api.v1.models.alert import AlertRuleCRUD
+from api.v1.models.data_version import DataVersionCRUD, ALERT_RULES_SCOPE
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_NO_EVENTS: List[dict] = []
+
+
+class _RuleSet:
+    """
+    Rules of one direction for a single (building, sensor type).
+
+    Thresholds are kept sorted in "above" space ("below" rules are stored
+    negated), so the rules a reading can trigger are exactly the prefix
+    found by one bisect. Only that prefix plus the currently pending or
+    active rules are touched per reading.
+    """
+
+    def __init__(self, sign: float, rules: List[dict]):
+        rules = sorted(rules, key=lambda r: sign * r["threshold"])
+        self.sign = sign
+        self.rule_ids = [r["id"] for r in rules]
+        self.thresholds = array("d", (sign * r["threshold"] for r in rules))
+        self.hysteresis = array("d", (r["hysteresis"] for r in rules))
+        self.debounce = array("d", (r["debounce_seconds"] for r in rules))
+        self.active = bytearray(len(rules))
+        self.active_idx: set = set()
+        self.pending: Dict[int, float] = {}
+
+    def evaluate(self, value: float, epoch: float) -> List[Tuple[int, str]]:
+        signed = self.sign * value
+        thresholds = self.thresholds
+        exceeded = bisect_left(thresholds, signed)
+        changes = []
+
+        for i in range(exceeded):
+            if self.active[i]:
+                continue
+            if self.debounce[i] > 0:
+                since = self.pending.setdefault(i, epoch)
+                if epoch - since < self.debounce[i]:
+                    continue
+                del self.pending[i]
+            self.active[i] = 1
+            self.active_idx.add(i)
+            changes.append((i, "triggered"))
+
+        if self.pending:
+            for i in [i for i in self.pending if i >= exceeded]:
+                del self.pending[i]
+
+        if self.active_idx:
+            for i in [i for i in self.active_idx if signed <= thresholds[i] - self.hysteresis[i]]:
+                self.active[i] = 0
+                self.active_idx.discard(i)
+                changes.append((i, "cleared"))
+
+        return changes
+
+    def state(self) -> Dict[str, bool]:
+        return {rule_id: bool(self.active[i]) for i, rule_id in enumerate(self.rule_ids)}
+
+
+class AlertEngine:
+    """Evaluates every incoming reading against the threshold rules indexed by (building, sensor type)"""
+
+    def __init__(self, history_size: int = 1000):
+        self._rules: Dict[str, dict] = {}
+        self._sets: Dict[Tuple[str, str], List[_RuleSet]] = {}
+        self._listeners: List[Callable[[dict], None]] = []
+        self.recent_events: deque = deque(maxlen=history_size)
+        self.version = -1  # alert_rules data version the rules were loaded at
+
+    def add_listener(self, callback: Callable[[dict], None]) -> None:
+        self._listeners.append(callback)
+
+    # ----------------------------
+    # Rule management
+    # ----------------------------
+
+    async def load(self, db: AsyncSession) -> int:
+        """
+        (Re)load the active rules. Only (building, sensor type) groups whose
+        rules changed are rebuilt, and firing state of surviving rules is kept.
+        """
+        version, _ = await DataVersionCRUD.get(db, ALERT_RULES_SCOPE)
+        rules = await AlertRuleCRUD.get_active(db)
+        loaded = {rule.id: self._rule_dict(rule) for rule in rules}
+        changed = {
+            (r["building_id"], r["sensor_type"])
+            for rule_id in set(loaded) | set(self._rules)
+            for r in (loaded.get(rule_id), self._rules.get(rule_id)) if r is not None
+            if loaded.get(rule_id) != self._rules.get(rule_id)
+        }
+        self._rules = loaded
+        for key in changed:
+            self._rebuild(key)
+        self.version = version
+        logger.info(f"Alert engine loaded {len(rules)} rules ({len(changed)} groups changed)")
+        return len(rules)
+
+    async def refresh_if_stale(self, db: AsyncSession) -> bool:
+        version, _ = await DataVersionCRUD.get(db, ALERT_RULES_SCOPE)
+        if version == self.version:
+            return False
+        await self.load(db)
+        return True
+
+    async def run_refresh(self, session_factory, interval: Optional[float] = None):
+        """Background loop picking up rules created or deleted by other workers"""
+        interval = interval or settings.ALERT_RULES_REFRESH
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with session_factory() as session:
+                    await self.refresh_if_stale(session)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Alert rule refresh failed: {str(e)}")
+
+    def add_rule(self, rule) -> None:
+        data = self._rule_dict(rule)
+        self._rules[data["id"]] = data
+        self._rebuild((data["building_id"], data["sensor_type"]))
+
+    def remove_rule(self, rule_id: str) -> bool:
+        data = self._rules.pop(rule_id, None)
+        if data is None:
+            return False
+        self._rebuild((data["building_id"], data["sensor_type"]))
+        return True
+
+    @staticmethod
+    def _rule_dict(rule) -> dict:
+        return {
+            "id": rule.id,
+            "building_id": rule.building_id,
+            "sensor_type": rule.sensor_type,
+            "threshold": rule.threshold,
+            "direction": rule.direction,
+            "hysteresis": rule.hysteresis or 0.0,
+            "debounce_seconds": rule.debounce_seconds or 0.0,
+            "notify_emails": list(rule.notify_emails or []),
+        }
+
+    def _rebuild(self, key: Tuple[str, str]) -> None:
+        # Preserve firing state of rules that survive the rebuild
+        previous = {}
+        for rule_set in self._sets.get(key, ()):
+            previous.update(rule_set.state())
+
+        rules = [r for r in self._rules.values() if (r["building_id"], r["sensor_type"]) == key]
+        sets = []
+        for direction, sign in (("above", 1.0), ("below", -1.0)):
+            selected = [r for r in rules if r["direction"] == direction]
+            if not selected:
+                continue
+            rule_set = _RuleSet(sign, selected)
+            for i, rule_id in enumerate(rule_set.rule_ids):
+                if previous.get(rule_id):
+                    rule_set.active[i] = 1
+                    rule_set.active_idx.add(i)
+            sets.append(rule_set)
+
+        if sets:
+            self._sets[key] = sets
+        else:
+            self._sets.pop(key, None)
+
+    # ----------------------------
+    # Evaluation
+    # ----------------------------
+
+    def evaluate(
+        self,
+        building_id: str,
+        sensor_type: str,
+        value: float,
+        timestamp: Optional[datetime] = None
+    ) -> List[dict]:
+        """Check a reading against the rules that could fire; returns state changes"""
+        sets = self._sets.get((building_id, sensor_type))
+        if sets is None:
+            return _NO_EVENTS
+
+        ts = timestamp or datetime.utcnow()
+        epoch = (ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)).timestamp()
+        events = []
+        for rule_set in sets:
+            for i, state in rule_set.evaluate(value, epoch):
+                rule = self._rules[rule_set.rule_ids[i]]
+                events.append({
+                    "alert_id": rule["id"],
+                    "building_id": building_id,
+                    "sensor_type": sensor_type,
+                    "state": state,
+                    "value": value,
+                    "threshold": rule["threshold"],
+                    "direction": rule["direction"],
+                    "notify_emails": rule["notify_emails"],
+                    "timestamp": ts.isoformat(),
+                })
+
+        for event in events:
+            self.recent_events.append(event)
+            for callback in self._listeners:
+                try:
+                    callback(event)
+                except Exception as e:
+                    logger.error(f"Alert listener failed: {str(e)}")
+        return events
+
+    def active_alerts(self, building_id: str) -> List[str]:
+        return [
+            rule_id
+            for (b_id, _), sets in self._sets.items() if b_id == building_id
+            for rule_set in sets
+            for rule_id, active in rule_set.state().items() if active
+        ]
+
+
+def _log_alert(event: dict) -> None:
+    logger.warning(
+        f"Alert {event['alert_id']} {event['state']}: {event['sensor_type']}="
+        f"{event['value']} ({event['direction']} {event['threshold']}) in {event['building_id']}"
+    )
+
+
+alert_engine = AlertEngine()
+alert_engine.add_listener(_log_alert)
@@ -0,0 +1,173 @@
+import math
+from array import array
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+from core.config import settings
+
+HOURS_PER_WEEK = 168
+# Per series: the current run of flagged readings, then [n, mean, M2] overall
+# followed by [n, mean, M2] for each hour of the week
+_STRIDE = 1 + 3 * (1 + HOURS_PER_WEEK)
+
+
+def hour_of_week(ts: datetime) -> int:
+    return ts.weekday() * 24 + ts.hour
+
+
+class AnomalyDetector:
+    """
+    Streaming z-score anomaly detection per (building, metric).
+
+    Statistics are updated with Welford's method and kept in one flat
+    array of doubles, one stride per series: the overall mean/variance
+    plus one baseline per hour of the week. A reading is scored against
+    its hour-of-week baseline once that has enough samples, otherwise
+    against the overall one. Sample counts are capped, which turns the
+    running mean into a slowly forgetting one. Flagged readings are folded
+    in with a small weight, so a burst of spikes barely moves the baseline,
+    and after `rebaseline_after` consecutive flags the series is treated
+    as a lasting level shift and its baselines start over. The standard
+    deviation never drops below `min_std_ratio` of the mean, so a flat
+    series does not flag every tiny change with an infinite z-score.
+    """
+
+    def __init__(
+        self,
+        threshold: Optional[float] = None,
+        min_samples: int = 8,
+        max_samples: int = 500,
+        history_size: int = 200,
+        flagged_weight: float = 0.1,
+        rebaseline_after: int = 24,
+        min_std_ratio: float = 0.01
+    ):
+        self.threshold = threshold or settings.ANOMALY_Z_THRESHOLD
+        self.min_samples = min_samples
+        self.max_samples = max_samples
+        self.history_size = history_size
+        self.flagged_weight = flagged_weight
+        self.rebaseline_after = rebaseline_after
+        self.min_std_ratio = min_std_ratio
+        self._index: Dict[Tuple[str, str], int] = {}
+        self._stats = array("d")
+        self._recent: Dict[str, deque] = {}
+
+    def _offset(self, building_id: str, metric: str) -> int:
+        key = (building_id, metric)
+        offset = self._index.get(key)
+        if offset is None:
+            offset = len(self._stats)
+            self._index[key] = offset
+            self._stats.extend([0.0] * _STRIDE)
+        return offset
+
+    def _update(self, i: int, value: float, weight: float = 1.0) -> None:
+        """Weighted Welford update of the [n, mean, M2] triple at i"""
+        stats = self._stats
+        n = stats[i]
+        if n + weight > self.max_samples:
+            # Forget the oldest samples' share of the spread to stay at the cap
+            stats[i + 2] *= (self.max_samples - weight) / n
+            n = self.max_samples - weight
+        n += weight
+        stats[i] = n
+        delta = value - stats[i + 1]
+        stats[i + 1] += delta * weight / n
+        stats[i + 2] += weight * delta * (value - stats[i + 1])
+
+    def _z(self, i: int, value: float) -> Optional[float]:
+        n = self._stats[i]
+        if n < self.min_samples:
+            return None
+        mean = self._stats[i + 1]
+        variance = max(self._stats[i + 2] / (n - 1), (self.min_std_ratio * mean) ** 2, 1e-12)
+        return (value - mean) / math.sqrt(variance)
+
+    def score(self, building_id: str, metric: str, value: float, timestamp: datetime) -> Optional[float]:
+        """O(1): score the reading, update baselines, record it if anomalous"""
+        streak = self._offset(building_id, metric)
+        base = streak + 1
+        seasonal = base + 3 * (1 + hour_of_week(timestamp))
+
+        z = self._z(seasonal, value)
+        if z is None:
+            z = self._z(base, value)
+
+        weight = 1.0
+        if z is not None and abs(z) >= self.threshold:
+            recent = self._recent.get(building_id)
+            if recent is None:
+                recent = self._recent[building_id] = deque(maxlen=self.history_size)
+            recent.append({
+                "metric": metric,
+                "value": value,
+                "z_score": round(z, 3),
+                "timestamp": timestamp.isoformat(),
+            })
+            self._stats[streak] += 1
+            if self._stats[streak] >= self.rebaseline_after:
+                # The series has moved for good: learn it again from here
+                self._stats[streak:streak + _STRIDE] = array("d", [0.0]) * _STRIDE
+            else:
+                weight = self.flagged_weight
+        else:
+            self._stats[streak] = 0
+
+        self._update(base, value, weight)
+        self._update(seasonal, value, weight)
+        return z
+
+    def recent(self, building_id: str) -> List[dict]:
+        return list(self._recent.get(building_id, ()))
+
+
+def score_batch(
+    timestamps: Sequence[datetime],
+    values: Sequence[float],
+    threshold: Optional[float] = None,
+    min_samples: int = 8,
+    min_std_ratio: float = 0.01
+) -> List[dict]:
+    """
+    Vectorised re-scoring of a historical range: z-scores against
+    hour-of-week baselines computed from the range itself. Sample variance
+    and the variance floor are the same as AnomalyDetector's, so a reading
+    re-scored here gets the z-score live scoring would give it.
+    """
+    import numpy as np
+
+    threshold = threshold or settings.ANOMALY_Z_THRESHOLD
+    x = np.asarray(values, dtype=np.float64)
+    if x.size == 0:
+        return []
+    slots = np.fromiter((hour_of_week(ts) for ts in timestamps), dtype=np.int64, count=x.size)
+
+    counts = np.bincount(slots, minlength=HOURS_PER_WEEK)
+    sums = np.bincount(slots, weights=x, minlength=HOURS_PER_WEEK)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = sums / counts
+        # Two passes (squared deviations from the slot mean) rather than
+        # E[x^2] - E[x]^2, which cancels badly for large, steady values
+        deviations = np.bincount(slots, weights=(x - mean[slots]) ** 2, minlength=HOURS_PER_WEEK)
+        variance = deviations / (counts - 1)
+
+    # Fall back to the overall distribution for sparsely populated hours
+    sparse = counts < min_samples
+    mean[sparse] = x.mean()
+    variance[sparse] = x.var(ddof=1) if x.size > 1 else np.nan
+    variance = np.fmax(np.fmax(variance, (min_std_ratio * mean) ** 2), 1e-12)
+
+    z = (x - mean[slots]) / np.sqrt(variance[slots])
+    flagged = np.flatnonzero(np.abs(np.nan_to_num(z)) >= threshold)
+    return [
+        {
+            "value": float(x[i]),
+            "z_score": round(float(z[i]), 3),
+            "timestamp": timestamps[i].isoformat(),
+        }
+        for i in flagged
+    ]
+
+
+anomaly_detector = AnomalyDetector()
@@ -2,8 +2,9 @@ from datetime import datetime
 from typing import Optional, List
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import func, and_
-from models.esg_metrics import DBEscMetrics, EsgMetricCreate
-from core.database import get_db
+from api.v1.models.esg_metrics import DBEscMetrics, EsgMetricCreate, EsgMetricsCRUD
+from core.database import get_db, pooled_session
+from api.v1.services.single_flight import aggregate_flight
 from fastapi import HTTPException, status, Depends
 
 class ESGService:
@@ -13,11 +14,7 @@ class ESGService:
     async def create_metric(self, metric_data: EsgMetricCreate) -> DBEscMetrics:
         """Create new ESG metric entry"""
         try:
-            metric = DBEscMetrics(**metric_data.dict())
-            self.db.add(metric)
-            await self.db.commit()
-            await self.db.refresh(metric)
-            return metric
+            return await EsgMetricsCRUD.create(self.db, metric_data)
         except Exception as e:
             await self.db.rollback()
             raise HTTPException(
@@ -62,27 +59,48 @@ class ESGService:
         start_date: datetime,
         end_date: datetime
     ) -> dict:
-        """Get aggregated ESG data for reporting"""
+        """
+        Get aggregated ESG data for reporting. Identical concurrent calls
+        share one query (and, with AGGREGATE_CACHE_TTL, its recent result),
+        run on its own session so no caller's session is used concurrently.
+        """
         try:
-            result = await self.db.execute(
-                self.db.query(
-                    func.sum(DBEscMetrics.co2_kg).label("total_co2"),
-                    func.sum(DBEscMetrics.energy_kwh).label("total_energy"),
-                    func.sum(DBEscMetrics.water_m3).label("total_water"),
-                    func.sum(DBEscMetrics.waste_kg).label("total_waste")
-                ).filter(
-                    DBEscMetrics.building_id == building_id,
-                    DBEscMetrics.timestamp >= start_date,
-                    DBEscMetrics.timestamp <= end_date
-                )
-            )
-            return result.mappings().one()
+            return await shared_aggregates(building_id, start_date, end_date)
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"No data found for given criteria: {str(e)}"
             )
 
+    async def get_portfolio_aggregates(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        building_ids: Optional[List[str]] = None
+    ) -> dict:
+        """Get aggregated ESG data for many buildings in one grouped query"""
+        try:
+            return await EsgMetricsCRUD.get_aggregates_by_building(
+                self.db, start_date, end_date, building_ids
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error aggregating portfolio data: {str(e)}"
+            )
+
+async def shared_aggregates(building_id: str, start_date: datetime, end_date: datetime):
+    """
+    Aggregates run on their own pooled session and coalesced across callers.
+    The shared query does not depend on any caller's session, so callers
+    may time out or go away without disturbing it.
+    """
+    async def query():
+        async with pooled_session() as session:
+            return await EsgMetricsCRUD.get_aggregates(session, building_id, start_date, end_date)
+
+    return await aggregate_flight.do(("aggregates", building_id, start_date, end_date), query)
+
 # Dependency
 async def get_esg_service(db: AsyncSession = Depends(get_db)):
     yield ESGService(db)
\ No newline at end of file
@@ -0,0 +1,323 @@
+import struct
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from core.config import settings
+
+_DOUBLE = struct.Struct("<d")
+_UINT64 = struct.Struct("<Q")
+
+# Delta-of-delta buckets: (prefix, prefix bits, value bits)
+_DOD_BUCKETS = (
+    (0b10, 2, 7),
+    (0b110, 3, 9),
+    (0b1110, 4, 12),
+)
+
+
+def _float_bits(value: float) -> int:
+    return _UINT64.unpack(_DOUBLE.pack(value))[0]
+
+
+def _bits_float(bits: int) -> float:
+    return _DOUBLE.unpack(_UINT64.pack(bits))[0]
+
+
+def _epoch(ts: datetime) -> int:
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return int(ts.timestamp())
+
+
+class _BitWriter:
+    __slots__ = ("buffer", "_acc", "_bits")
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self._acc = 0
+        self._bits = 0
+
+    def write(self, value: int, bits: int) -> None:
+        self._acc = (self._acc << bits) | (value & ((1 << bits) - 1))
+        self._bits += bits
+        while self._bits >= 8:
+            self._bits -= 8
+            self.buffer.append((self._acc >> self._bits) & 0xFF)
+        self._acc &= (1 << self._bits) - 1
+
+    def getvalue(self) -> bytes:
+        if self._bits:
+            return bytes(self.buffer) + bytes([(self._acc << (8 - self._bits)) & 0xFF])
+        return bytes(self.buffer)
+
+
+class _BitReader:
+    __slots__ = ("_data", "_pos")
+
+    def __init__(self, data: bytes):
+        self._data = data
+        self._pos = 0
+
+    def read(self, bits: int) -> int:
+        start, end = self._pos >> 3, (self._pos + bits + 7) >> 3
+        chunk = int.from_bytes(self._data[start:end], "big")
+        shift = (end << 3) - self._pos - bits
+        self._pos += bits
+        return (chunk >> shift) & ((1 << bits) - 1)
+
+
+def _signed(value: int, bits: int) -> int:
+    return value - (1 << bits) if value >= 1 << (bits - 1) else value
+
+
+def encode_chunk(timestamps: array, values: array) -> bytes:
+    """Gorilla encoding: delta-of-delta timestamps and XOR-compressed floats"""
+    writer = _BitWriter()
+    writer.write(timestamps[0], 64)
+    writer.write(_float_bits(values[0]), 64)
+    prev_ts, prev_delta = timestamps[0], 0
+    prev_bits = _float_bits(values[0])
+    prev_lead, prev_trail = 65, 0
+
+    for ts, value in zip(timestamps[1:], values[1:]):
+        delta = ts - prev_ts
+        dod = delta - prev_delta
+        if dod == 0:
+            writer.write(0, 1)
+        else:
+            for prefix, prefix_bits, value_bits in _DOD_BUCKETS:
+                if -(1 << (value_bits - 1)) <= dod < (1 << (value_bits - 1)):
+                    writer.write(prefix, prefix_bits)
+                    writer.write(dod, value_bits)
+                    break
+            else:
+                writer.write(0b1111, 4)
+                writer.write(dod, 64)
+        prev_ts, prev_delta = ts, delta
+
+        bits = _float_bits(value)
+        xor = bits ^ prev_bits
+        prev_bits = bits
+        if xor == 0:
+            writer.write(0, 1)
+            continue
+        lead = min(64 - xor.bit_length(), 31)
+        trail = (xor & -xor).bit_length() - 1
+        if lead >= prev_lead and trail >= prev_trail:
+            # Meaningful bits fit in the previous window
+            writer.write(0b10, 2)
+            writer.write(xor >> prev_trail, 64 - prev_lead - prev_trail)
+        else:
+            length = 64 - lead - trail
+            writer.write(0b11, 2)
+            writer.write(lead, 5)
+            writer.write(length - 1, 6)
+            writer.write(xor >> trail, length)
+            prev_lead, prev_trail = lead, trail
+
+    return writer.getvalue()
+
+
+def decode_chunk(data: bytes, count: int) -> Tuple[List[int], List[float]]:
+    reader = _BitReader(data)
+    ts = reader.read(64)
+    bits = reader.read(64)
+    timestamps, values = [ts], [_bits_float(bits)]
+    delta = 0
+    lead, trail = 0, 0
+
+    for _ in range(count - 1):
+        if reader.read(1) == 0:
+            dod = 0
+        elif reader.read(1) == 0:
+            dod = _signed(reader.read(7), 7)
+        elif reader.read(1) == 0:
+            dod = _signed(reader.read(9), 9)
+        elif reader.read(1) == 0:
+            dod = _signed(reader.read(12), 12)
+        else:
+            dod = _signed(reader.read(64), 64)
+        delta += dod
+        ts += delta
+        timestamps.append(ts)
+
+        if reader.read(1) == 1:
+            if reader.read(1) == 1:
+                lead = reader.read(5)
+                length = reader.read(6) + 1
+                trail = 64 - lead - length
+            bits ^= reader.read(64 - lead - trail) << trail
+        values.append(_bits_float(bits))
+
+    return timestamps, values
+
+
+class _Chunk:
+    __slots__ = ("start", "end", "count", "data")
+
+    def __init__(self, start: int, end: int, count: int, data: bytes):
+        self.start, self.end, self.count, self.data = start, end, count, data
+
+
+class _Series:
+    """Sealed Gorilla chunks plus one open chunk kept as raw arrays for cheap appends"""
+
+    __slots__ = ("chunks", "timestamps", "values", "covered_from")
+
+    def __init__(self):
+        self.chunks: List[_Chunk] = []
+        self.timestamps = array("q")
+        self.values = array("d")
+        self.covered_from: Optional[int] = None
+
+
+class HotStore:
+    """
+    In-process store of the recent window of every building series.
+
+    Series are the metric columns (co2_kg, energy_kwh, water_m3, waste_kg)
+    and "sensor:<id>" for sensor readings. A series only answers queries
+    from the point it started receiving data (covered_from); older ranges
+    return None and the caller goes to PostgreSQL. A point written again
+    for the same second replaces the previous value, like the upsert does;
+    late points land in the open chunk or re-encode the sealed one they
+    fall in. Timestamps are returned as naive UTC, like the SQL path.
+
+    With several workers each one only sees the metric writes it handled
+    itself, so metric series are neither kept nor answered then; sensor
+    feeds are subscribed by every worker and stay complete.
+    """
+
+    def __init__(
+        self,
+        window: Optional[timedelta] = None,
+        chunk_points: int = 240,
+        workers: Optional[int] = None
+    ):
+        self.window = int((window or timedelta(hours=settings.HOT_STORE_WINDOW_HOURS)).total_seconds())
+        self.chunk_points = chunk_points
+        self.workers = workers or settings.WEB_WORKERS
+        self._series: Dict[Tuple[str, str], _Series] = {}
+
+    def _complete(self, series: str) -> bool:
+        """Whether this process sees every write to the series"""
+        return self.workers == 1 or series.startswith("sensor:")
+
+    def append(self, building_id: str, series: str, timestamp: datetime, value: float) -> None:
+        if not self._complete(series):
+            return
+        key = (building_id, series)
+        s = self._series.get(key)
+        if s is None:
+            s = self._series[key] = _Series()
+        ts = _epoch(timestamp)
+
+        last = s.timestamps[-1] if s.timestamps else (s.chunks[-1].end if s.chunks else None)
+        if last is not None and ts <= last:
+            if s.timestamps and (ts >= s.timestamps[0] or not s.chunks or ts > s.chunks[-1].end):
+                i = bisect_left(s.timestamps, ts)
+                if i < len(s.timestamps) and s.timestamps[i] == ts:
+                    s.values[i] = value
+                else:
+                    s.timestamps.insert(i, ts)
+                    s.values.insert(i, value)
+            elif ts >= s.covered_from:
+                self._revise(s, ts, value)
+            # Older than the covered range: queries for it go to PostgreSQL anyway
+            return
+
+        if s.covered_from is None:
+            s.covered_from = ts
+        s.timestamps.append(ts)
+        s.values.append(value)
+        if len(s.timestamps) >= self.chunk_points:
+            self._seal(s)
+
+    def forget(self, building_id: str, series: str) -> None:
+        """Drop a series whose stored values were rewritten; it is covered again from the next append"""
+        self._series.pop((building_id, series), None)
+
+    def _seal(self, s: _Series) -> None:
+        s.chunks.append(_Chunk(
+            s.timestamps[0], s.timestamps[-1], len(s.timestamps),
+            encode_chunk(s.timestamps, s.values)
+        ))
+        s.timestamps = array("q")
+        s.values = array("d")
+        horizon = s.chunks[-1].end - self.window
+        while s.chunks and s.chunks[0].end < horizon:
+            s.chunks.pop(0)
+        if s.chunks:
+            s.covered_from = max(s.covered_from, s.chunks[0].start)
+
+    def _revise(self, s: _Series, ts: int, value: float) -> None:
+        """Late point inside the sealed history: re-encode the chunk it falls in"""
+        i = bisect_left([chunk.end for chunk in s.chunks], ts)
+        timestamps, values = decode_chunk(s.chunks[i].data, s.chunks[i].count)
+        j = bisect_left(timestamps, ts)
+        if j < len(timestamps) and timestamps[j] == ts:
+            values[j] = value
+        else:
+            timestamps.insert(j, ts)
+            values.insert(j, value)
+        s.chunks[i] = _Chunk(
+            timestamps[0], timestamps[-1], len(timestamps),
+            encode_chunk(array("q", timestamps), array("d", values))
+        )
+
+    def query(
+        self,
+        building_id: str,
+        series: str,
+        start: datetime,
+        end: datetime,
+        step: Optional[int] = None
+    ) -> Optional[List[Tuple[datetime, float]]]:
+        """Points (or step-second bucket averages) in [start, end]; None if the range is not held"""
+        if not self._complete(series):
+            return None
+        s = self._series.get((building_id, series))
+        lo, hi = _epoch(start), _epoch(end)
+        if s is None or s.covered_from is None or lo < s.covered_from:
+            return None
+
+        points: List[Tuple[int, float]] = []
+        for chunk in s.chunks:
+            if chunk.end < lo or chunk.start > hi:
+                continue
+            timestamps, values = decode_chunk(chunk.data, chunk.count)
+            points.extend((t, v) for t, v in zip(timestamps, values) if lo <= t <= hi)
+        points.extend((t, v) for t, v in zip(s.timestamps, s.values) if lo <= t <= hi)
+
+        if step:
+            buckets: Dict[int, List[float]] = {}
+            for t, v in points:
+                # Epoch-aligned like the SQL path (floor(epoch / step) * step)
+                bucket = buckets.setdefault(t - t % step, [0.0, 0])
+                bucket[0] += v
+                bucket[1] += 1
+            points = [(t, total / n) for t, (total, n) in sorted(buckets.items())]
+
+        return [
+            (datetime.fromtimestamp(t, tz=timezone.utc).replace(tzinfo=None), v)
+            for t, v in points
+        ]
+
+    def memory_stats(self) -> dict:
+        points = encoded = 0
+        for s in self._series.values():
+            for chunk in s.chunks:
+                points += chunk.count
+                encoded += len(chunk.data)
+            points += len(s.timestamps)
+            encoded += len(s.timestamps) * 16
+        return {
+            "series": len(self._series),
+            "points": points,
+            "bytes": encoded,
+            "bytes_per_point": encoded / points if points else 0.0,
+        }
+
+
+hot_store = HotStore()
@@ -0,0 +1,107 @@
+from datetime import datetime
+from typing import Iterable, Optional, Tuple
+from core.config import settings
+from api.v1.services.alert_engine import alert_engine
+from api.v1.services.anomaly import anomaly_detector
+from api.v1.services.hot_store import hot_store
+from api.v1.services.live_feed import live_feed
+from api.v1.services.sensor_registry import sensor_registry
+from api.v1.services.sketches import sketch_store
+
+# Metric columns evaluated by the alert engine like sensor types
+METRIC_FIELDS = ("co2_kg", "energy_kwh", "water_m3", "waste_kg")
+
+
+def ingest_sensor_reading(
+    building_id: str,
+    sensor_id: str,
+    sensor_type: str,
+    value: float,
+    unit: str = "",
+    timestamp: Optional[datetime] = None
+) -> bool:
+    """Single entry point for live sensor readings coming from the IoT integrations"""
+    timestamp = timestamp or datetime.utcnow()
+    if not sensor_registry.update(building_id, sensor_id, sensor_type, value, unit, timestamp):
+        return False
+    alert_engine.evaluate(building_id, sensor_type, value, timestamp)
+    if settings.HOT_STORE_ENABLED:
+        hot_store.append(building_id, f"sensor:{sensor_id}", timestamp, value)
+    live_feed.publish(
+        building_id,
+        "reading",
+        {
+            "sensor_id": sensor_id,
+            "type": sensor_type,
+            "value": value,
+            "unit": unit,
+            "timestamp": timestamp.isoformat()
+        },
+        key=sensor_id
+    )
+    return True
+
+
+def ingest_sensor_history(
+    building_id: str,
+    sensor_id: str,
+    sensor_type: str,
+    unit: str,
+    samples: Iterable[Tuple[datetime, float]]
+) -> None:
+    """
+    Hook run after recovered historical samples have been written. They fill
+    the hot window and may advance the registry's latest value, but do not
+    raise alerts or go to live subscribers.
+    """
+    latest = None
+    for timestamp, value in samples:
+        if settings.HOT_STORE_ENABLED:
+            hot_store.append(building_id, f"sensor:{sensor_id}", timestamp, value)
+        if latest is None or timestamp > latest[0]:
+            latest = (timestamp, value)
+    if latest is not None:
+        sensor_registry.update(building_id, sensor_id, sensor_type, latest[1], unit, latest[0])
+
+
+def ingest_metric(metric) -> None:
+    """Hook run after an ESG metric row has been written"""
+    timestamp = metric.timestamp or datetime.utcnow()
+    for field in METRIC_FIELDS:
+        value = getattr(metric, field)
+        alert_engine.evaluate(metric.building_id, field, value, timestamp)
+        if settings.HOT_STORE_ENABLED:
+            hot_store.append(metric.building_id, field, timestamp, value)
+        _score_anomaly(metric.building_id, field, value, timestamp)
+    live_feed.publish(
+        metric.building_id,
+        "metric",
+        {field: getattr(metric, field) for field in METRIC_FIELDS} | {"timestamp": timestamp.isoformat()}
+    )
+    sketch_store.mark_day(metric.building_id, timestamp.date())
+
+
+def ingest_gate_event(building_id: str, badge_id: str, timestamp: Optional[datetime] = None) -> None:
+    """Entry/exit gate event; only the anonymous badge id's hash is kept (in a HyperLogLog)"""
+    sketch_store.add_visitor(building_id, badge_id, timestamp or datetime.utcnow())
+
+
+def _score_anomaly(building_id: str, metric: str, value: float, timestamp: datetime) -> None:
+    z = anomaly_detector.score(building_id, metric, value, timestamp)
+    if z is None:
+        return
+    # |z| is evaluated like a sensor value, so "anomaly:<metric>" alert rules can fire and clear
+    alert_engine.evaluate(building_id, f"anomaly:{metric}", abs(z), timestamp)
+    if abs(z) >= anomaly_detector.threshold:
+        live_feed.publish(
+            building_id,
+            "anomaly",
+            {"metric": metric, "value": value, "z_score": z, "timestamp": timestamp.isoformat()}
+        )
+
+
+def _publish_alert(event: dict) -> None:
+    live_feed.publish(event["building_id"], "alert", event)
+
+
+alert_engine.add_listener(_publish_alert)
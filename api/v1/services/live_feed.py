@@ -0,0 +1,118 @@
+import asyncio
+import json
+import logging
+from collections import deque
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class LiveMessage(NamedTuple):
+    """A message encoded once and shared by every subscriber"""
+    kind: str
+    key: Optional[str]
+    text: str
+    sse: bytes
+
+
+class Subscriber:
+    """
+    Bounded per-connection buffer.
+
+    When the client falls behind, the oldest messages are dropped. Messages
+    carrying a key (e.g. a sensor id) are coalesced: a newer reading for the
+    same sensor replaces the queued one instead of growing the buffer.
+    """
+
+    __slots__ = ("buildings", "max_queue", "_buffer", "_keyed", "_event", "dropped")
+
+    def __init__(self, buildings: Iterable[str], max_queue: int):
+        self.buildings: Set[str] = set(buildings)
+        self.max_queue = max_queue
+        self._buffer: deque = deque()
+        self._keyed: Dict[str, LiveMessage] = {}
+        self._event = asyncio.Event()
+        self.dropped = 0
+
+    def push(self, message: LiveMessage) -> None:
+        if message.key is not None:
+            if message.key in self._keyed:
+                self._keyed[message.key] = message
+                self.dropped += 1
+                return
+            self._keyed[message.key] = message
+        if len(self._buffer) >= self.max_queue:
+            oldest = self._buffer.popleft()
+            if isinstance(oldest, str):
+                self._keyed.pop(oldest, None)
+            self.dropped += 1
+        self._buffer.append(message if message.key is None else message.key)
+        self._event.set()
+
+    async def get(self) -> List[LiveMessage]:
+        """Wait for and drain everything queued for this subscriber"""
+        while not self._buffer:
+            self._event.clear()
+            await self._event.wait()
+        messages = []
+        while self._buffer:
+            item = self._buffer.popleft()
+            if isinstance(item, str):
+                message = self._keyed.pop(item, None)
+                if message is None:
+                    continue
+                messages.append(message)
+            else:
+                messages.append(item)
+        return messages
+
+
+class LiveFeed:
+    """Fans out live readings and alerts from the ingestion path to WebSocket/SSE clients"""
+
+    def __init__(self, max_queue: int = 256):
+        self.max_queue = max_queue
+        self._by_building: Dict[str, Set[Subscriber]] = {}
+
+    @property
+    def subscriber_count(self) -> int:
+        return len({s for subs in self._by_building.values() for s in subs})
+
+    def subscribe(self, buildings: Iterable[str]) -> Subscriber:
+        subscriber = Subscriber(buildings, self.max_queue)
+        for building_id in subscriber.buildings:
+            self._by_building.setdefault(building_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        for building_id in subscriber.buildings:
+            subs = self._by_building.get(building_id)
+            if subs is not None:
+                subs.discard(subscriber)
+                if not subs:
+                    del self._by_building[building_id]
+        if subscriber.dropped:
+            logger.debug(f"Live subscriber closed after dropping {subscriber.dropped} messages")
+
+    def publish(self, building_id: str, kind: str, payload: dict, key: Optional[str] = None) -> int:
+        """Encode a message once and queue it for every subscriber of the building"""
+        subs = self._by_building.get(building_id)
+        if not subs:
+            return 0
+        text = json.dumps(
+            {"type": kind, "building_id": building_id, "data": payload},
+            separators=(",", ":"),
+            default=str
+        )
+        message = LiveMessage(
+            kind,
+            f"{building_id}:{key}" if key is not None else None,
+            text,
+            f"event: {kind}\ndata: {text}\n\n".encode()
+        )
+        for subscriber in subs:
+            subscriber.push(message)
+        return len(subs)
+
+
+live_feed = LiveFeed()
@@ -0,0 +1,114 @@
+import asyncio
+import logging
+from typing import List, Optional, Tuple
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError, TimeoutError as SQLAlchemyTimeoutError
+from api.v1.models.esg_metrics import DBEscMetrics, EsgMetricCreate, EsgMetricsCRUD, metric_row
+from core.config import settings
+from core.database import async_session
+
+logger = logging.getLogger(__name__)
+
+
+class GroupCommitWriter:
+    """
+    Write-behind buffer for single-metric inserts.
+
+    Concurrent callers enqueue their row and wait; a background task flushes
+    everything queued so far in one transaction every few milliseconds (or as
+    soon as max_rows are waiting). A caller's await only returns once the
+    transaction containing its row has committed.
+    """
+
+    def __init__(
+        self,
+        session_factory=async_session,
+        interval_ms: Optional[float] = None,
+        max_rows: Optional[int] = None
+    ):
+        self.session_factory = session_factory
+        self.interval = (interval_ms or settings.METRIC_FLUSH_INTERVAL_MS) / 1000
+        self.max_rows = max_rows or settings.METRIC_FLUSH_MAX_ROWS
+        self._pending: List[Tuple[dict, asyncio.Future]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    def _ensure_started(self) -> None:
+        if self._task is None or self._task.done():
+            self._closing = False
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def submit(self, metric: EsgMetricCreate) -> Tuple[DBEscMetrics, bool]:
+        """Queue a metric and wait until it is durable; the flag is False for an unchanged replay"""
+        self._ensure_started()
+        row = metric_row(metric)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((row, future))
+        if len(self._pending) >= self.max_rows:
+            self._wakeup.set()
+        # Shielded: a disconnecting client must not cancel a write already in a batch
+        stored = await asyncio.shield(future)
+        return DBEscMetrics(**(stored or row)), stored is not None
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            while self._pending:
+                batch = self._pending[:self.max_rows]
+                del self._pending[:self.max_rows]
+                await self._flush(batch)
+            if self._closing:
+                return
+
+    async def _flush(self, batch: List[Tuple[dict, asyncio.Future]]) -> None:
+        try:
+            async with self.session_factory() as session:
+                written = await EsgMetricsCRUD.create_many(session, [row for row, _ in batch])
+        except Exception as e:
+            if len(batch) == 1 or _unavailable(e):
+                # Retrying row by row would only hammer a database that is down
+                _fail(batch, e)
+                return
+            # Bisect so one bad metric costs O(log n) extra transactions, not n
+            logger.warning(f"Group commit of {len(batch)} metrics failed, splitting the batch: {str(e)}")
+            middle = len(batch) // 2
+            await self._flush(batch[:middle])
+            await self._flush(batch[middle:])
+            return
+
+        # Newest first: when a key was queued twice only the value that was stored counts as written
+        for row, future in reversed(batch):
+            stored = written.pop(row["id"], None)
+            if not future.done():
+                future.set_result(stored)
+
+    async def close(self) -> None:
+        """Flush anything still queued and stop the background task"""
+        if self._task is None or self._task.done():
+            return
+        self._closing = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+
+
+def _unavailable(error: Exception) -> bool:
+    """Connection-level failures affect every row alike, so the batch is not split"""
+    if isinstance(error, (OperationalError, InterfaceError, SQLAlchemyTimeoutError, OSError)):
+        return True
+    return isinstance(error, DBAPIError) and error.connection_invalidated
+
+
+def _fail(batch: List[Tuple[dict, asyncio.Future]], error: Exception) -> None:
+    for _, future in batch:
+        if not future.done():
+            future.set_exception(error)
+
+
+metric_writer = GroupCommitWriter()
@@ -1,10 +1,65 @@
+import asyncio
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, Iterable, List, Optional, Tuple
 from fastapi import HTTPException, status, Depends
-from esg_service import ESGService, get_esg_service
+from api.v1.services.esg_service import ESGService, get_esg_service
 from core.config import settings
+from core.serialization import dumps
 import json
 
+# Rendering is CPU-bound, so portfolio documents are produced in worker processes
+_render_pool: Optional[ProcessPoolExecutor] = None
+
+def _get_render_pool() -> ProcessPoolExecutor:
+    global _render_pool
+    if _render_pool is None:
+        _render_pool = ProcessPoolExecutor(max_workers=settings.REPORT_WORKERS)
+    return _render_pool
+
+def shutdown_render_pool() -> None:
+    global _render_pool
+    if _render_pool is not None:
+        _render_pool.shutdown(cancel_futures=True)
+        _render_pool = None
+
+def render_building_report(data: Dict[str, Any], format: str) -> Tuple[str, bytes]:
+    """Render one building document; runs in a worker process, so it must stay picklable"""
+    name = f"esg_report_{data['building_id']}_{data['report_year']}"
+    if format == "json":
+        return f"{name}.json", dumps(data)
+
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", size=12)
+    pdf.cell(200, 10, txt=f"Raport ESG - Budynek {data['building_id']}", ln=1, align='C')
+    pdf.cell(200, 10, txt=f"Rok: {data['report_year']}", ln=1, align='C')
+    for key, value in data["metrics"].items():
+        pdf.cell(200, 10, txt=f"{key}: {value}", ln=1)
+    return f"{name}.pdf", bytes(pdf.output())
+
+class _ZipStream:
+    """Write-only sink for zipfile; the archive is drained chunk by chunk while it is written"""
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
 class ReportService:
     def __init__(self, esg_service: ESGService):
         self.esg_service = esg_service
@@ -27,17 +82,7 @@ class ReportService:
                 end_date
             )
 
-            # Generate report structure
-            report_data = {
-                "building_id": building_id,
-                "report_year": report_year,
-                "generated_at": datetime.utcnow().isoformat(),
-                "metrics": dict(aggregates),
-                "metadata": {
-                    "system": settings.PROJECT_NAME,
-                    "version": settings.API_VERSION
-                }
-            }
+            report_data = self._report_data(building_id, report_year, aggregates)
 
             # Format handling
             if format == "json":
@@ -57,6 +102,76 @@ class ReportService:
                 detail=f"Report generation failed: {str(e)}"
             )
 
+    async def generate_portfolio_report(
+        self,
+        report_year: int,
+        building_ids: Optional[List[str]] = None,
+        format: str = "json"
+    ) -> AsyncIterator[bytes]:
+        """
+        Aggregate all buildings in one grouped query, then return a stream of
+        ZIP bytes; documents are rendered in worker processes and added to the
+        archive as they finish.
+        """
+        if format not in ("json", "pdf"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Unsupported report format"
+            )
+        aggregates = await self.esg_service.get_portfolio_aggregates(
+            datetime(report_year, 1, 1),
+            datetime(report_year, 12, 31, 23, 59, 59),
+            building_ids
+        )
+        reports = [
+            self._report_data(building_id, report_year, totals)
+            for building_id, totals in sorted(aggregates.items())
+        ]
+        return self._stream_zip(reports, format)
+
+    @staticmethod
+    def _report_data(building_id: str, report_year: int, aggregates) -> Dict[str, Any]:
+        return {
+            "building_id": building_id,
+            "report_year": report_year,
+            "generated_at": datetime.utcnow().isoformat(),
+            "metrics": dict(aggregates),
+            "metadata": {
+                "system": settings.PROJECT_NAME,
+                "version": settings.API_VERSION
+            }
+        }
+
+    @staticmethod
+    async def _stream_zip(reports: Iterable[Dict[str, Any]], format: str) -> AsyncIterator[bytes]:
+        loop = asyncio.get_running_loop()
+        pool = _get_render_pool()
+        # Keep a bounded number of documents in flight so memory stays flat
+        in_flight = 2 * (settings.REPORT_WORKERS or os.cpu_count() or 1)
+        compression = zipfile.ZIP_STORED if format == "pdf" else zipfile.ZIP_DEFLATED
+        sink = _ZipStream()
+        archive = zipfile.ZipFile(sink, "w", compression=compression)
+        pending = set()
+        reports = iter(reports)
+        try:
+            while True:
+                for report in reports:
+                    pending.add(loop.run_in_executor(pool, render_building_report, report, format))
+                    if len(pending) >= in_flight:
+                        break
+                if not pending:
+                    break
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    name, document = future.result()
+                    archive.writestr(name, document)
+                yield sink.take()
+            archive.close()
+            yield sink.take()
+        finally:
+            for future in pending:
+                future.cancel()
+
     async def _generate_pdf(self, data: Dict[str, Any]) -> bytes:
         """Internal method for PDF generation (placeholder)"""
         # Implement PDF generation logic using ReportLab/WeasyPrint
@@ -0,0 +1,106 @@
+import logging
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from core.config import settings
+from api.v1.models.building import DBBuilding
+from api.v1.models.data_version import DataVersionCRUD, metrics_scope
+from api.v1.models.esg_metrics import DBEscMetrics
+from api.v1.models.emission_factors import EmissionFactorCRUD
+from api.v1.services.hot_store import hot_store
+from api.v1.services.single_flight import forget_aggregates
+from api.v1.services.sketches import sketch_store
+
+logger = logging.getLogger(__name__)
+
+SCOPE2_METHODS = ("location", "market")
+
+async def recalculate_building(
+    db: AsyncSession,
+    building_id: str,
+    start: datetime,
+    end: datetime,
+    method: Optional[str] = None
+) -> Dict[str, float]:
+    """
+    Recompute Scope 2 for one building's readings in [start, end] and store
+    both figures; esg_metrics.co2_kg is set to the `method` figure
+    (SCOPE2_CO2_METHOD by default, "" keeps client-reported values), the
+    reported value being kept in scope2_emissions.reported_co2_kg.
+    Readings before the first intensity point of the zone are skipped.
+    """
+    import numpy as np
+
+    method = settings.SCOPE2_CO2_METHOD if method is None else method
+    if method and method not in SCOPE2_METHODS:
+        raise ValueError(f"Unknown Scope 2 method: {method}")
+
+    result = await db.execute(
+        select(DBEscMetrics.id, DBEscMetrics.timestamp, DBEscMetrics.energy_kwh)
+        .where(DBEscMetrics.building_id == building_id)
+        .where(DBEscMetrics.timestamp >= start)
+        .where(DBEscMetrics.timestamp <= end)
+    )
+    rows = result.all()
+    if not rows:
+        return {"readings": 0, "calculated": 0, "updated": 0, "location_co2_kg": 0.0, "market_co2_kg": 0.0}
+    ids, timestamps, energy = (list(column) for column in zip(*rows))
+
+    location, market = await EmissionFactorCRUD.get_emissions(db, building_id, timestamps, energy)
+
+    keep = np.flatnonzero(~(np.isnan(location) | np.isnan(market)))
+    if keep.size < len(ids):
+        logger.warning(f"{building_id}: no grid intensity for {len(ids) - keep.size} readings")
+    ids = [ids[i] for i in keep]
+    location, market = location[keep], market[keep]
+    updated = await EmissionFactorCRUD.save_emissions(
+        db,
+        building_id,
+        ids,
+        [timestamps[i] for i in keep],
+        location.tolist(),
+        market.tolist(),
+        {"location": location, "market": market}[method].tolist() if method else None
+    )
+    await db.commit()
+    if updated:
+        # Derived in-memory copies of co2_kg are rebuilt from the new values
+        forget_aggregates(building_id)
+        hot_store.forget(building_id, "co2_kg")
+        await DataVersionCRUD.bump_committed(db, metrics_scope(building_id))
+        for day in {timestamps[i].date() for i in keep}:
+            sketch_store.mark_day(building_id, day)
+    return {
+        "readings": len(rows),
+        "calculated": len(ids),
+        "updated": updated,
+        "location_co2_kg": float(location.sum()),
+        "market_co2_kg": float(market.sum()),
+    }
+
+async def recalculate_portfolio(
+    db: AsyncSession,
+    start: datetime,
+    end: datetime,
+    building_ids: Optional[List[str]] = None,
+    method: Optional[str] = None
+) -> Dict[str, object]:
+    """Recalculate every building (or the given ones), one transaction per building"""
+    if building_ids is None:
+        building_ids = (await db.execute(select(DBBuilding.id).order_by(DBBuilding.id))).scalars().all()
+
+    started = time.perf_counter()
+    buildings = {}
+    for building_id in building_ids:
+        buildings[building_id] = await recalculate_building(db, building_id, start, end, method)
+    elapsed = time.perf_counter() - started
+    logger.info(f"Scope 2 recalculated for {len(buildings)} buildings in {elapsed:.1f}s")
+    return {
+        "buildings": buildings,
+        "readings": sum(stats["calculated"] for stats in buildings.values()),
+        "location_co2_kg": sum(stats["location_co2_kg"] for stats in buildings.values()),
+        "market_co2_kg": sum(stats["market_co2_kg"] for stats in buildings.values()),
+        "seconds": round(elapsed, 3),
+    }
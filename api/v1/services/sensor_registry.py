@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import math
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from api.v1.models.sensor import SensorStateCRUD
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _to_epoch(ts: datetime) -> float:
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.timestamp()
+
+
+def _from_epoch(value: float) -> Optional[datetime]:
+    if math.isnan(value):
+        return None
+    return datetime.fromtimestamp(value, tz=timezone.utc).replace(tzinfo=None)
+
+
+class SensorRegistry:
+    """
+    In-process registry of the latest value of every sensor.
+
+    Each sensor gets a slot in a set of parallel arrays (value, timestamp,
+    type code, unit code). Lookups go through a single dict keyed by
+    (building_id, sensor_id), so updates and latest-value reads are O(1)
+    and listing a building costs O(sensors in that building).
+    """
+
+    def __init__(self):
+        self._index: Dict[Tuple[str, str], int] = {}
+        self._by_building: Dict[str, List[int]] = {}
+        self._keys: List[Tuple[str, str]] = []
+        self._labels: List[str] = []
+        self._label_codes: Dict[str, int] = {}
+        self._types = array("H")
+        self._units = array("H")
+        self._values = array("d")
+        self._timestamps = array("d")
+        self._dirty: set = set()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _label(self, text: str) -> int:
+        code = self._label_codes.get(text)
+        if code is None:
+            code = len(self._labels)
+            self._labels.append(text)
+            self._label_codes[text] = code
+        return code
+
+    def _slot(self, building_id: str, sensor_id: str, sensor_type: str, unit: str) -> int:
+        key = (building_id, sensor_id)
+        slot = self._index.get(key)
+        if slot is None:
+            slot = len(self._keys)
+            self._index[key] = slot
+            self._keys.append(key)
+            self._by_building.setdefault(building_id, []).append(slot)
+            self._types.append(self._label(sensor_type))
+            self._units.append(self._label(unit))
+            self._values.append(math.nan)
+            self._timestamps.append(math.nan)
+        return slot
+
+    def update(
+        self,
+        building_id: str,
+        sensor_id: str,
+        sensor_type: str,
+        value: float,
+        unit: str = "",
+        timestamp: Optional[datetime] = None
+    ) -> bool:
+        """Record a reading; older-than-current readings are ignored"""
+        slot = self._slot(building_id, sensor_id, sensor_type, unit)
+        epoch = _to_epoch(timestamp or datetime.utcnow())
+        current = self._timestamps[slot]
+        if not math.isnan(current) and epoch < current:
+            return False
+        self._values[slot] = float(value)
+        self._timestamps[slot] = epoch
+        if unit:
+            self._units[slot] = self._label(unit)
+        self._dirty.add(slot)
+        return True
+
+    def latest(self, building_id: str, sensor_id: str) -> Optional[dict]:
+        slot = self._index.get((building_id, sensor_id))
+        if slot is None:
+            return None
+        return self._row(slot)
+
+    def list_building(self, building_id: str) -> List[dict]:
+        return [self._row(slot) for slot in self._by_building.get(building_id, ())]
+
+    def _row(self, slot: int) -> dict:
+        building_id, sensor_id = self._keys[slot]
+        return {
+            "building_id": building_id,
+            "sensor_id": sensor_id,
+            "type": self._labels[self._types[slot]],
+            "unit": self._labels[self._units[slot]],
+            "last_value": self._values[slot],
+            "last_update": _from_epoch(self._timestamps[slot]),
+        }
+
+    # ----------------------------
+    # Persistence
+    # ----------------------------
+
+    async def snapshot(self, db: AsyncSession) -> int:
+        """Persist sensors changed since the previous snapshot"""
+        dirty, self._dirty = self._dirty, set()
+        rows = [self._row(slot) for slot in dirty]
+        rows = [row for row in rows if row["last_update"] is not None]
+        try:
+            written = await SensorStateCRUD.upsert_many(db, rows)
+            await db.commit()
+        except Exception:
+            self._dirty |= dirty
+            raise
+        return written
+
+    async def warm_up(self, db: AsyncSession) -> int:
+        """Load the last snapshot so a restarted process serves values immediately"""
+        states = await SensorStateCRUD.get_all(db)
+        live_dirty = set(self._dirty)
+        for state in states:
+            self.update(
+                state.building_id,
+                state.sensor_id,
+                state.type,
+                state.last_value,
+                state.unit,
+                state.last_update
+            )
+        # Only readings that arrived live (not the ones just loaded) need persisting
+        self._dirty = live_dirty
+        logger.info(f"Sensor registry warmed up with {len(states)} sensors")
+        return len(states)
+
+    async def run_snapshots(self, session_factory, interval: Optional[float] = None):
+        """Background loop writing periodic snapshots to the database"""
+        interval = interval or settings.SENSOR_SNAPSHOT_INTERVAL
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with session_factory() as session:
+                    written = await self.snapshot(session)
+                if written:
+                    logger.debug(f"Sensor registry snapshot: {written} sensors")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Sensor registry snapshot failed: {str(e)}")
+
+
+sensor_registry = SensorRegistry()
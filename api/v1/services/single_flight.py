@@ -0,0 +1,122 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set, Tuple
+from core.config import settings
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls: the first caller for a key starts
+    the work, later callers for the same key await the same future instead
+    of running their own query. With a TTL the result is also kept briefly,
+    so a herd arriving just after the query finished is served from memory.
+
+    Results are shared between callers and must be treated as read-only.
+    Errors are shared too; nothing is cached for a failed call.
+
+    `group` maps a key to the group it belongs to (e.g. its building); the
+    keys of each group are indexed so forget_group() drops them directly
+    instead of scanning the whole cache.
+    """
+
+    def __init__(
+        self,
+        ttl: Optional[float] = None,
+        max_entries: int = 10000,
+        group: Optional[Callable[[Hashable], Hashable]] = None
+    ):
+        self.ttl = settings.AGGREGATE_CACHE_TTL if ttl is None else ttl
+        self.max_entries = max_entries
+        self.group = group
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._cache: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._groups: Dict[Hashable, Set[Hashable]] = {}
+        self.executed = 0
+        self.coalesced = 0
+        self.cache_hits = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        if self.ttl:
+            cached = self._cache.get(key)
+            if cached is not None:
+                if cached[0] > time.monotonic():
+                    self.cache_hits += 1
+                    return cached[1]
+                del self._cache[key]
+                self._untrack(key)
+
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fn())
+            self._inflight[key] = future
+            self._track(key)
+            future.add_done_callback(lambda done: self._finish(key, done))
+            self.executed += 1
+        else:
+            self.coalesced += 1
+        # A caller giving up must not cancel the query the others are waiting on
+        return await asyncio.shield(future)
+
+    def _finish(self, key: Hashable, future: asyncio.Future) -> None:
+        # A query that was forgotten while running may have read pre-write data
+        current = self._inflight.get(key) is future
+        if current:
+            del self._inflight[key]
+        if not current or not self.ttl or future.cancelled() or future.exception() is not None:
+            self._untrack(key)
+            return
+        self._cache[key] = (time.monotonic() + self.ttl, future.result())
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            evicted, _ = self._cache.popitem(last=False)
+            self._untrack(evicted)
+
+    def _track(self, key: Hashable) -> None:
+        if self.group is not None:
+            self._groups.setdefault(self.group(key), set()).add(key)
+
+    def _untrack(self, key: Hashable) -> None:
+        """Unindex a key that is neither cached nor running any more"""
+        if self.group is None or key in self._cache or key in self._inflight:
+            return
+        group = self.group(key)
+        keys = self._groups.get(group)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._groups[group]
+
+    def forget(self, key: Hashable) -> None:
+        self._cache.pop(key, None)
+        self._untrack(key)
+
+    def forget_group(self, *groups: Hashable) -> None:
+        """
+        Drop the cached results of the groups and detach their running
+        queries: those callers still get the result, but it is not cached
+        and later callers start a fresh query. O(keys of the groups).
+        """
+        for group in groups:
+            for key in self._groups.pop(group, ()):
+                self._cache.pop(key, None)
+                self._inflight.pop(key, None)
+
+    def stats(self) -> dict:
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "cache_hits": self.cache_hits,
+            "in_flight": len(self._inflight),
+            "cached": len(self._cache),
+        }
+
+
+# Keys are ("aggregates", building_id, start, end), grouped by building
+aggregate_flight = SingleFlight(group=lambda key: key[1])
+
+def forget_aggregates(*building_ids: str) -> None:
+    """Called after metric writes so AGGREGATE_CACHE_TTL never serves totals older than the write"""
+    if not aggregate_flight.ttl or not building_ids:
+        return
+    aggregate_flight.forget_group(*building_ids)
@@ -0,0 +1,354 @@
+import asyncio
+import hashlib
+import logging
+import math
+import struct
+from array import array
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from api.v1.models.esg_metrics import EsgMetricsCRUD
+from api.v1.models.sketch import DBMetricSketch, MetricSketchCRUD
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------
+# t-digest
+# ----------------------------
+
+class TDigest:
+    """
+    Merging t-digest (k1 scale function) for quantiles of a metric.
+
+    Centroids near the tails are kept small, so extreme quantiles (p90,
+    p99) are accurate to well under 1% of rank at compression 100. Two
+    digests merge by concatenating their centroids and recompressing.
+    """
+
+    _HEADER = struct.Struct("<dddI")
+
+    def __init__(self, compression: float = 100.0):
+        self.compression = compression
+        self.means: List[float] = []
+        self.weights: List[float] = []
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._buffer: List[float] = []
+
+    def add(self, value: float) -> None:
+        self._buffer.append(value)
+        if len(self._buffer) >= 10 * self.compression:
+            self._compress()
+
+    def merge(self, other: "TDigest") -> "TDigest":
+        return self.merge_all([other])
+
+    def merge_all(self, others: Iterable["TDigest"]) -> "TDigest":
+        """Merge many digests with a single recompression, not one per digest"""
+        self._compress()
+        for other in others:
+            other._compress()
+            self.means += other.means
+            self.weights += other.weights
+            self.total += other.total
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+        self._compress(force=True)
+        return self
+
+    def _k(self, q: float) -> float:
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _q_limit(self, q: float) -> float:
+        k = self._k(q) + 1
+        if k >= self.compression / 4:
+            return 1.0
+        return (math.sin(k * 2 * math.pi / self.compression) + 1) / 2
+
+    def _compress(self, force: bool = False) -> None:
+        if not self._buffer and not force:
+            return
+        if self._buffer:
+            self.min = min(self.min, min(self._buffer))
+            self.max = max(self.max, max(self._buffer))
+            self.total += len(self._buffer)
+        points = sorted(
+            list(zip(self.means, self.weights)) + [(v, 1.0) for v in self._buffer]
+        )
+        self._buffer = []
+        if not points:
+            return
+
+        means, weights = [], []
+        total = self.total
+        cum = 0.0
+        mean, weight = points[0]
+        limit = self._q_limit(0.0)
+        for m, w in points[1:]:
+            if (cum + weight + w) / total <= limit:
+                mean += (m - mean) * w / (weight + w)
+                weight += w
+            else:
+                means.append(mean)
+                weights.append(weight)
+                cum += weight
+                limit = self._q_limit(cum / total)
+                mean, weight = m, w
+        means.append(mean)
+        weights.append(weight)
+        self.means, self.weights = means, weights
+
+    def quantile(self, q: float) -> Optional[float]:
+        self._compress()
+        if not self.means:
+            return None
+        if len(self.means) == 1:
+            return self.means[0]
+        target = q * self.total
+        cum = 0.0
+        prev_center, prev_mean = 0.0, self.min
+        for mean, weight in zip(self.means, self.weights):
+            center = cum + weight / 2
+            if target < center:
+                span = center - prev_center
+                return prev_mean + (mean - prev_mean) * ((target - prev_center) / span if span else 0)
+            prev_center, prev_mean = center, mean
+            cum += weight
+        span = self.total - prev_center
+        return prev_mean + (self.max - prev_mean) * ((target - prev_center) / span if span else 0)
+
+    def to_bytes(self) -> bytes:
+        self._compress()
+        body = array("d")
+        for mean, weight in zip(self.means, self.weights):
+            body.append(mean)
+            body.append(weight)
+        return self._HEADER.pack(self.compression, self.min, self.max, len(self.means)) + body.tobytes()
+
+    @classmethod
+    def from_bytes(cls, payload: bytes) -> "TDigest":
+        compression, minimum, maximum, count = cls._HEADER.unpack_from(payload)
+        body = array("d")
+        body.frombytes(payload[cls._HEADER.size:cls._HEADER.size + count * 16])
+        digest = cls(compression)
+        digest.means = list(body[0::2])
+        digest.weights = list(body[1::2])
+        digest.total = sum(digest.weights)
+        digest.min, digest.max = minimum, maximum
+        return digest
+
+    @classmethod
+    def merge_payloads(cls, payloads: Iterable[bytes]) -> Optional["TDigest"]:
+        """
+        Merge serialised digests without building one object each: the
+        centroids of all payloads are read into one array and compressed once
+        """
+        body = array("d")
+        compression, minimum, maximum = None, math.inf, -math.inf
+        for payload in payloads:
+            digest_compression, digest_min, digest_max, count = cls._HEADER.unpack_from(payload)
+            if compression is None:
+                compression = digest_compression
+            minimum, maximum = min(minimum, digest_min), max(maximum, digest_max)
+            body.frombytes(payload[cls._HEADER.size:cls._HEADER.size + count * 16])
+        if compression is None:
+            return None
+        digest = cls(compression)
+        digest.means = list(body[0::2])
+        digest.weights = list(body[1::2])
+        digest.total = sum(digest.weights)
+        digest.min, digest.max = minimum, maximum
+        digest._compress(force=True)
+        return digest
+
+# ----------------------------
+# HyperLogLog
+# ----------------------------
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct counter; registers merge by taking the maximum.
+
+    With 2^14 registers (16 KiB) the relative standard error is
+    1.04 / sqrt(16384), about 0.81%.
+    """
+
+    def __init__(self, precision: int = 14, registers: Optional[bytearray] = None):
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = registers if registers is not None else bytearray(self.m)
+
+    @property
+    def standard_error(self) -> float:
+        return 1.04 / math.sqrt(self.m)
+
+    def add(self, item: str) -> None:
+        h = int.from_bytes(hashlib.blake2b(item.encode(), digest_size=8).digest(), "big")
+        index = h >> (64 - self.precision)
+        rest = h & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        return self.merge_all([other])
+
+    def merge_all(self, others: Iterable["HyperLogLog"]) -> "HyperLogLog":
+        """Element-wise maximum of the registers, vectorised over each sketch"""
+        import numpy as np
+
+        registers = np.frombuffer(self.registers, dtype=np.uint8).copy()
+        for other in others:
+            if other.precision != self.precision:
+                raise ValueError("Cannot merge HyperLogLogs of different precision")
+            np.maximum(registers, np.frombuffer(other.registers, dtype=np.uint8), out=registers)
+        self.registers = bytearray(registers.tobytes())
+        return self
+
+    def count(self) -> float:
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m * self.m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.m and zeros:
+            return self.m * math.log(self.m / zeros)  # linear counting for small cardinalities
+        return estimate
+
+    def to_bytes(self) -> bytes:
+        return bytes([self.precision]) + bytes(self.registers)
+
+    @classmethod
+    def from_bytes(cls, payload: bytes) -> "HyperLogLog":
+        return cls(payload[0], bytearray(payload[1:]))
+
+# ----------------------------
+# Per-building, per-day sketch store
+# ----------------------------
+
+SketchKey = Tuple[str, date, str, str]
+
+_DECODERS = {"tdigest": TDigest.from_bytes, "hll": HyperLogLog.from_bytes}
+
+# Suffix of the t-digests holding a metric's daily total divided by that day's visitors
+PER_PERSON = "_per_person"
+
+
+class SketchStore:
+    """
+    Per-building, per-day sketches behind the portfolio queries.
+
+    Visitors are counted in HyperLogLogs that build up in memory and are
+    merged into metric_sketches periodically; being mergeable, several
+    workers can flush partial sketches for the same day. Metric t-digests
+    hold one value per building-day, the day's total and that total per
+    distinct visitor, so a merged digest answers "p90 daily energy per
+    person". Writers only mark the building-days they touched; the flush
+    recomputes those from esg_metrics, which makes it idempotent and lets
+    bulk paths (imports, backfills, recalculations) feed it as well.
+    """
+
+    METRICS = ("co2_kg", "energy_kwh", "water_m3", "waste_kg")
+
+    def __init__(self):
+        self._pending: Dict[SketchKey, HyperLogLog] = {}
+        self._dirty: Set[Tuple[str, date]] = set()
+
+    def mark_day(self, building_id: str, day: date) -> None:
+        """Metric rows of the building-day were written or changed"""
+        self._dirty.add((building_id, day))
+
+    def mark_range(self, building_id: str, start: date, end: date) -> None:
+        day = start
+        while day <= end:
+            self._dirty.add((building_id, day))
+            day += timedelta(days=1)
+
+    def add_visitor(self, building_id: str, badge_id: str, timestamp: datetime) -> None:
+        day = timestamp.date()
+        key = (building_id, day, "hll", "visitors")
+        hll = self._pending.get(key)
+        if hll is None:
+            hll = self._pending[key] = HyperLogLog()
+        hll.add(badge_id)
+        self._dirty.add((building_id, day))  # the per-person figures change too
+
+    async def flush(self, db: AsyncSession) -> int:
+        pending, self._pending = self._pending, {}
+        dirty, self._dirty = self._dirty, set()
+        try:
+            for (building_id, day, kind, metric), sketch in sorted(pending.items(), key=lambda item: item[0]):
+                row = await MetricSketchCRUD.get_for_update(db, building_id, day, kind, metric)
+                if row is None:
+                    db.add(DBMetricSketch(
+                        building_id=building_id, day=day, kind=kind, metric=metric,
+                        payload=sketch.to_bytes()
+                    ))
+                else:
+                    row.payload = _DECODERS[kind](row.payload).merge(sketch).to_bytes()
+            days_by_building: Dict[str, List[date]] = {}
+            for building_id, day in dirty:
+                days_by_building.setdefault(building_id, []).append(day)
+            for building_id in sorted(days_by_building):
+                await self._roll_up(db, building_id, days_by_building[building_id])
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            for key, sketch in pending.items():
+                current = self._pending.get(key)
+                self._pending[key] = sketch if current is None else sketch.merge(current)
+            self._dirty |= dirty
+            raise
+        return len(pending) + len(dirty)
+
+    async def _roll_up(self, db: AsyncSession, building_id: str, days: List[date]) -> None:
+        """Rewrite the metric t-digests of the given days of one building (no commit)"""
+        start, end = min(days), max(days)
+        totals = await EsgMetricsCRUD.get_daily_totals(db, building_id, start, end)
+        visitors = await MetricSketchCRUD.get_daily_payloads(db, building_id, "hll", "visitors", start, end)
+        rows = []
+        for day in days:
+            day_totals = totals.get(day)
+            if day_totals is None:
+                continue
+            persons = HyperLogLog.from_bytes(visitors[day]).count() if day in visitors else 0.0
+            for metric in self.METRICS:
+                value = day_totals[metric]
+                rows.append(_digest_row(building_id, day, metric, value))
+                if persons >= 1:
+                    rows.append(_digest_row(building_id, day, metric + PER_PERSON, value / persons))
+        await MetricSketchCRUD.put_many(db, rows)
+
+    async def run_flush(self, session_factory, interval: Optional[float] = None):
+        """Background loop merging pending sketches into the database"""
+        interval = interval or settings.SKETCH_FLUSH_INTERVAL
+        while True:
+            await asyncio.sleep(interval)
+            if not self._pending and not self._dirty:
+                continue
+            try:
+                async with session_factory() as session:
+                    await self.flush(session)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Sketch flush failed: {str(e)}")
+
+
+def _digest_row(building_id: str, day: date, metric: str, value: float) -> dict:
+    digest = TDigest()
+    digest.add(value)
+    return {"building_id": building_id, "day": day, "kind": "tdigest", "metric": metric, "payload": digest.to_bytes()}
+
+
+def merge_payloads(kind: str, payloads: Iterable[bytes]):
+    """One sketch from many stored ones (None when there are none), merged in a single pass"""
+    if kind == "tdigest":
+        return TDigest.merge_payloads(payloads)
+    sketches = [_DECODERS[kind](payload) for payload in payloads]
+    if not sketches:
+        return None
+    return sketches[0].merge_all(sketches[1:])
+
+
+sketch_store = SketchStore()
@@ -1,12 +1,25 @@
 # core/__init__.py
-from .config import settings
-from .database import Base, get_db
-from .security import (
-    get_current_user,
-    require_role,
-    AdminDep,
-    BuildingManagerDep
-)
+# Names are resolved lazily so importing e.g. core.config does not pull in
+# the database engine, JWT and password hashing stacks.
+from importlib import import_module
+
+_LAZY_IMPORTS = {
+    "settings": ".config",
+    "Base": ".database",
+    "get_db": ".database",
+    "get_current_user": ".security",
+    "require_role": ".security",
+    "AdminDep": ".security",
+    "BuildingManagerDep": ".security",
+    "RateLimitDep": ".admission",
+}
+
+def __getattr__(name):
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_LAZY_IMPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
 
 __all__ = [
     "settings",
@@ -15,5 +28,6 @@ __all__ = [
     "get_current_user",
     "require_role",
     "AdminDep",
-    "BuildingManagerDep"
+    "BuildingManagerDep",
+    "RateLimitDep"
 ]
\ No newline at end of file
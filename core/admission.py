@@ -0,0 +1,155 @@
+import hmac
+import math
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, Optional, Tuple
+from fastapi import Depends, HTTPException, Request, status
+from jose import JWTError, jwt
+from core.config import settings
+from core.database import current_tenant
+from core.security import SECRET_KEY, ALGORITHM
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, up to `burst` banked"""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """Consume one token; returns 0 when admitted, else seconds until one is available"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+class RateLimiter:
+    """
+    Per-tenant and per-(tenant, route) token buckets, each allowed a burst
+    of RATE_LIMIT_BURST_SECONDS worth of its rate.
+
+    Route limits default to RATE_LIMIT_ROUTE_RPS and can be overridden per
+    route template in RATE_LIMIT_ROUTES, e.g. {"POST /esg/metrics": 5}.
+    Configured rates are per node; each worker enforces 1/workers of them.
+    Idle buckets are evicted LRU once max_keys is reached.
+    """
+
+    def __init__(self, max_keys: int = 50000, workers: Optional[int] = None):
+        self.max_keys = max_keys
+        self.workers = max(1, workers or settings.WEB_WORKERS)
+        self._buckets: "OrderedDict[Tuple[str, str], TokenBucket]" = OrderedDict()
+        self.admitted = 0
+        self.rejected: Counter = Counter()  # (scope, route) -> count
+
+    def _bucket(self, key: Tuple[str, str], rate: float) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            burst = max(1.0, rate * settings.RATE_LIMIT_BURST_SECONDS)
+            bucket = self._buckets[key] = TokenBucket(rate, burst)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+    def check(self, tenant: str, route: str) -> float:
+        """0 if the request is admitted, else the Retry-After delay in seconds"""
+        wait = self._bucket((tenant, ""), settings.RATE_LIMIT_TENANT_RPS / self.workers).take()
+        if wait:
+            self.rejected[("tenant", route)] += 1
+            return wait
+
+        rate = settings.RATE_LIMIT_ROUTES.get(route, settings.RATE_LIMIT_ROUTE_RPS) / self.workers
+        wait = self._bucket((tenant, route), rate).take()
+        if wait:
+            self.rejected[("route", route)] += 1
+            return wait
+
+        self.admitted += 1
+        return 0.0
+
+rate_limiter = RateLimiter()
+
+def tenant_of(request: Request) -> str:
+    """Tenant from the bearer token (tenant_id claim, else subject); client address otherwise"""
+    authorization = request.headers.get("authorization", "")
+    if authorization[:7].lower() == "bearer ":
+        try:
+            payload = jwt.decode(authorization[7:], SECRET_KEY, algorithms=[ALGORITHM])
+            tenant = payload.get("tenant_id") or payload.get("sub")
+            if tenant:
+                return str(tenant)
+        except JWTError:
+            pass
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+async def rate_limit(request: Request) -> None:
+    """Router dependency: admit or reject with 429 before any DB work is done"""
+    tenant = tenant_of(request)
+    current_tenant.set(tenant)
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    route = request.scope.get("route")
+    key = f"{request.method} {route.path if route else request.url.path}"
+    wait = rate_limiter.check(tenant, key)
+    if wait:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded",
+            headers={"Retry-After": str(max(1, math.ceil(wait)))}
+        )
+
+RateLimitDep = Depends(rate_limit)
+
+def require_metrics_token(request: Request) -> None:
+    """Scrapers present METRICS_TOKEN as a bearer token; without one configured /metrics is off"""
+    token = settings.METRICS_TOKEN
+    if token is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    authorization = request.headers.get("authorization", "")
+    if not hmac.compare_digest(authorization.encode(), f"Bearer {token.get_secret_value()}".encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+MetricsTokenDep = Depends(require_metrics_token)
+
+def render_metrics(pool: Dict[str, object]) -> str:
+    """Admission counters and limits (this worker's share) in Prometheus text exposition format"""
+    lines = [
+        "# TYPE esg_admission_admitted_total counter",
+        f"esg_admission_admitted_total {rate_limiter.admitted}",
+        "# TYPE esg_admission_rejected_total counter",
+    ]
+    for (scope, route), count in sorted(rate_limiter.rejected.items()):
+        lines.append(f'esg_admission_rejected_total{{scope="{scope}",route="{route}"}} {count}')
+    lines += [
+        "# TYPE esg_db_shed_total counter",
+        *(
+            f'esg_db_shed_total{{reason="{reason}"}} {count}'
+            for reason, count in sorted(pool["shed"].items())
+        ),
+        "# TYPE esg_db_sessions_in_use gauge",
+        f"esg_db_sessions_in_use {pool['in_use']}",
+        "# TYPE esg_db_sessions_waiting gauge",
+        f"esg_db_sessions_waiting {pool['waiting']}",
+        "# TYPE esg_limit gauge",
+        f'esg_limit{{name="db_pool_size"}} {pool["pool_size"]}',
+        f'esg_limit{{name="db_max_queue"}} {pool["max_queue"]}',
+        f'esg_limit{{name="db_tenant_max_sessions"}} {pool["tenant_max_sessions"]}',
+        f'esg_limit{{name="tenant_rps"}} {settings.RATE_LIMIT_TENANT_RPS / rate_limiter.workers}',
+        f'esg_limit{{name="burst_seconds"}} {settings.RATE_LIMIT_BURST_SECONDS}',
+        f'esg_limit{{name="route_rps"}} {settings.RATE_LIMIT_ROUTE_RPS / rate_limiter.workers}',
+    ]
+    for route, rate in sorted(settings.RATE_LIMIT_ROUTES.items()):
+        lines.append(f'esg_limit{{name="route_rps",route="{route}"}} {rate / rate_limiter.workers}')
+    return "\n".join(lines) + "\n"
@@ -1,5 +1,5 @@
 from functools import lru_cache
-from typing import Optional, Literal
+from typing import Dict, Optional, Literal
 from pydantic import PostgresDsn, field_validator, SecretStr
 from pydantic_settings import BaseSettings
 
@@ -18,6 +18,93 @@ class Settings(BaseSettings):
     ENV: Literal["dev", "prod"] = "dev"
     DEBUG: bool = False
     SECRET_KEY: SecretStr = "your-strong-secret-key"
+    PROJECT_NAME: str = "Globalworth ESG API"
+    API_VERSION: str = "1.0"
+
+    # Serving / connection budget
+    WEB_WORKERS: int = 1  # worker processes per node
+    DB_CONNECTION_BUDGET: int = 30  # PostgreSQL connections for the whole node, split across workers
+    DB_POOL_TIMEOUT: float = 5.0  # seconds a request waits for a connection before getting 503
+    DB_PGBOUNCER: bool = False  # behind pgbouncer (transaction pooling): disable prepared statements
+    DB_MAX_QUEUE: int = 100  # requests waiting for a connection beyond this are shed immediately
+    DB_TENANT_MAX_SESSIONS: int = 10  # connections one tenant may hold or wait for at once
+
+    # Admission control (token buckets per tenant and per tenant+route). Like
+    # the DB limits above these are per node; each worker enforces its
+    # 1/WEB_WORKERS share, as requests are spread evenly across workers.
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_TENANT_RPS: float = 50.0
+    RATE_LIMIT_ROUTE_RPS: float = 20.0
+    RATE_LIMIT_ROUTES: Dict[str, float] = {}  # per-route overrides, e.g. {"POST /esg/metrics": 5}
+    RATE_LIMIT_BURST_SECONDS: float = 2.0  # bucket capacity in seconds of rate
+    METRICS_TOKEN: Optional[SecretStr] = None  # bearer token for /metrics scrapes; endpoint disabled when unset
+
+    # Metric write-behind (group commit of single-metric writes)
+    METRIC_WRITE_BEHIND: bool = False
+    METRIC_FLUSH_INTERVAL_MS: float = 5.0
+    METRIC_FLUSH_MAX_ROWS: int = 500
+
+    # On-demand request profiling (admins send X-Profile: 1 or ?profile=1)
+    PROFILING_ENABLED: bool = False
+    PROFILE_SAMPLE_INTERVAL: float = 0.001  # seconds between stack samples
+    PROFILE_KEEP: int = 20  # finished profiles kept for download
+
+    # Scope 2 emissions (grid_intensity / energy_contracts tables)
+    DEFAULT_GRID_ZONE: str = "PL"  # zone of buildings without a building_grid_zones row
+    SCOPE2_CO2_METHOD: str = "location"  # figure written to esg_metrics.co2_kg: location | market | "" (keep)
+    SCOPE2_RESIDUAL_MIX: Dict[str, float] = {}  # kg CO2/kWh per zone for uncontracted market-based energy
+
+    # Compact metric table (esg_metrics_compact, see scripts/migrate_compact_metrics.py)
+    METRIC_COMPACT_READS: bool = False  # serve aggregates/series from the compact layout
+
+    # Portfolio sketches (t-digest / HyperLogLog)
+    SKETCH_FLUSH_INTERVAL: float = 30.0  # seconds between merges into metric_sketches
+
+    # Hot window (Gorilla-compressed recent time series per building)
+    HOT_STORE_ENABLED: bool = False
+    HOT_STORE_WINDOW_HOURS: int = 168
+
+    # Anomaly detection
+    ANOMALY_Z_THRESHOLD: float = 3.5
+
+    # Aggregate queries (identical concurrent calls are always coalesced)
+    AGGREGATE_CACHE_TTL: float = 0.0  # seconds to reuse a finished result; 0 disables
+
+    # Building ESG overview (parts fetched concurrently)
+    OVERVIEW_PART_TIMEOUT: float = 2.0  # seconds per part before it is reported as missing
+    CO2_REDUCTION_TARGET: float = 0.25  # goal: this fraction below the same period last year
+
+    # Reports
+    REPORT_WORKERS: Optional[int] = None  # processes rendering portfolio reports (default: CPU count)
+
+    # MQTT
+    MQTT_ENABLED: bool = True  # subscribe to sensor readings in the API process
+    MQTT_HOST: str = "localhost"
+    MQTT_PORT: int = 1883
+    MQTT_USER: Optional[str] = None
+    MQTT_PASSWORD: Optional[str] = None
+    MQTT_RECONNECT_MIN: float = 0.5  # seconds; backoff doubles up to MQTT_RECONNECT_MAX
+    MQTT_RECONNECT_MAX: float = 60.0
+    MQTT_SPOOL_PATH: str = "storage/mqtt_spool.bin"
+    MQTT_SPOOL_BYTES: int = 64 * 1024 * 1024  # oldest messages are dropped beyond this
+    MQTT_SPOOL_DRAIN_RATE: float = 200.0  # messages per second replayed after reconnecting
+
+    # BACnet
+    BACNET_ADDRESS: str = "0.0.0.0"  # local interface (address[/prefix]) of the BACnet client
+    BACNET_TREND_CHUNK: int = 100  # trend-log records per ReadRange request
+    BACNET_DEVICE_CONCURRENCY: int = 2  # ReadRange requests in flight per controller
+    BACNET_POINTS_FILE: Optional[str] = None  # JSON list of points to poll; polling is off when unset
+    BACNET_POLL_INTERVAL: float = 60.0  # seconds between polling rounds
+
+    # Sensor registry
+    SENSOR_SNAPSHOT_INTERVAL: float = 60.0  # seconds between DB snapshots
+
+    # Alert engine
+    ALERT_RULES_REFRESH: float = 10.0  # seconds between alert_rules version checks
+
+    # Building registry
+    BUILDING_REGISTRY_SIZE: int = 10000  # max cached buildings per process
+    BUILDING_REGISTRY_REFRESH: float = 30.0  # seconds between version checks
 
     @field_validator("DATABASE_URL", mode='before')
     @classmethod
@@ -1,5 +1,9 @@
+import asyncio
+from collections import Counter
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from contextvars import ContextVar
+from typing import AsyncGenerator, Dict, Optional
+from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import declarative_base, sessionmaker
 from core.config import settings
@@ -9,14 +13,26 @@ DATABASE_URL = settings.DATABASE_URL.unicode_string() if settings.DATABASE_URL e
     f"postgresql+asyncpg://{settings.DB_USER}:{settings.DB_PASSWORD}@" \
     f"{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
 
+# Each worker process gets an equal share of the node-wide connection budget
+# and admission limits
+POOL_SIZE = max(1, settings.DB_CONNECTION_BUDGET // max(1, settings.WEB_WORKERS))
+MAX_QUEUE = max(1, settings.DB_MAX_QUEUE // max(1, settings.WEB_WORKERS))
+TENANT_MAX_SESSIONS = max(1, settings.DB_TENANT_MAX_SESSIONS // max(1, settings.WEB_WORKERS))
+
+# asyncpg prepared statements do not survive pgbouncer transaction pooling
+connect_args = {"statement_cache_size": 0, "prepared_statement_cache_size": 0} \
+    if settings.DB_PGBOUNCER else {}
+
 # Create async engine with optimized settings
 engine = create_async_engine(
     DATABASE_URL,
     echo=settings.DEBUG,  # Only echo SQL in debug mode
-    pool_size=20,
-    max_overflow=10,
-    pool_timeout=30,
-    pool_recycle=1800
+    pool_size=POOL_SIZE,
+    max_overflow=0,  # never exceed this worker's share
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=1800,
+    pool_pre_ping=settings.DB_PGBOUNCER,
+    connect_args=connect_args
 )
 
 # Session factory with better defaults
@@ -30,9 +46,68 @@ async_session = sessionmaker(
 
 Base = declarative_base()
 
-@asynccontextmanager
+# Requests holding a session are limited to the pool size; the rest wait here
+# (not inside the pool). Waiting is shed early with 503 when the queue is
+# already MAX_QUEUE deep or the tenant already holds or waits for
+# TENANT_MAX_SESSIONS sessions, and otherwise once DB_POOL_TIMEOUT elapses.
+_session_slots: Optional[asyncio.Semaphore] = None
+_waiting = 0
+_in_use = 0
+_tenant_sessions: Counter = Counter()
+shed_counts: Counter = Counter()
+
+# Tenant of the current request (set by the rate limiter); None outside requests
+current_tenant: ContextVar[Optional[str]] = ContextVar("current_tenant", default=None)
+
+def _slots() -> asyncio.Semaphore:
+    global _session_slots
+    if _session_slots is None:
+        _session_slots = asyncio.Semaphore(POOL_SIZE)
+    return _session_slots
+
+def _shed(reason: str) -> HTTPException:
+    shed_counts[reason] += 1
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Database busy, retry later",
+        headers={"Retry-After": "1"}
+    )
+
+def pool_stats() -> Dict[str, object]:
+    return {
+        "pool_size": POOL_SIZE,
+        "max_queue": MAX_QUEUE,
+        "tenant_max_sessions": TENANT_MAX_SESSIONS,
+        "in_use": _in_use,
+        "waiting": _waiting,
+        "shed": dict(shed_counts),
+    }
+
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    """Async database session context manager"""
+    """Async database session dependency with admission control"""
+    global _waiting, _in_use
+    tenant = current_tenant.get()
+    if tenant is not None and _tenant_sessions[tenant] >= TENANT_MAX_SESSIONS:
+        raise _shed("tenant_sessions")
+    if _waiting >= MAX_QUEUE:
+        raise _shed("queue_full")
+
+    # Counted from the moment it queues, so one tenant cannot fill the queue
+    if tenant is not None:
+        _tenant_sessions[tenant] += 1
+    slots = _slots()
+    _waiting += 1
+    try:
+        await asyncio.wait_for(slots.acquire(), timeout=settings.DB_POOL_TIMEOUT)
+    except BaseException as exc:
+        _release_tenant(tenant)
+        if isinstance(exc, asyncio.TimeoutError):
+            raise _shed("timeout")
+        raise
+    finally:
+        _waiting -= 1
+
+    _in_use += 1
     session = async_session()
     try:
         yield session
@@ -41,4 +116,18 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         await session.rollback()
         raise exc
     finally:
-        await session.close()
\ No newline at end of file
+        await session.close()
+        _in_use -= 1
+        _release_tenant(tenant)
+        slots.release()
+
+def _release_tenant(tenant: Optional[str]) -> None:
+    if tenant is None:
+        return
+    _tenant_sessions[tenant] -= 1
+    if not _tenant_sessions[tenant]:
+        del _tenant_sessions[tenant]
+
+# get_db for code that needs an extra session outside dependency injection
+# (e.g. concurrent fan-out); it counts against the same admission limits.
+pooled_session = asynccontextmanager(get_db)
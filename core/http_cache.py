@@ -0,0 +1,64 @@
+import zlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+from fastapi import HTTPException, Request, Response, status
+
+
+def make_etag(scope: str, version: int, request: Request) -> str:
+    """Weak ETag from the scope version; the query string is folded in since it changes the representation"""
+    variant = zlib.crc32(f"{scope}?{request.url.query}".encode())
+    return f'W/"{version}-{variant:08x}"'
+
+
+def _http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def not_modified(
+    request: Request,
+    etag: str,
+    last_modified: Optional[datetime] = None,
+    exists: bool = True
+) -> Optional[Response]:
+    """
+    Returns a 304 response if the client's validators still match, otherwise
+    None. `exists` is False for a scope that was never written (version 0):
+    `If-None-Match: *` then fails with 412 instead of confirming a
+    representation that is not there.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip() for tag in if_none_match.split(",")}
+        if "*" in tags and not exists:
+            raise HTTPException(status.HTTP_412_PRECONDITION_FAILED, detail="No current representation")
+        matched = "*" in tags or etag in tags or etag.removeprefix("W/") in tags
+    elif last_modified is not None and "if-modified-since" in request.headers:
+        try:
+            since = parsedate_to_datetime(request.headers["if-modified-since"])
+        except (TypeError, ValueError):
+            return None
+        current = last_modified.replace(tzinfo=timezone.utc) if last_modified.tzinfo is None else last_modified
+        matched = current.replace(microsecond=0) <= since
+    else:
+        return None
+
+    if not matched:
+        return None
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(
+    response: Response,
+    etag: str,
+    last_modified: Optional[datetime] = None
+) -> Response:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    if last_modified is not None:
+        response.headers["Last-Modified"] = _http_date(last_modified)
+    return response
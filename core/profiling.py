@@ -0,0 +1,255 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+from sqlalchemy import event
+from core.config import settings
+from core.database import engine
+from core.security import token_role
+
+logger = logging.getLogger(__name__)
+
+# Frames of these functions count as response serialisation
+_SERIALIZE_FUNCTIONS = {"serialize_response", "jsonable_encoder", "render", "rows_to_json", "dumps"}
+
+# Profile of the current request; None (the common case) outside profiled requests
+_current_profile: ContextVar[Optional["RequestProfile"]] = ContextVar("current_profile", default=None)
+
+class RequestProfile:
+    """Samples, SQL statement timings and wall time of one profiled request"""
+
+    def __init__(self, method: str, path: str, task: Optional[asyncio.Task]):
+        self.id = uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.task = task
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self.wall = 0.0
+        self.stacks: Counter = Counter()  # collapsed stack -> sampled microseconds
+        self.own_samples = 0
+        self.own_seconds = 0.0
+        self.other_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.statements: Dict[str, List[float]] = {}  # statement -> [calls, seconds]
+        self.status: Optional[int] = None
+
+    def add_sample(self, stack: str, own: bool, serializing: bool, seconds: float) -> None:
+        """One stack sample standing for the `seconds` since the sampler's previous wake-up"""
+        micros = round(seconds * 1e6)
+        if own:
+            self.own_samples += 1
+            self.own_seconds += seconds
+            if serializing:
+                self.serialize_seconds += seconds
+            self.stacks[stack] += micros
+        else:
+            self.other_seconds += seconds
+            self.stacks[f"(other tasks);{stack}"] += micros
+
+    def add_statement(self, statement: str, seconds: float) -> None:
+        timing = self.statements.get(statement)
+        if timing is None:
+            timing = self.statements[statement] = [0, 0.0]
+        timing[0] += 1
+        timing[1] += seconds
+
+    def elapsed(self) -> float:
+        return self.wall or time.perf_counter() - self._start
+
+    def breakdown(self) -> Dict[str, float]:
+        """
+        Milliseconds per component; python and serialize are sampled
+        estimates, each sample weighted by the measured time since the
+        previous one (the sampler thread wakes late under GIL contention)
+        """
+        return {
+            "total": round(self.elapsed() * 1000, 2),
+            "db": round(sum(seconds for _, seconds in self.statements.values()) * 1000, 2),
+            "python": round(self.own_seconds * 1000, 2),
+            "serialize": round(self.serialize_seconds * 1000, 2),
+            "other_tasks": round(self.other_seconds * 1000, 2),
+        }
+
+    def server_timing(self) -> str:
+        return ", ".join(f"{name};dur={ms}" for name, ms in self.breakdown().items())
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "started": self.started,
+            "breakdown_ms": self.breakdown(),
+            "samples": self.own_samples,
+            "statements": sorted(
+                (
+                    {"statement": statement, "calls": calls, "total_ms": round(seconds * 1000, 2)}
+                    for statement, (calls, seconds) in self.statements.items()
+                ),
+                key=lambda s: s["total_ms"],
+                reverse=True
+            ),
+        }
+
+    def collapsed(self) -> str:
+        """
+        Folded stacks ("frame;frame;frame weight"), as read by flamegraph.pl,
+        speedscope or inferno; weights are sampled microseconds
+        """
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.items())
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+
+class _Sampler(threading.Thread):
+    """Samples the event loop thread's Python stack every PROFILE_SAMPLE_INTERVAL"""
+
+    def __init__(self, profiler: "RequestProfiler", loop: asyncio.AbstractEventLoop, thread_id: int):
+        super().__init__(name="request-profiler", daemon=True)
+        self.profiler = profiler
+        self.loop = loop
+        self.thread_id = thread_id
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        last = time.perf_counter()
+        while not self.stopped.wait(settings.PROFILE_SAMPLE_INTERVAL):
+            now = time.perf_counter()
+            seconds, last = now - last, now
+            frame = sys._current_frames().get(self.thread_id)
+            task = asyncio.current_task(self.loop)
+            if frame is None or task is None:
+                continue  # the loop is idle or running plain callbacks
+            names = []
+            serializing = False
+            while frame is not None:
+                names.append(_frame_name(frame))
+                serializing = serializing or frame.f_code.co_name in _SERIALIZE_FUNCTIONS
+                frame = frame.f_back
+            stack = ";".join(reversed(names))
+            with self.profiler.lock:
+                for profile in self.profiler.active:
+                    profile.add_sample(stack, task is profile.task, serializing, seconds)
+
+class RequestProfiler:
+    """
+    Profiles individual requests on demand. While at least one profile is
+    active a sampler thread walks the event loop's stack and SQLAlchemy
+    cursor events time each statement; both are torn down when the last
+    profile finishes, so unprofiled traffic pays nothing. Finished profiles
+    are kept (most recent PROFILE_KEEP) for download.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active: List[RequestProfile] = []
+        self._sampler: Optional[_Sampler] = None
+        self._finished: "OrderedDict[str, RequestProfile]" = OrderedDict()
+
+    def start(self, method: str, path: str) -> RequestProfile:
+        profile = RequestProfile(method, path, asyncio.current_task())
+        with self.lock:
+            self.active.append(profile)
+            first = len(self.active) == 1
+        if first:
+            event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+            self._sampler = _Sampler(self, asyncio.get_running_loop(), threading.get_ident())
+            self._sampler.start()
+        return profile
+
+    def finish(self, profile: RequestProfile) -> None:
+        profile.wall = time.perf_counter() - profile._start
+        with self.lock:
+            self.active.remove(profile)
+            last = not self.active
+        if last:
+            self._sampler.stopped.set()
+            self._sampler = None
+            event.remove(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+            event.remove(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+        profile.task = None
+        self._finished[profile.id] = profile
+        while len(self._finished) > settings.PROFILE_KEEP:
+            self._finished.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        return self._finished.get(profile_id)
+
+    def recent(self) -> List[dict]:
+        return [profile.summary() for profile in reversed(self._finished.values())]
+
+request_profiler = RequestProfiler()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_profile.get() is not None:
+        context._profile_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile.get()
+    started = getattr(context, "_profile_started", None)
+    if profile is not None and started is not None:
+        profile.add_statement(" ".join(statement.split())[:500], time.perf_counter() - started)
+
+def _flagged(scope) -> bool:
+    for name, value in scope["headers"]:
+        if name == b"x-profile":
+            return value.lower() in (b"1", b"true", b"yes")
+    query = scope.get("query_string", b"")
+    return b"profile=" in query and any(
+        part in (b"profile=1", b"profile=true") for part in query.split(b"&")
+    )
+
+def _is_admin(scope) -> bool:
+    """
+    Role claim of the bearer token. Checked before routing and the rate
+    limiter, so it must cost no database work; the route still runs its
+    own authentication.
+    """
+    authorization = dict(scope["headers"]).get(b"authorization", b"").decode("latin-1")
+    if authorization[:7].lower() != "bearer ":
+        return False
+    return token_role(authorization[7:]) == "admin"
+
+class ProfileMiddleware:
+    """
+    Profiles a request when it carries `X-Profile: 1` or `?profile=1` and
+    the caller is an admin; for anyone else the flag is ignored. The response gets a Server-Timing header with
+    the breakdown and X-Profile-Id naming the stored profile, downloadable
+    from /admin/profiles. Samples of other tasks running concurrently on
+    the loop (including tasks the request spawned) are kept separately.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _flagged(scope) or not _is_admin(scope):
+            return await self.app(scope, receive, send)
+
+        profile = request_profiler.start(scope["method"], scope["path"])
+        token = _current_profile.set(profile)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", profile.server_timing().encode()),
+                    (b"x-profile-id", profile.id.encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_profile.reset(token)
+            request_profiler.finish(profile)
+            logger.info(f"Profiled {profile.method} {profile.path}: {profile.server_timing()}")
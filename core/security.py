@@ -2,15 +2,11 @@ import os
 from datetime import datetime, timedelta
 from typing import Annotated, Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from api.v1.models.user import User, UserCRUD  # Update import path
-from core.database import get_db
-
-# Password hashing setup
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from api.v1.models.user import User, UserCRUD, pwd_context  # Update import path
+from core.database import get_db, pooled_session
 
 from pydantic import BaseModel
 # Configuration
@@ -18,8 +14,6 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 class TokenData(BaseModel):
@@ -50,6 +44,14 @@ async def get_current_user(
         raise credentials_exception
     return user
 
+def token_role(token: str) -> Optional[str]:
+    """Role claim of a valid, unexpired token, read without a database round-trip"""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    return payload.get("role")
+
 def require_role(role: str):
     async def role_checker(
         user: Annotated[User, Depends(get_current_user)]
@@ -62,6 +64,22 @@ def require_role(role: str):
         return user
     return role_checker
 
+async def authorize(token: str, role: str, db: Optional[AsyncSession] = None) -> User:
+    """
+    require_role on a short session of its own (or the given one), for
+    handlers (streams, write-behind) that must not hold a request-scoped session
+    """
+    if db is None:
+        async with pooled_session() as db:
+            return await authorize(token, role, db)
+    user = await get_current_user(token, db)
+    if user.role != role:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Requires {role} role"
+        )
+    return user
+
 # Predefined role dependencies
 AdminDep = Depends(require_role("admin"))
 BuildingManagerDep = Depends(require_role("building_manager"))
\ No newline at end of file
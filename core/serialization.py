@@ -0,0 +1,36 @@
+from datetime import date, datetime
+from typing import Any, Sequence
+import json
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to the stdlib encoder
+    orjson = None
+
+
+def _default(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, separators=(",", ":")).encode()
+
+
+def rows_to_json(columns: Sequence[str], rows: Sequence[tuple]) -> bytes:
+    """Serialise plain column tuples straight to a JSON array of objects"""
+    return dumps([dict(zip(columns, row)) for row in rows])
+
+
+class FastJSONResponse(Response):
+    """JSON response that skips FastAPI's jsonable_encoder (content may be pre-encoded bytes)"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
@@ -1,17 +1,32 @@
 # integrations/iot/__init__.py
-from .bacnet_integration import (
-    BacnetIntegration,
-    BacnetIntegrationCreate,
-    BacnetIntegrationResponse,
-    BacnetIntegrationCRUD
-)
-from .mqtt_handler import MQTTClient
+# bacpypes3 and asyncio_mqtt are heavy; load them only when an integration is used.
+from importlib import import_module
 
+_LAZY_IMPORTS = {
+    "BACnetIntegration": ".bacnet_integration",
+    "SensorPoint": ".bacnet_integration",
+    "MQTTClient": ".mqtt_handler",
+    "DiskSpool": ".spool",
+    "TrendLogBackfill": ".trend_log_backfill",
+    "TrendLogSpec": ".trend_log_backfill",
+    "SimulatedTrendLogDevice": ".trend_log_backfill",
+    "SimulatedReadingStore": ".trend_log_backfill",
+}
 
-_all__ = [
-    BacnetIntegration,
-    BacnetIntegrationCreate,
-    BacnetIntegrationResponse,
-    BacnetIntegrationCRUD,
-    MQTTClient
+def __getattr__(name):
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_LAZY_IMPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+__all__ = [
+    "BACnetIntegration",
+    "SensorPoint",
+    "MQTTClient",
+    "DiskSpool",
+    "TrendLogBackfill",
+    "TrendLogSpec",
+    "SimulatedTrendLogDevice",
+    "SimulatedReadingStore"
 ]
\ No newline at end of file
@@ -1,11 +1,36 @@
+import asyncio
+import json
 import logging
-from typing import Dict, List, Optional
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
 from bacpypes3.local.device import LocalDeviceObject
 from bacpypes3 import ReadPropertyApplication
+from bacpypes3.apdu import ReadRangeRequest
+from bacpypes3.basetypes import LogRecord, Range, RangeByPosition, RangeBySequenceNumber
 from bacpypes3.object import get_object_class
 from bacpypes3.pdu import Address
 from bacpypes3.primitivedata import ObjectIdentifier
 from core.config import settings
+from api.v1.services.ingestion import ingest_sensor_reading
+from integrations.iot.trend_log_backfill import TrendChunk, TrendRecord
+
+# Numeric choices of a TrendLog LogRecord's logDatum
+_LOG_DATUM_VALUES = ("realValue", "unsignedValue", "signedValue", "enumValue", "booleanValue")
+_MORE_ITEMS = 2  # bit of ReadRange-ACK resultFlags
+
+class SensorPoint(NamedTuple):
+    """A polled BACnet object and the sensor its present value belongs to"""
+    building_id: str
+    sensor_id: str
+    sensor_type: str
+    unit: str
+    device_address: str
+    object_id: str  # e.g. "analogInput,1"
+
+def load_points(path) -> List[SensorPoint]:
+    """JSON list of {building_id, sensor_id, sensor_type, unit, device_address, object_id}"""
+    return [SensorPoint(**point) for point in json.loads(Path(path).read_text())]
 
 class BACnetIntegration:
     def __init__(self):
@@ -43,6 +68,66 @@ class BACnetIntegration:
             self.logger.error(f"Failed to read {object_id} from {device_address}: {str(e)}")
             return None
 
+    async def poll_sensor(
+        self,
+        building_id: str,
+        sensor_id: str,
+        sensor_type: str,
+        unit: str,
+        device_address: str,
+        object_id: str
+    ) -> Optional[float]:
+        """Read a sensor's present value and ingest it"""
+        value = await self.read_analog_value(device_address, object_id)
+        if value is not None:
+            ingest_sensor_reading(building_id, sensor_id, sensor_type, value, unit)
+        return value
+
+    async def run_polling(self, points: List[SensorPoint], interval: Optional[float] = None):
+        """Background loop polling every point once per interval"""
+        interval = interval or settings.BACNET_POLL_INTERVAL
+        while True:
+            await asyncio.gather(*(self.poll_sensor(*point) for point in points))
+            await asyncio.sleep(interval)
+
+    async def read_trend_log(
+        self,
+        device_address: str,
+        object_id: str,
+        start_sequence: Optional[int],
+        count: int
+    ) -> TrendChunk:
+        """
+        ReadRange on a TrendLog's logBuffer: `count` records from
+        `start_sequence` on, or from the oldest record when it is None.
+        """
+        if start_sequence is None:
+            range_ = Range(byPosition=RangeByPosition(referenceIndex=1, count=count))
+        else:
+            range_ = Range(bySequenceNumber=RangeBySequenceNumber(
+                referenceSequenceNumber=start_sequence, count=count
+            ))
+        request = ReadRangeRequest(
+            objectIdentifier=ObjectIdentifier(object_id),
+            propertyIdentifier="logBuffer",
+            range=range_,
+            destination=Address(device_address)
+        )
+        ack = await self.app.request(request)
+
+        records = []
+        first = sequence = ack.firstSequenceNumber or start_sequence or 1
+        for item in ack.itemData or ():
+            record = item.cast_out(LogRecord)
+            value = _log_datum_value(record)
+            if value is not None:
+                records.append(TrendRecord(sequence, _log_timestamp(record), value))
+            sequence += 1
+        more = bool(ack.resultFlags[_MORE_ITEMS])
+        if sequence == first:
+            return TrendChunk(records, more)
+        return TrendChunk(records, more, first, sequence - 1)
+
     async def discover_devices(self) -> List[Dict]:
         """Discover BACnet devices on the network"""
         devices = []
@@ -60,4 +145,18 @@ class BACnetIntegration:
 
     async def __aexit__(self, exc_type, exc, tb):
         if self.app:
-            await self.app.close()
\ No newline at end of file
+            await self.app.close()
+
+def _log_timestamp(record) -> datetime:
+    """LogRecord DateTime (device clock, taken as UTC) to a naive datetime"""
+    year, month, day, _ = record.timestamp.date
+    hour, minute, second, hundredth = record.timestamp.time
+    return datetime(year + 1900, month, day, hour, minute, second, hundredth * 10000)
+
+def _log_datum_value(record) -> Optional[float]:
+    """Numeric sample of a LogRecord; status and error entries carry none"""
+    for choice in _LOG_DATUM_VALUES:
+        value = getattr(record.logDatum, choice, None)
+        if value is not None:
+            return float(value)
+    return None
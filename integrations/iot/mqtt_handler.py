@@ -1,10 +1,42 @@
+import asyncio
+import json
 import logging
+import random
+import struct
+from contextlib import suppress
+from datetime import datetime
 from asyncio_mqtt import Client, MqttError
 from core.config import settings
-from typing import Optional, Callable
+from core.serialization import dumps
+from typing import Optional, Callable, Tuple
+from api.v1.services.ingestion import ingest_sensor_reading
+from integrations.iot.spool import DiskSpool
+
+# Spooled message: [topic length u16][qos u8][topic][payload]
+_SPOOLED = struct.Struct("<HB")
+
+def _encode(topic: str, payload: bytes, qos: int) -> bytes:
+    raw_topic = topic.encode()
+    return _SPOOLED.pack(len(raw_topic), qos) + raw_topic + payload
+
+def _decode(record: bytes) -> Tuple[str, bytes, int]:
+    length, qos = _SPOOLED.unpack_from(record)
+    start = _SPOOLED.size
+    return record[start:start + length].decode(), record[start + length:], qos
 
 class MQTTClient:
-    def __init__(self):
+    """
+    Persistent MQTT client.
+
+    A supervisor task keeps the connection up, reconnecting with
+    exponential backoff and jitter. While disconnected (or while older
+    messages are still queued) publishes go to a disk spool instead of
+    failing, so producers never block and outages lose nothing unless the
+    spool overflows. After reconnecting the spool is drained at
+    MQTT_SPOOL_DRAIN_RATE messages per second.
+    """
+
+    def __init__(self, spool: Optional[DiskSpool] = None):
         self.client: Optional[Client] = None
         self.logger = logging.getLogger(__name__)
         self._connect_options = {
@@ -14,40 +46,163 @@ class MQTTClient:
             "password": settings.MQTT_PASSWORD,
             "keepalive": 60
         }
+        self.spool = spool
+        self._connected = asyncio.Event()
+        self._lost = asyncio.Event()
+        self._spooled = asyncio.Event()
+        self._supervisor: Optional[asyncio.Task] = None
 
     async def connect(self):
-        """Connect to MQTT broker"""
+        """Connect to MQTT broker (single attempt)"""
         try:
             self.client = Client(**self._connect_options)
             await self.client.connect()
+            self._lost.clear()
+            self._connected.set()
             self.logger.info("Connected to MQTT broker")
         except MqttError as e:
             self.logger.error(f"MQTT connection error: {str(e)}")
             raise
 
+    async def start(self):
+        """Open the spool and start the reconnecting supervisor"""
+        if self.spool is None:
+            self.spool = DiskSpool(settings.MQTT_SPOOL_PATH, settings.MQTT_SPOOL_BYTES)
+        if self.spool:
+            self._spooled.set()
+        if self._supervisor is None:
+            self._supervisor = asyncio.create_task(self._supervise())
+
+    async def stop(self):
+        if self._supervisor is not None:
+            self._supervisor.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._supervisor
+            self._supervisor = None
+        await self._disconnect()
+        if self.spool is not None:
+            self.spool.close()
+
+    async def _supervise(self):
+        delay = settings.MQTT_RECONNECT_MIN
+        while True:
+            try:
+                await self.connect()
+            except MqttError:
+                await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+                delay = min(delay * 2, settings.MQTT_RECONNECT_MAX)
+                continue
+
+            delay = settings.MQTT_RECONNECT_MIN
+            drain = asyncio.create_task(self._drain())
+            try:
+                await self._lost.wait()
+            finally:
+                drain.cancel()
+                with suppress(asyncio.CancelledError):
+                    await drain
+            await self._disconnect()
+
+    async def _disconnect(self):
+        self._connected.clear()
+        if self.client is not None:
+            with suppress(MqttError):
+                await self.client.disconnect()
+
+    def _connection_lost(self, error: Exception):
+        if self._connected.is_set():
+            self.logger.warning(f"MQTT connection lost: {str(error)}")
+        self._connected.clear()
+        self._lost.set()
+
+    async def publish(self, topic: str, payload: bytes, qos: int = 1):
+        """Publish now if connected and nothing is queued, otherwise spool"""
+        if self._connected.is_set() and not self.spool:
+            try:
+                await self.client.publish(topic, payload, qos=qos)
+                return
+            except MqttError as e:
+                self._connection_lost(e)
+        if self.spool is None:
+            self.spool = DiskSpool(settings.MQTT_SPOOL_PATH, settings.MQTT_SPOOL_BYTES)
+        self.spool.append(_encode(topic, payload, qos))
+        self._spooled.set()
+
+    async def _drain(self):
+        """Replay spooled messages in order at a bounded rate; stops on the first failure"""
+        interval = 1 / settings.MQTT_SPOOL_DRAIN_RATE
+        while True:
+            batch = self.spool.peek(100)
+            if not batch:
+                self._spooled.clear()
+                await self._spooled.wait()
+                continue
+            for position, record in batch:
+                topic, payload, qos = _decode(record)
+                try:
+                    await self.client.publish(topic, payload, qos=qos)
+                except MqttError as e:
+                    self._connection_lost(e)
+                    return
+                self.spool.commit(position)
+                await asyncio.sleep(interval)
+            self.spool.flush()
+
     async def publish_esg_data(self, building_id: str, data: dict):
-        """Publish ESG data to MQTT topic"""
+        """Publish ESG data to MQTT topic (spooled while the broker is unreachable)"""
         topic = f"esg/{building_id}/data"
-        try:
-            await self.client.publish(topic, str(data).encode(), qos=1)
-            self.logger.debug(f"Published to {topic}: {data}")
-        except MqttError as e:
-            self.logger.error(f"MQTT publish failed: {str(e)}")
+        await self.publish(topic, dumps(data), qos=1)
+        self.logger.debug(f"Published to {topic}: {data}")
+
+    async def _subscribe_forever(self, topic_filter: str, handler: Callable, qos: int = 0):
+        """(Re)subscribe after every reconnect and hand each message to `handler`"""
+        while True:
+            await self._connected.wait()
+            try:
+                async with self.client.filtered_messages(topic_filter) as messages:
+                    await self.client.subscribe(topic_filter, qos=qos)
+                    async for message in messages:
+                        handler(message)
+            except MqttError as e:
+                self.logger.error(f"MQTT subscription error: {str(e)}")
+                self._connection_lost(e)
 
     async def subscribe_to_commands(self, callback: Callable):
         """Subscribe to command topics"""
+        await self._subscribe_forever(
+            "esg/+/command",
+            lambda message: callback(message.topic, message.payload.decode())
+        )
+
+    async def subscribe_to_sensor_readings(self):
+        """Feed sensor readings (esg/<building>/sensors/<sensor>) into the ingestion path"""
+        await self._subscribe_forever(
+            "esg/+/sensors/+",
+            lambda message: self.handle_sensor_message(message.topic, message.payload),
+            qos=1
+        )
+
+    def handle_sensor_message(self, topic: str, payload: bytes) -> bool:
+        """Parse a single sensor message and ingest it"""
         try:
-            async with self.client.filtered_messages("esg/+/command") as messages:
-                await self.client.subscribe("esg/#")
-                async for message in messages:
-                    callback(message.topic, message.payload.decode())
-        except MqttError as e:
-            self.logger.error(f"MQTT subscription error: {str(e)}")
+            _, building_id, _, sensor_id = str(topic).split("/")
+            reading = json.loads(payload)
+            timestamp = reading.get("timestamp")
+            return ingest_sensor_reading(
+                building_id,
+                sensor_id,
+                reading["type"],
+                float(reading["value"]),
+                reading.get("unit", ""),
+                datetime.fromisoformat(timestamp.rstrip("Z")) if timestamp else None
+            )
+        except (ValueError, KeyError, TypeError) as e:
+            self.logger.warning(f"Invalid sensor message on {topic}: {str(e)}")
+            return False
 
     async def __aenter__(self):
-        await self.connect()
+        await self.start()
         return self
 
     async def __aexit__(self, exc_type, exc, tb):
-        if self.client:
-            await self.client.disconnect()
\ No newline at end of file
+        await self.stop()
\ No newline at end of file
@@ -0,0 +1,150 @@
+import logging
+import mmap
+import os
+import struct
+import zlib
+from pathlib import Path
+from typing import List, Tuple
+
+logger = logging.getLogger(__name__)
+
+class DiskSpool:
+    """
+    Bounded, append-only ring buffer of byte records in a memory-mapped file.
+
+    Layout: a header (magic, capacity, head, tail, dropped) followed by
+    `capacity` bytes of records, each [length u32][crc32 u32][payload].
+    head and tail are ever-increasing byte positions; the physical offset
+    is position % capacity, so records may wrap around the end.
+
+    Appends never block: when the buffer is full the oldest records are
+    dropped (and counted). Readers peek() records and commit() the position
+    after the ones they delivered, which gives at-least-once delivery. On
+    open, records are verified from head on and a torn tail is discarded.
+    """
+
+    MAGIC = b"ESGSPOOL"
+    _HEADER = struct.Struct("<8sQQQQ")
+    _RECORD = struct.Struct("<II")
+
+    def __init__(self, path, capacity: int):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        exists = self.path.exists() and self.path.stat().st_size > self._HEADER.size
+        self._file = open(self.path, "r+b" if exists else "w+b")
+
+        stored = None
+        if exists:
+            header = self._file.read(self._HEADER.size)
+            magic, stored_capacity, head, tail, dropped = self._HEADER.unpack(header)
+            if magic == self.MAGIC and self.path.stat().st_size == self._HEADER.size + stored_capacity:
+                stored = (stored_capacity, head, tail, dropped)
+            else:
+                logger.warning(f"Spool {self.path} is not a valid spool file; starting empty")
+
+        if stored is None:
+            self.capacity, self._head, self._tail, self.dropped = capacity, 0, 0, 0
+            self._file.truncate(self._HEADER.size + capacity)
+        else:
+            self.capacity, self._head, self._tail, self.dropped = stored
+
+        self._map = mmap.mmap(self._file.fileno(), self._HEADER.size + self.capacity)
+        self._recover()
+        self._store_header()
+
+    # ----------------------------
+    # Raw ring access
+    # ----------------------------
+
+    def _write_at(self, position: int, data: bytes) -> None:
+        offset = position % self.capacity
+        first = min(len(data), self.capacity - offset)
+        base = self._HEADER.size
+        self._map[base + offset:base + offset + first] = data[:first]
+        if first < len(data):
+            self._map[base:base + len(data) - first] = data[first:]
+
+    def _read_at(self, position: int, size: int) -> bytes:
+        offset = position % self.capacity
+        first = min(size, self.capacity - offset)
+        base = self._HEADER.size
+        data = self._map[base + offset:base + offset + first]
+        if first < size:
+            data += self._map[base:base + size - first]
+        return data
+
+    def _record_at(self, position: int) -> Tuple[int, bytes]:
+        length, crc = self._RECORD.unpack(self._read_at(position, self._RECORD.size))
+        if length > self.capacity - self._RECORD.size:
+            raise ValueError("record length out of range")
+        payload = self._read_at(position + self._RECORD.size, length)
+        if zlib.crc32(payload) != crc:
+            raise ValueError("record checksum mismatch")
+        return position + self._RECORD.size + length, payload
+
+    def _store_header(self) -> None:
+        self._map[:self._HEADER.size] = self._HEADER.pack(
+            self.MAGIC, self.capacity, self._head, self._tail, self.dropped
+        )
+
+    def _recover(self) -> None:
+        if not 0 <= self._tail - self._head <= self.capacity:
+            self._head = self._tail = 0
+            return
+        position = self._head
+        while position < self._tail:
+            try:
+                end, _ = self._record_at(position)
+            except ValueError:
+                break
+            if end > self._tail:
+                break
+            position = end
+        if position != self._tail:
+            logger.warning(f"Spool {self.path}: discarding {self._tail - position} bytes of torn records")
+            self._tail = position
+
+    # ----------------------------
+    # Public API
+    # ----------------------------
+
+    def append(self, payload: bytes) -> None:
+        size = self._RECORD.size + len(payload)
+        if size > self.capacity:
+            raise ValueError(f"Record of {len(payload)} bytes does not fit a {self.capacity} byte spool")
+        while self.capacity - (self._tail - self._head) < size:
+            self._head, _ = self._record_at(self._head)
+            self.dropped += 1
+        self._write_at(self._tail, self._RECORD.pack(len(payload), zlib.crc32(payload)) + payload)
+        self._tail += size
+        self._store_header()
+
+    def peek(self, limit: int) -> List[Tuple[int, bytes]]:
+        """Up to `limit` oldest records as (position after the record, payload)"""
+        records = []
+        position = self._head
+        while position < self._tail and len(records) < limit:
+            position, payload = self._record_at(position)
+            records.append((position, payload))
+        return records
+
+    def commit(self, position: int) -> None:
+        """Release everything before `position` (a value returned by peek)"""
+        if position > self._head:
+            self._head = min(position, self._tail)
+            self._store_header()
+
+    @property
+    def pending_bytes(self) -> int:
+        return self._tail - self._head
+
+    def __bool__(self) -> bool:
+        return self._tail != self._head
+
+    def flush(self) -> None:
+        self._map.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self._map.close()
+        self._file.close()
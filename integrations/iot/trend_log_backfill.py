@@ -0,0 +1,236 @@
+import asyncio
+import logging
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Deque, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from core.config import settings
+from core.database import async_session
+from api.v1.models.sensor import SensorReadingCRUD
+from api.v1.services.ingestion import ingest_sensor_history
+
+logger = logging.getLogger(__name__)
+
+class TrendRecord(NamedTuple):
+    sequence: int
+    timestamp: datetime
+    value: float
+
+class TrendChunk(NamedTuple):
+    records: List[TrendRecord]  # samples only; status and log-gap entries are left out
+    more: bool  # the device has further records after this chunk
+    first_sequence: Optional[int] = None  # of all entries read, samples or not; None when none were
+    last_sequence: Optional[int] = None
+
+class TrendLogSpec(NamedTuple):
+    """A controller TrendLog object and the sensor its samples belong to"""
+    building_id: str
+    sensor_id: str
+    sensor_type: str
+    unit: str
+    device_address: str
+    object_id: str  # e.g. "trendLog,1"
+
+class TrendLogBackfill:
+    """
+    Recovers sensor history from BACnet TrendLog objects.
+
+    `reader` provides `read_trend_log(device_address, object_id,
+    start_sequence, count) -> TrendChunk` (BACnetIntegration, or
+    SimulatedTrendLogDevice in tests). Each chunk is written together with
+    the trend-log cursor in one transaction, so an interrupted backfill
+    resumes after the last record it stored. ReadRange requests to one
+    device are limited to `device_concurrency` at a time.
+
+    `readings` provides the SensorReadingCRUD calls used here
+    (SimulatedReadingStore keeps them in memory for dry runs).
+    """
+
+    def __init__(
+        self,
+        reader,
+        session_factory=async_session,
+        chunk_size: Optional[int] = None,
+        device_concurrency: Optional[int] = None,
+        readings=SensorReadingCRUD
+    ):
+        self.reader = reader
+        self.session_factory = session_factory
+        self.readings = readings
+        self.chunk_size = chunk_size or settings.BACNET_TREND_CHUNK
+        self.device_concurrency = device_concurrency or settings.BACNET_DEVICE_CONCURRENCY
+        self._device_slots: Dict[str, asyncio.Semaphore] = {}
+
+    def _slot(self, device_address: str) -> asyncio.Semaphore:
+        slot = self._device_slots.get(device_address)
+        if slot is None:
+            slot = self._device_slots[device_address] = asyncio.Semaphore(self.device_concurrency)
+        return slot
+
+    async def run(self, specs: Iterable[TrendLogSpec]) -> Dict[str, int]:
+        """Backfill all trend logs concurrently; returns recovered samples per sensor"""
+        specs = list(specs)
+        results = await asyncio.gather(
+            *(self.backfill(spec) for spec in specs),
+            return_exceptions=True
+        )
+        recovered = {}
+        for spec, result in zip(specs, results):
+            if isinstance(result, Exception):
+                logger.error(f"Backfill of {spec.object_id} on {spec.device_address} failed: {str(result)}")
+                continue
+            recovered[spec.sensor_id] = result
+        return recovered
+
+    async def backfill(self, spec: TrendLogSpec) -> int:
+        async with self.session_factory() as session:
+            cursor = await self.readings.get_cursor(session, spec.device_address, spec.object_id)
+        start = cursor + 1 if cursor is not None else None
+
+        recovered = 0
+        while True:
+            chunk = await self._read(spec, start)
+            if chunk.last_sequence is None and start is not None:
+                # Nothing in [start, start + chunk - 1]: either no new records
+                # yet, or the ring buffer has overwritten that whole window
+                chunk = await self._read(spec, None)
+                if chunk.last_sequence is not None and chunk.last_sequence < start:
+                    break
+            if chunk.last_sequence is None:
+                break
+            if start is not None and chunk.first_sequence > start:
+                logger.warning(
+                    f"{spec.object_id} on {spec.device_address}: records "
+                    f"{start}-{chunk.first_sequence - 1} were overwritten before backfill"
+                )
+            records = [record for record in chunk.records if start is None or record.sequence >= start]
+            # A chunk of status or log-gap entries only still moves the cursor
+            await self._store(spec, records, chunk.last_sequence)
+            recovered += len(records)
+            start = chunk.last_sequence + 1
+            if not chunk.more:
+                break
+        return recovered
+
+    async def _read(self, spec: TrendLogSpec, start: Optional[int]) -> TrendChunk:
+        async with self._slot(spec.device_address):
+            return await self.reader.read_trend_log(
+                spec.device_address, spec.object_id, start, self.chunk_size
+            )
+
+    async def _store(self, spec: TrendLogSpec, records: List[TrendRecord], last_sequence: int) -> None:
+        rows = [
+            {
+                "building_id": spec.building_id,
+                "sensor_id": spec.sensor_id,
+                "timestamp": record.timestamp,
+                "value": record.value,
+            }
+            for record in records
+        ]
+        async with self.session_factory() as session:
+            await self.readings.create_many(session, rows)
+            await self.readings.advance_cursor(
+                session, spec.device_address, spec.object_id, last_sequence
+            )
+            await session.commit()
+        if records:
+            ingest_sensor_history(
+                spec.building_id,
+                spec.sensor_id,
+                spec.sensor_type,
+                spec.unit,
+                ((record.timestamp, record.value) for record in records)
+            )
+
+class SimulatedTrendLogDevice:
+    """
+    In-memory stand-in for BACnet controllers with the same read_trend_log
+    interface as BACnetIntegration. Logs are bounded ring buffers like on a
+    real controller, so overwritten ranges can be simulated too, and a
+    record without a value stands for a status or log-gap entry.
+    """
+
+    def __init__(self, buffer_size: int = 10000, latency: float = 0.0):
+        self.buffer_size = buffer_size
+        self.latency = latency
+        self._logs: Dict[Tuple[str, str], Deque[TrendRecord]] = {}
+        self._sequences: Counter = Counter()
+        self._active: Counter = Counter()
+        self.peak_concurrency: Counter = Counter()  # per device address
+        self.requests = 0
+
+    def record(self, device_address: str, object_id: str, timestamp: datetime, value: Optional[float]) -> int:
+        key = (device_address, object_id)
+        log = self._logs.get(key)
+        if log is None:
+            log = self._logs[key] = deque(maxlen=self.buffer_size)
+        self._sequences[key] += 1
+        log.append(TrendRecord(self._sequences[key], timestamp, value))
+        return self._sequences[key]
+
+    async def read_trend_log(
+        self,
+        device_address: str,
+        object_id: str,
+        start_sequence: Optional[int],
+        count: int
+    ) -> TrendChunk:
+        self.requests += 1
+        self._active[device_address] += 1
+        self.peak_concurrency[device_address] = max(
+            self.peak_concurrency[device_address], self._active[device_address]
+        )
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            log = list(self._logs.get((device_address, object_id), ()))
+            if start_sequence is None:
+                # byPosition from the oldest record
+                window, more = log[:count], len(log) > count
+            else:
+                # bySequenceNumber: the records numbered start..start + count - 1 still held
+                end = start_sequence + count - 1
+                window = [record for record in log if start_sequence <= record.sequence <= end]
+                more = bool(log) and log[-1].sequence > end
+            if not window:
+                return TrendChunk([], more)
+            return TrendChunk(
+                [record for record in window if record.value is not None],
+                more,
+                window[0].sequence,
+                window[-1].sequence
+            )
+        finally:
+            self._active[device_address] -= 1
+
+class _SimulatedSession:
+    async def commit(self) -> None:
+        pass
+
+class SimulatedReadingStore:
+    """
+    In-memory sensor_readings / trend_log_cursors with the SensorReadingCRUD
+    calls TrendLogBackfill makes, so dry runs never touch the database.
+    `session` is the matching throwaway session factory.
+    """
+
+    def __init__(self):
+        self.readings: Dict[Tuple[str, str, datetime], float] = {}
+        self.cursors: Dict[Tuple[str, str], int] = {}
+
+    @asynccontextmanager
+    async def session(self):
+        yield _SimulatedSession()
+
+    async def get_cursor(self, db, device_address: str, object_id: str) -> Optional[int]:
+        return self.cursors.get((device_address, object_id))
+
+    async def create_many(self, db, rows: List[dict]) -> int:
+        for row in rows:
+            self.readings.setdefault((row["building_id"], row["sensor_id"], row["timestamp"]), row["value"])
+        return len(rows)
+
+    async def advance_cursor(self, db, device_address: str, object_id: str, sequence: int) -> None:
+        key = (device_address, object_id)
+        self.cursors[key] = max(self.cursors.get(key, sequence), sequence)
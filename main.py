@@ -1,18 +1,126 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 import uvicorn
-from core.database import Base, engine
+from core.config import settings
+from core.database import async_session, POOL_SIZE, pool_stats
+from core.admission import MetricsTokenDep, render_metrics
+from core.profiling import ProfileMiddleware
+from api.v1.routes import (
+    esg_router, live_router, profile_router, building_data_router, carbon_router, report_router
+)
+from api.v1.models.building import router as buildings_router, building_registry
+from api.v1.services.sensor_registry import sensor_registry
+from api.v1.services.alert_engine import alert_engine
+from api.v1.services.metric_writer import metric_writer
+from api.v1.services.sketches import sketch_store
+from api.v1.services.report_service import shutdown_render_pool
 
-app = FastAPI(title="Globalworth ESG API")
+logger = logging.getLogger(__name__)
 
-@app.get("/")
-async def root():
-    return {"message": "Globalworth ESG API is running"}
+async def warm_up():
+    """Load in-memory state from the database without delaying the first request"""
+    async with async_session() as session:
+        for name, loader in (
+            ("sensor registry", sensor_registry.warm_up),
+            ("alert engine", alert_engine.load),
+            ("building registry", building_registry.load),
+        ):
+            try:
+                await loader(session)
+            except Exception as e:
+                logger.error(f"Warm-up of {name} failed: {str(e)}")
 
-async def create_tables():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+async def start_integrations(tasks: list) -> list:
+    """
+    Start the sensor feeds (MQTT subscription, BACnet polling); returns their
+    clients. A feed that cannot start (optional package missing, broker or
+    network unreachable) is logged and skipped, the API comes up without it.
+    """
+    clients = []
+    if settings.MQTT_ENABLED:
+        try:
+            from integrations.iot.mqtt_handler import MQTTClient
+
+            mqtt = MQTTClient()
+            await mqtt.start()
+        except Exception as e:
+            logger.error(f"MQTT integration not started: {str(e)}")
+        else:
+            clients.append(mqtt)
+            tasks.append(asyncio.create_task(mqtt.subscribe_to_sensor_readings()))
+    if settings.BACNET_POINTS_FILE:
+        try:
+            from integrations.iot.bacnet_integration import BACnetIntegration, load_points
+
+            points = load_points(settings.BACNET_POINTS_FILE)
+            bacnet = BACnetIntegration()
+            await bacnet.connect()
+        except Exception as e:
+            logger.error(f"BACnet integration not started: {str(e)}")
+        else:
+            clients.append(bacnet)
+            tasks.append(asyncio.create_task(bacnet.run_polling(points)))
+    return clients
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    tasks = [
+        asyncio.create_task(warm_up()),
+        asyncio.create_task(sensor_registry.run_snapshots(async_session)),
+        asyncio.create_task(building_registry.run_refresh(async_session)),
+        asyncio.create_task(alert_engine.run_refresh(async_session)),
+        asyncio.create_task(sketch_store.run_flush(async_session)),
+    ]
+    clients = await start_integrations(tasks)
+    yield
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    for client in clients:
+        await client.__aexit__(None, None, None)
+    await metric_writer.close()
+    shutdown_render_pool()
+    async with async_session() as session:
+        await sensor_registry.snapshot(session)
+        await sketch_store.flush(session)
+
+def create_app() -> FastAPI:
+    """Application factory (schema creation lives in scripts/create_schema.py)"""
+    app = FastAPI(title="Globalworth ESG API", lifespan=lifespan)
+
+    @app.get("/")
+    async def root():
+        return {"message": "Globalworth ESG API is running"}
+
+    @app.get("/metrics", include_in_schema=False, dependencies=[MetricsTokenDep])
+    async def metrics():
+        """Admission control counters and limits (Prometheus text format)"""
+        return PlainTextResponse(render_metrics(pool_stats()))
+
+    app.include_router(esg_router)
+    app.include_router(buildings_router)
+    app.include_router(building_data_router)
+    app.include_router(carbon_router)
+    app.include_router(report_router)
+    app.include_router(live_router)
+    app.include_router(profile_router)
+    if settings.PROFILING_ENABLED:
+        app.add_middleware(ProfileMiddleware)
+    return app
+
+app = create_app()
 
 if __name__ == "__main__":
-    import asyncio
-    asyncio.run(create_tables())
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # Every worker imports settings with the same WEB_WORKERS, so each sizes its
+    # pool to DB_CONNECTION_BUDGET // WEB_WORKERS connections.
+    logger.info(f"Starting {settings.WEB_WORKERS} worker(s), {POOL_SIZE} DB connections each")
+    uvicorn.run(
+        "main:create_app",
+        factory=True,
+        host="0.0.0.0",
+        port=8000,
+        workers=settings.WEB_WORKERS
+    )
\ No newline at end of file
@@ -0,0 +1,115 @@
+import argparse
+import asyncio
+import statistics
+import time
+from sqlalchemy import text
+from core.database import engine
+
+# Synthetic history for --generate: 15-minute readings written to esg_metrics
+# (and mirrored into esg_metrics_compact by the trigger, so run
+# migrate_compact_metrics.py first).
+GENERATE_BUILDINGS = """
+INSERT INTO buildings (id, name, certifications, created_at)
+SELECT 'bench-' || lpad(CAST(b AS text), 5, '0'), 'Bench building ' || b, '[]', now()
+FROM generate_series(1, :buildings) b
+ON CONFLICT (id) DO NOTHING
+"""
+
+GENERATE_METRICS = """
+INSERT INTO esg_metrics (id, building_id, source, timestamp, co2_kg, energy_kwh, water_m3, waste_kg)
+SELECT md5(b || '|' || i), 'bench-' || lpad(CAST(b AS text), 5, '0'), 'bench',
+       timestamp '2024-01-01' + i * interval '15 minutes',
+       800 + random() * 700, 2000 + random() * 3000, 50 + random() * 150, 50 + random() * 250
+FROM generate_series(1, :buildings) b, generate_series(0, :readings - 1) i
+ON CONFLICT DO NOTHING
+"""
+
+SIZES = """
+SELECT pg_table_size(:table), pg_indexes_size(:table), pg_total_relation_size(:table),
+       (SELECT reltuples FROM pg_class WHERE oid = CAST(:table AS regclass))
+"""
+
+# (label, query over esg_metrics, same query over esg_metrics_compact)
+QUERIES = [
+    (
+        "one building, one year",
+        """SELECT sum(co2_kg), sum(energy_kwh), sum(water_m3), sum(waste_kg) FROM esg_metrics
+           WHERE building_id = :building AND timestamp >= :start AND timestamp < :end""",
+        """SELECT sum(CAST(co2_kg AS float8)), sum(CAST(energy_kwh AS float8)),
+                  sum(CAST(water_m3 AS float8)), sum(CAST(waste_kg AS float8))
+           FROM esg_metrics_compact
+           WHERE building_key = (SELECT id FROM building_keys WHERE building_id = :building)
+             AND timestamp >= :start AND timestamp < :end""",
+    ),
+    (
+        "portfolio, one month",
+        """SELECT building_id, sum(co2_kg) FROM esg_metrics
+           WHERE timestamp >= :start AND timestamp < :start + interval '1 month'
+           GROUP BY building_id""",
+        """SELECT building_key, sum(CAST(co2_kg AS float8)) FROM esg_metrics_compact
+           WHERE timestamp >= :start AND timestamp < :start + interval '1 month'
+           GROUP BY building_key""",
+    ),
+    (
+        "full scan",
+        "SELECT sum(energy_kwh) FROM esg_metrics",
+        "SELECT sum(CAST(energy_kwh AS float8)) FROM esg_metrics_compact",
+    ),
+]
+
+
+async def timed(conn, query: str, params: dict, runs: int) -> float:
+    """Median wall time in ms; the first (cold) run is discarded"""
+    samples = []
+    for _ in range(runs + 1):
+        start = time.perf_counter()
+        await conn.execute(text(query), params)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples[1:])
+
+
+async def main(args):
+    if args.generate:
+        async with engine.begin() as conn:
+            await conn.execute(text(GENERATE_BUILDINGS), {"buildings": args.buildings})
+            await conn.execute(text(GENERATE_METRICS), {"buildings": args.buildings, "readings": args.generate})
+            await conn.execute(text("ANALYZE esg_metrics"))
+            await conn.execute(text("ANALYZE esg_metrics_compact"))
+
+    async with engine.connect() as conn:
+        print(f"{'table':<22}{'rows':>12}{'heap MB':>10}{'index MB':>10}{'total MB':>10}{'B/row':>8}")
+        for table in ("esg_metrics", "esg_metrics_compact"):
+            heap, indexes, total, rows = (await conn.execute(text(SIZES), {"table": table})).one()
+            per_row = total / rows if rows > 0 else 0
+            print(f"{table:<22}{rows:>12,.0f}{heap / 2**20:>10.1f}{indexes / 2**20:>10.1f}"
+                  f"{total / 2**20:>10.1f}{per_row:>8.0f}")
+
+        building = args.building or (await conn.execute(
+            text("SELECT building_id FROM building_keys ORDER BY id LIMIT 1")
+        )).scalar()
+        start = (await conn.execute(text("SELECT min(timestamp) FROM esg_metrics_compact"))).scalar()
+        if building is None or start is None:
+            print("esg_metrics_compact is empty; run migrate_compact_metrics.py (or --generate) first")
+            return
+        params = {"building": building, "start": start, "end": start.replace(year=start.year + 1)}
+
+        print(f"\n{'query':<26}{'esg_metrics ms':>16}{'compact ms':>12}{'speedup':>9}")
+        for label, wide, compact in QUERIES:
+            wide_ms = await timed(conn, wide, params, args.runs)
+            compact_ms = await timed(conn, compact, params, args.runs)
+            print(f"{label:<26}{wide_ms:>16.1f}{compact_ms:>12.1f}{wide_ms / compact_ms:>8.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Size and scan speed of esg_metrics vs esg_metrics_compact (needs a database)')
+    parser.add_argument('--building', type=str, default=None,
+                      help='Building ID for the single-building query (default: first migrated building)')
+    parser.add_argument('--runs', type=int, default=5,
+                      help='Timed runs per query (median is reported)')
+    parser.add_argument('--generate', type=int, default=0,
+                      help='Insert this many synthetic 15-minute readings per bench building first')
+    parser.add_argument('--buildings', type=int, default=50,
+                      help='Number of bench buildings for --generate')
+
+    args = parser.parse_args()
+    asyncio.run(main(args))
@@ -0,0 +1,51 @@
+
+import argparse
+import math
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from api.v1.services.hot_store import HotStore
+
+METRICS = ("co2_kg", "energy_kwh", "water_m3", "waste_kg")
+
+
+def populate(store: HotStore, points: int, buildings: int, interval: int) -> float:
+    """Synthetic 15-minute style meter data with a daily cycle and noise"""
+    start = datetime(2025, 1, 1)
+    per_series = points // (buildings * len(METRICS))
+    began = time.perf_counter()
+    for i in range(per_series):
+        ts = start + timedelta(seconds=i * interval)
+        cycle = math.sin(i * interval / 86400 * 2 * math.pi)
+        for b in range(buildings):
+            building_id = f"bld-{b:03d}"
+            store.append(building_id, "co2_kg", ts, round(1000 + 300 * cycle + random.gauss(0, 20), 2))
+            store.append(building_id, "energy_kwh", ts, round(4000 + 900 * cycle + random.gauss(0, 50), 1))
+            store.append(building_id, "water_m3", ts, round(150 + 30 * cycle, 1))
+            store.append(building_id, "waste_kg", ts, 120.0)
+    return time.perf_counter() - began
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Hot store memory benchmark')
+    parser.add_argument('--points', type=int, default=1_000_000,
+                      help='Total points to ingest')
+    parser.add_argument('--buildings', type=int, default=50,
+                      help='Number of buildings')
+    parser.add_argument('--interval', type=int, default=60,
+                      help='Seconds between readings')
+
+    args = parser.parse_args()
+    store = HotStore(window=timedelta(days=3650))
+
+    tracemalloc.start()
+    elapsed = populate(store, args.points, args.buildings, args.interval)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    stats = store.memory_stats()
+    print(f"Ingested {stats['points']:,} points in {elapsed:.1f}s ({stats['points'] / elapsed:,.0f}/s)")
+    print(f"Encoded payload: {stats['bytes'] / 1e6:.1f} MB ({stats['bytes_per_point']:.2f} B/point)")
+    print(f"Python heap:     {current / 1e6:.1f} MB per {stats['points'] / 1e6:.2f}M points")
+    print(f"Raw (16 B/point): {stats['points'] * 16 / 1e6:.1f} MB")
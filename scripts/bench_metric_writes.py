@@ -0,0 +1,65 @@
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter
+import httpx
+
+
+def make_metric(building_id: str) -> dict:
+    return {
+        "building_id": building_id,
+        "co2_kg": round(random.uniform(800, 1500), 2),
+        "energy_kwh": round(random.uniform(2000, 5000), 1),
+        "water_m3": round(random.uniform(50, 200), 1),
+        "waste_kg": round(random.uniform(50, 300), 1),
+    }
+
+
+async def main(base_url: str, token: str, building_id: str, clients: int, per_client: int):
+    statuses: Counter = Counter()
+    latencies = []
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(
+        base_url=base_url,
+        headers={"Authorization": f"Bearer {token}"},
+        limits=limits,
+        timeout=60
+    ) as http:
+        async def client():
+            for _ in range(per_client):
+                started = time.perf_counter()
+                response = await http.post("/esg/metrics", json=make_metric(building_id))
+                latencies.append(time.perf_counter() - started)
+                statuses[response.status_code] += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    stored = statuses[200]
+    print(f"{stored:,} stored in {elapsed:.2f}s: {stored / elapsed:,.0f} inserts/s")
+    print(f"Latency p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms")
+    print("Status codes: " + ", ".join(f"{code}={count}" for code, count in sorted(statuses.items())))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='POST /esg/metrics throughput benchmark against a running API. '
+                    'Run it once with the server started with METRIC_WRITE_BEHIND=false '
+                    'and once with it true to compare per-request and group commit.'
+    )
+    parser.add_argument('building_id', type=str, help='Existing building ID to write metrics for')
+    parser.add_argument('--url', type=str, default='http://localhost:8000',
+                      help='Base URL of the API')
+    parser.add_argument('--token', type=str, required=True,
+                      help='Bearer token of an admin user')
+    parser.add_argument('--clients', type=int, default=1000,
+                      help='Number of concurrent clients')
+    parser.add_argument('--per-client', type=int, default=10,
+                      help='Inserts per client')
+
+    args = parser.parse_args()
+    asyncio.run(main(args.url, args.token, args.building_id, args.clients, args.per_client))
@@ -0,0 +1,114 @@
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import delete
+from api.v1.models.emission_factors import (
+    DBBuildingGridZone, DBGridIntensity, DBScope2Emission, EmissionFactorCRUD, GridIntensityPoint, scope2_emissions
+)
+from api.v1.models.esg_metrics import DBEscMetrics, EsgMetricCreate, EsgMetricsCRUD, metric_row
+from api.v1.services.scope2 import recalculate_building
+from core.config import settings
+from core.database import async_session
+
+BENCH_ZONE = "BENCH"
+BENCH_SOURCE = "bench-scope2"
+
+
+def year_of_readings(building_id: str, year: int, interval_minutes: int):
+    start = datetime(year, 1, 1)
+    count = 365 * 24 * 60 // interval_minutes
+    return [
+        EsgMetricCreate(
+            building_id=building_id,
+            co2_kg=round(random.uniform(5, 20), 2),
+            energy_kwh=round(random.uniform(10, 40), 1),
+            water_m3=1.0,
+            waste_kg=1.0,
+            source=BENCH_SOURCE,
+            timestamp=start + timedelta(minutes=interval_minutes * i)
+        )
+        for i in range(count)
+    ]
+
+
+def hourly_intensity(year: int, g_co2_per_kwh: float):
+    start = datetime(year, 1, 1)
+    return [
+        GridIntensityPoint(
+            zone=BENCH_ZONE,
+            valid_from=start + timedelta(hours=h),
+            g_co2_per_kwh=g_co2_per_kwh + random.uniform(-50, 50)
+        )
+        for h in range(366 * 24)
+    ]
+
+
+async def seed(building_id: str, year: int, interval_minutes: int, ingest_batch: int) -> float:
+    """Loads factors and a building-year through the ingest path; returns rows/s"""
+    async with async_session() as session:
+        await EmissionFactorCRUD.upsert_intensity(session, hourly_intensity(year, 650.0))
+        await session.merge(DBBuildingGridZone(building_id=building_id, zone=BENCH_ZONE))
+        await session.commit()
+
+        rows = [metric_row(metric) for metric in year_of_readings(building_id, year, interval_minutes)]
+        started = time.perf_counter()
+        for offset in range(0, len(rows), ingest_batch):
+            await EsgMetricsCRUD.create_many(session, rows[offset:offset + ingest_batch])
+        return len(rows) / (time.perf_counter() - started)
+
+
+async def cleanup(building_id: str):
+    async with async_session() as session:
+        await session.execute(delete(DBEscMetrics).where(
+            DBEscMetrics.building_id == building_id, DBEscMetrics.source == BENCH_SOURCE
+        ))
+        await session.execute(delete(DBScope2Emission).where(DBScope2Emission.building_id == building_id))
+        await session.execute(delete(DBGridIntensity).where(DBGridIntensity.zone == BENCH_ZONE))
+        await session.execute(delete(DBBuildingGridZone).where(DBBuildingGridZone.building_id == building_id))
+        await session.commit()
+
+
+async def main(args):
+    start, end = datetime(args.year, 1, 1), datetime(args.year, 12, 31, 23, 59, 59, 999999)
+    try:
+        for method in ("", settings.SCOPE2_CO2_METHOD or "location"):
+            settings.SCOPE2_CO2_METHOD = method
+            await cleanup(args.building_id)
+            rate = await seed(args.building_id, args.year, args.interval, args.ingest_batch)
+            label = method or '""'
+            print(f"Ingest with SCOPE2_CO2_METHOD={label}: {rate:,.0f} rows/s")
+
+        async with async_session() as session:
+            readings = year_of_readings(args.building_id, args.year, args.interval)
+            intensity = [(p.valid_from, p.g_co2_per_kwh) for p in hourly_intensity(args.year, 650.0)]
+            started = time.perf_counter()
+            scope2_emissions([m.timestamp for m in readings], [m.energy_kwh for m in readings], intensity)
+            print(f"Calculation only ({len(readings)} readings): {time.perf_counter() - started:.3f}s")
+
+            # Revised factors: every reading changes, so the UPDATE and its triggers run for all rows
+            await EmissionFactorCRUD.upsert_intensity(session, hourly_intensity(args.year, 400.0))
+            await session.commit()
+            started = time.perf_counter()
+            changed = await recalculate_building(session, args.building_id, start, end)
+            print(f"Recalculation, all rows changed ({changed['updated']}): {time.perf_counter() - started:.3f}s")
+
+            started = time.perf_counter()
+            unchanged = await recalculate_building(session, args.building_id, start, end)
+            print(f"Recalculation, nothing changed ({unchanged['updated']}): {time.perf_counter() - started:.3f}s")
+    finally:
+        if not args.keep:
+            await cleanup(args.building_id)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Scope 2 end-to-end benchmark: ingest, calculation and recalculation incl. triggers (needs a database)'
+    )
+    parser.add_argument('building_id', type=str, help='Existing building ID to write metrics for')
+    parser.add_argument('--year', type=int, default=2024)
+    parser.add_argument('--interval', type=int, default=15, help='Minutes between readings')
+    parser.add_argument('--ingest-batch', type=int, default=500, help='Rows per create_many call')
+    parser.add_argument('--keep', action='store_true', help='Leave the benchmark rows in place')
+    asyncio.run(main(parser.parse_args()))
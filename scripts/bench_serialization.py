@@ -0,0 +1,62 @@
+
+import argparse
+import json
+import time
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from fastapi.encoders import jsonable_encoder
+from api.v1.models.esg_metrics import EsgMetricResponse, METRIC_ROW_COLUMNS
+from core.serialization import rows_to_json, orjson
+
+
+def make_rows(count: int) -> list:
+    start = datetime(2025, 1, 1)
+    building_id = str(uuid.uuid4())
+    return [
+        (str(uuid.uuid4()), building_id, start + timedelta(minutes=15 * i),
+         1000.0 + i % 97, 4000.0 + i % 89, 150.0 + i % 13, 120.0 + i % 7)
+        for i in range(count)
+    ]
+
+
+def default_path(rows: list) -> bytes:
+    """ORM entity -> EsgMetricResponse validation -> jsonable_encoder -> json.dumps"""
+    entities = [
+        SimpleNamespace(**dict(zip(METRIC_ROW_COLUMNS, row)), created_at=row[2])
+        for row in rows
+    ]
+    models = [EsgMetricResponse.from_orm(entity) for entity in entities]
+    return json.dumps(jsonable_encoder(models)).encode()
+
+
+def fast_path(rows: list) -> bytes:
+    return rows_to_json(METRIC_ROW_COLUMNS, rows)
+
+
+def measure(func, rows: list, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        func(rows)
+        best = min(best, time.process_time() - start)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Metric response serialisation benchmark')
+    parser.add_argument('--rows', type=int, default=10_000,
+                      help='Number of rows per response')
+    parser.add_argument('--repeat', type=int, default=5,
+                      help='Repetitions (best time is reported)')
+
+    args = parser.parse_args()
+    rows = make_rows(args.rows)
+
+    default_cpu = measure(default_path, rows, args.repeat)
+    fast_cpu = measure(fast_path, rows, args.repeat)
+    encoder = "orjson" if orjson is not None else "json (orjson not installed)"
+
+    print(f"Rows: {args.rows}, fast path encoder: {encoder}")
+    print(f"Default path: {default_cpu * 1000:.1f} ms CPU")
+    print(f"Fast path:    {fast_cpu * 1000:.1f} ms CPU ({default_cpu / fast_cpu:.1f}x)")
@@ -0,0 +1,56 @@
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from urllib.error import URLError
+
+IMPORT_SNIPPET = (
+    "import time; start = time.perf_counter(); import main; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def measure_import() -> float:
+    """Wall time of `import main` in a fresh interpreter"""
+    output = subprocess.check_output([sys.executable, "-c", IMPORT_SNIPPET], text=True)
+    return float(output.strip().splitlines()[-1])
+
+
+def measure_first_request(port: int, timeout: float = 30.0) -> float:
+    """Wall time from spawning uvicorn to the first successful GET /"""
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"]
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except (URLError, ConnectionError):
+                time.sleep(0.01)
+        raise TimeoutError("Server did not answer in time")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Cold start benchmark')
+    parser.add_argument('--runs', type=int, default=5,
+                      help='Number of fresh processes per measurement')
+    parser.add_argument('--port', type=int, default=8765,
+                      help='Port used for the time-to-first-request measurement')
+
+    args = parser.parse_args()
+
+    imports = [measure_import() for _ in range(args.runs)]
+    first_requests = [measure_first_request(args.port) for _ in range(args.runs)]
+
+    print(f"import main:        median {statistics.median(imports) * 1000:.0f} ms")
+    print(f"first request:      median {statistics.median(first_requests) * 1000:.0f} ms")
+    print("For a per-module breakdown run: python -X importtime -c 'import main'")
@@ -0,0 +1,18 @@
+
+import asyncio
+import logging
+from core.database import Base, engine
+import api.v1.models  # noqa: F401  (registers all tables on the metadata)
+import api.v1.models.building  # noqa: F401
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+async def create_tables():
+    """Create missing tables; run once per deploy instead of on every worker start"""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    logger.info("Schema up to date")
+
+if __name__ == "__main__":
+    asyncio.run(create_tables())
@@ -1,20 +1,24 @@
 
 import argparse
 import csv
+import io
 import logging
 from datetime import datetime
 from pathlib import Path
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Dict, Iterator, List, Tuple
 import asyncio
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 from core.database import get_db, Base, async_session
-from api.v1.models.esg_metrics import DBEscMetrics, EsgMetricCreate
+from api.v1.models.esg_metrics import EsgMetricCreate, EsgMetricsCRUD, metric_row, BULK_LOAD_COLUMNS
+from api.v1.services.scope2 import recalculate_building
+from api.v1.services.sketches import sketch_store
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 async def migrate_from_csv(file_path: Path, batch_size: int = 100):
-    """Migrate data from CSV to database"""
+    """Migrate data from CSV to database (idempotent: re-running a file upserts the same rows)"""
     try:
         with open(file_path, 'r') as f:
             reader = csv.DictReader(f)
@@ -29,13 +33,14 @@ async def migrate_from_csv(file_path: Path, batch_size: int = 100):
                             energy_kwh=float(row['energy_kwh']),
                             water_m3=float(row['water_m3']),
                             waste_kg=float(row['waste_kg']),
+                            source=row.get('source') or 'csv',
                             timestamp=datetime.fromisoformat(row['timestamp'])
                         )
-                        batch.append(DBEscMetrics(**metric.dict()))
+                        batch.append(metric_row(metric))
+                        sketch_store.mark_day(metric.building_id, metric.timestamp.date())
                         
                         if len(batch) >= batch_size:
-                            session.add_all(batch)
-                            await session.commit()
+                            await EsgMetricsCRUD.create_many(session, batch)
                             batch = []
                             logger.info(f"Migrated {batch_size} records")
                             
@@ -44,21 +49,179 @@ async def migrate_from_csv(file_path: Path, batch_size: int = 100):
                         continue
                 
                 if batch:
-                    session.add_all(batch)
-                    await session.commit()
+                    await EsgMetricsCRUD.create_many(session, batch)
                     logger.info(f"Migrated final {len(batch)} records")
-                
+
+                # The app's per-day sketches are recomputed for every imported day
+                await sketch_store.flush(session)
                 logger.info("Migration completed successfully")
 
     except Exception as e:
         logger.error(f"Migration failed: {str(e)}")
         raise
 
+# ----------------------------
+# Parquet / Arrow import
+# ----------------------------
+
+ARROW_SUFFIXES = {".parquet", ".arrow", ".feather", ".ipc"}
+METRIC_COLUMNS = ("co2_kg", "energy_kwh", "water_m3", "waste_kg")
+
+def _record_batches(file_path: Path, batch_size: int) -> Iterator["pa.RecordBatch"]:
+    """Record batches read through a memory map (Arrow IPC batches are zero-copy slices)"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    source = pa.memory_map(str(file_path), "r")
+    if file_path.suffix == ".parquet":
+        yield from pq.ParquetFile(source).iter_batches(batch_size=batch_size)
+        return
+
+    try:
+        reader = pa.ipc.open_file(source)
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    except pa.ArrowInvalid:
+        source.seek(0)
+        batches = pa.ipc.open_stream(source)
+    for batch in batches:
+        for offset in range(0, batch.num_rows, batch_size):
+            yield batch.slice(offset, batch_size)
+
+def _naive_utc(column: "pa.ChunkedArray") -> "pa.ChunkedArray":
+    """Timestamps as naive UTC microseconds, like metric_row() does per row"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    kind = column.type
+    if pa.types.is_string(kind) or pa.types.is_large_string(kind):
+        try:
+            return pc.cast(column, pa.timestamp("us"))
+        except pa.ArrowInvalid:
+            column = pc.cast(column, pa.timestamp("us", tz="UTC"))  # values carry an offset
+            kind = column.type
+    if pa.types.is_date(kind):
+        return pc.cast(column, pa.timestamp("us"))
+    if not pa.types.is_timestamp(kind):
+        raise ValueError(f"Unsupported timestamp column type: {kind}")
+    column = pc.cast(column, pa.timestamp("us", tz=kind.tz))
+    if kind.tz is not None:
+        # Aware timestamps are stored as UTC instants; drop the zone without shifting
+        column = pc.cast(pc.cast(column, pa.int64()), pa.timestamp("us"))
+    return column
+
+def _prepare_batch(batch: "pa.RecordBatch", default_source: str) -> Tuple["pa.Table", int]:
+    """Vectorised validation/conversion; returns the clean table and the number of rejected rows"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    table = pa.Table.from_batches([batch])
+    rows = table.num_rows
+    if "source" in table.column_names:
+        source = pc.fill_null(pc.cast(table["source"], pa.string()), default_source)
+    else:
+        source = pc.fill_null(pa.nulls(rows, pa.string()), default_source)
+
+    columns = {
+        "building_id": pc.cast(table["building_id"], pa.string()),
+        "source": source,
+        "timestamp": _naive_utc(table["timestamp"]),
+    }
+    valid = pc.and_(pc.is_valid(columns["building_id"]), pc.is_valid(columns["timestamp"]))
+    for name in METRIC_COLUMNS:
+        columns[name] = pc.cast(table[name], pa.float64())
+        # Same rule as EsgMetricBase (gt=0); nulls and NaN fail the comparison
+        valid = pc.and_(valid, pc.fill_null(pc.greater(columns[name], 0), False))
+
+    clean = pa.table([columns[name] for name in BULK_LOAD_COLUMNS], names=list(BULK_LOAD_COLUMNS))
+    clean = clean.filter(valid)
+    return clean, rows - clean.num_rows
+
+def _mark_days(table: "pa.Table") -> None:
+    """Register the (building, day) pairs of a loaded batch with the sketch store"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    days = pa.table({
+        "building_id": table["building_id"],
+        "day": pc.cast(table["timestamp"], pa.date32()),
+    }).group_by(["building_id", "day"]).aggregate([])
+    for building_id, day in zip(days["building_id"].to_pylist(), days["day"].to_pylist()):
+        sketch_store.mark_day(building_id, day)
+
+def _extend_ranges(ranges: Dict[str, List[datetime]], table: "pa.Table") -> None:
+    """Widen each building's loaded [first, last] timestamp range by a batch"""
+    bounds = table.group_by("building_id").aggregate([("timestamp", "min"), ("timestamp", "max")])
+    for building_id, first, last in zip(
+        bounds["building_id"].to_pylist(), bounds["timestamp_min"].to_pylist(), bounds["timestamp_max"].to_pylist()
+    ):
+        known = ranges.setdefault(building_id, [first, last])
+        known[0], known[1] = min(known[0], first), max(known[1], last)
+
+async def migrate_from_arrow(file_path: Path, batch_size: int = 50000):
+    """
+    Migrate Parquet/Arrow data to the database (idempotent, like the CSV path).
+
+    Batches are validated with Arrow compute kernels, encoded as CSV in C++
+    and COPY'd through EsgMetricsCRUD.bulk_load, so no per-row Python
+    objects are created. Rows without a timestamp are rejected. Scope 2
+    is then recalculated over each building's loaded range, as COPY
+    bypasses the calculation done on ingest.
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+
+    default_source = file_path.suffix.lstrip(".")
+    loaded = rejected = 0
+    ranges: Dict[str, List[datetime]] = {}
+    try:
+        async with async_session() as session:
+            await session.execute(text('CREATE EXTENSION IF NOT EXISTS "uuid-ossp"'))
+            await session.commit()
+
+            for number, batch in enumerate(_record_batches(file_path, batch_size)):
+                try:
+                    table, skipped = _prepare_batch(batch, default_source)
+                except (pa.ArrowInvalid, KeyError, ValueError) as e:
+                    logger.error(f"Skipping invalid batch {number}: {str(e)}")
+                    rejected += batch.num_rows
+                    continue
+
+                rejected += skipped
+                if skipped:
+                    logger.warning(f"Batch {number}: skipped {skipped} invalid rows")
+                if not table.num_rows:
+                    continue
+
+                buffer = io.BytesIO()
+                pacsv.write_csv(table, buffer)
+                buffer.seek(0)
+                loaded += await EsgMetricsCRUD.bulk_load(session, buffer)
+                _mark_days(table)
+                _extend_ranges(ranges, table)
+                logger.info(f"Migrated {loaded} records")
+
+            for building_id, (first, last) in sorted(ranges.items()):
+                await recalculate_building(session, building_id, first, last)
+            logger.info(f"Scope 2 recalculated for {len(ranges)} buildings")
+
+            # The app's per-day sketches are recomputed for every imported day
+            await sketch_store.flush(session)
+
+        logger.info(f"Migration completed successfully ({loaded} loaded, {rejected} rejected)")
+
+    except Exception as e:
+        logger.error(f"Migration failed: {str(e)}")
+        raise
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='ESG Data Migration Tool')
-    parser.add_argument('file', type=str, help='Path to CSV file')
-    parser.add_argument('--batch-size', type=int, default=100, 
-                      help='Number of records per batch')
+    parser.add_argument('file', type=str, help='Path to CSV, Parquet or Arrow IPC file')
+    parser.add_argument('--batch-size', type=int, default=None,
+                      help='Number of records per batch (default: 100 for CSV, 50000 for Parquet/Arrow)')
     
     args = parser.parse_args()
-    asyncio.run(migrate_from_csv(Path(args.file), args.batch_size))
\ No newline at end of file
+    path = Path(args.file)
+    if path.suffix in ARROW_SUFFIXES:
+        asyncio.run(migrate_from_arrow(path, args.batch_size or 50000))
+    else:
+        asyncio.run(migrate_from_csv(path, args.batch_size or 100))
\ No newline at end of file
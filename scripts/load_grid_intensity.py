@@ -0,0 +1,54 @@
+import argparse
+import asyncio
+import csv
+import logging
+from datetime import datetime
+from pathlib import Path
+from core.database import async_session
+from api.v1.models.emission_factors import EmissionFactorCRUD, GridIntensityPoint
+from api.v1.services.scope2 import recalculate_portfolio
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+async def load(file_path: Path, batch_size: int) -> int:
+    """CSV with zone, valid_from (ISO, UTC) and g_co2_per_kwh columns; re-loading revises values"""
+    loaded = 0
+    async with async_session() as session:
+        with open(file_path, 'r') as f:
+            batch = []
+            for row in csv.DictReader(f):
+                batch.append(GridIntensityPoint(
+                    zone=row['zone'],
+                    valid_from=datetime.fromisoformat(row['valid_from']),
+                    g_co2_per_kwh=float(row['g_co2_per_kwh'])
+                ))
+                if len(batch) >= batch_size:
+                    loaded += await EmissionFactorCRUD.upsert_intensity(session, batch)
+                    await session.commit()
+                    batch = []
+            loaded += await EmissionFactorCRUD.upsert_intensity(session, batch)
+            await session.commit()
+    logger.info(f"Loaded {loaded} intensity points")
+    return loaded
+
+async def main(args):
+    await load(Path(args.file), args.batch_size)
+    if args.recalculate:
+        async with async_session() as session:
+            summary = await recalculate_portfolio(
+                session, datetime(args.recalculate, 1, 1), datetime(args.recalculate, 12, 31, 23, 59, 59, 999999)
+            )
+        logger.info(
+            f"Recalculated {summary['readings']} readings in {summary['seconds']}s: "
+            f"{summary['location_co2_kg']:,.0f} kg location-based, {summary['market_co2_kg']:,.0f} kg market-based"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Load hourly grid carbon intensity and optionally recalculate Scope 2')
+    parser.add_argument('file', type=str, help='Path to intensity CSV')
+    parser.add_argument('--batch-size', type=int, default=5000,
+                      help='Points upserted per transaction')
+    parser.add_argument('--recalculate', type=int, default=None, metavar='YEAR',
+                      help='Recalculate the whole portfolio for this year afterwards')
+    asyncio.run(main(parser.parse_args()))
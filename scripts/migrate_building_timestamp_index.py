@@ -0,0 +1,25 @@
+import asyncio
+import logging
+from sqlalchemy import text
+from core.database import engine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Adds the (building_id, timestamp) index behind the building summary listing
+# (latest reading and month-to-date totals per building) to an existing
+# esg_metrics table. Built concurrently so ingestion keeps running meanwhile.
+STATEMENT = """
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_esg_metrics_building_timestamp
+ON esg_metrics (building_id, timestamp)
+"""
+
+async def migrate():
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text(STATEMENT))
+    logger.info("Building/timestamp index migration completed")
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
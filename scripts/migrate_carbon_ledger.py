@@ -0,0 +1,36 @@
+import asyncio
+import logging
+from sqlalchemy import text
+from core.database import Base, engine
+from api.v1.models.carbon_ledger import LEDGER_TRIGGER_DDL, DBTenantBuilding, DBCarbonLedger, DBOffsetTransaction
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Installs the ledger trigger on an existing esg_metrics table and rebuilds the
+# emitted totals from history. The table is locked against writes meanwhile so
+# no reading is counted twice or missed between the backfill and the trigger.
+BACKFILL = """
+INSERT INTO tenant_carbon_ledger (tenant_id, emitted_co2_kg, offset_co2_kg, updated_at)
+SELECT tb.tenant_id, COALESCE(SUM(m.co2_kg * tb.share), 0), 0, now()
+FROM tenant_buildings tb
+LEFT JOIN esg_metrics m ON m.building_id = tb.building_id
+GROUP BY tb.tenant_id
+ON CONFLICT (tenant_id) DO UPDATE
+SET emitted_co2_kg = EXCLUDED.emitted_co2_kg,
+    updated_at = EXCLUDED.updated_at
+"""
+
+async def migrate():
+    tables = [DBTenantBuilding.__table__, DBCarbonLedger.__table__, DBOffsetTransaction.__table__]
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda sync_conn: Base.metadata.create_all(sync_conn, tables=tables))
+        await conn.execute(text("LOCK TABLE esg_metrics IN SHARE ROW EXCLUSIVE MODE"))
+        for statement in LEDGER_TRIGGER_DDL:
+            await conn.execute(text(statement))
+        result = await conn.execute(text(BACKFILL))
+        logger.info(f"Backfilled {result.rowcount} tenant ledgers")
+    logger.info("Carbon ledger migration completed")
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
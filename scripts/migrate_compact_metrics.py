@@ -0,0 +1,86 @@
+import argparse
+import asyncio
+import logging
+from datetime import timedelta
+from sqlalchemy import text
+from core.database import Base, engine
+from api.v1.models.compact_metrics import (
+    COMPACT_MIRROR_DDL, DBBuildingKey, DBMetricSource, DBCompactMetric
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Moves esg_metrics history into esg_metrics_compact. The mirror trigger is
+# installed first, so everything written during the migration lands in both
+# tables; history is then copied one time window per transaction. Each window
+# holds a SHARE lock on esg_metrics while it is copied, so a concurrent
+# update or delete cannot slip between the copy and the trigger; that lock
+# also blocks every insert (ingest) until the window commits, hence the
+# small default window. Rows the
+# trigger already mirrored are left alone (ON CONFLICT DO NOTHING), which also
+# makes the script safe to re-run after an interruption.
+SEED_BUILDINGS = """
+INSERT INTO building_keys (building_id)
+SELECT b.id FROM buildings b
+WHERE NOT EXISTS (SELECT 1 FROM building_keys k WHERE k.building_id = b.id)
+ORDER BY b.id
+"""
+
+SEED_SOURCES = """
+INSERT INTO metric_sources (name)
+SELECT DISTINCT m.source FROM esg_metrics m
+WHERE NOT EXISTS (SELECT 1 FROM metric_sources s WHERE s.name = m.source)
+"""
+
+BACKFILL_WINDOW = """
+INSERT INTO esg_metrics_compact (timestamp, building_key, co2_kg, energy_kwh, water_m3, waste_kg, source_key)
+SELECT m.timestamp, k.id, m.co2_kg, m.energy_kwh, m.water_m3, m.waste_kg, s.id
+FROM esg_metrics m
+JOIN building_keys k ON k.building_id = m.building_id
+JOIN metric_sources s ON s.name = m.source
+WHERE m.timestamp >= :start AND m.timestamp < :end
+ON CONFLICT (building_key, timestamp, source_key) DO NOTHING
+"""
+
+async def migrate(window_days: int, cluster: bool):
+    tables = [DBBuildingKey.__table__, DBMetricSource.__table__, DBCompactMetric.__table__]
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda sync_conn: Base.metadata.create_all(sync_conn, tables=tables))
+        await conn.execute(text("LOCK TABLE esg_metrics IN SHARE ROW EXCLUSIVE MODE"))
+        for statement in COMPACT_MIRROR_DDL:
+            await conn.execute(text(statement))
+        await conn.execute(text(SEED_BUILDINGS))
+        await conn.execute(text(SEED_SOURCES))
+        bounds = (await conn.execute(text("SELECT min(timestamp), max(timestamp) FROM esg_metrics"))).one()
+    logger.info("Mirror trigger installed")
+
+    start, last = bounds
+    copied = 0
+    while start is not None and start <= last:
+        end = start + timedelta(days=window_days)
+        async with engine.begin() as conn:
+            await conn.execute(text("LOCK TABLE esg_metrics IN SHARE MODE"))
+            result = await conn.execute(text(BACKFILL_WINDOW), {"start": start, "end": end})
+        copied += result.rowcount
+        logger.info(f"Copied {result.rowcount} rows from {start.date()} to {end.date()}")
+        start = end
+    logger.info(f"Backfilled {copied} rows")
+
+    async with engine.begin() as conn:
+        if cluster:
+            # Rewrites the table in (building, time) order so per-building scans
+            # read adjacent pages and the BRIN ranges stay narrow
+            await conn.execute(text("CLUSTER esg_metrics_compact USING esg_metrics_compact_pkey"))
+        await conn.execute(text("ANALYZE esg_metrics_compact"))
+    logger.info("Compact metrics migration completed; set METRIC_COMPACT_READS=true to serve reads from it")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate esg_metrics into the compact layout")
+    parser.add_argument(
+        "--window-days", type=int, default=1,
+        help="History copied per transaction; ingest is blocked while a window is copied (SHARE lock)"
+    )
+    parser.add_argument("--cluster", action="store_true", help="CLUSTER the table after the backfill")
+    args = parser.parse_args()
+    asyncio.run(migrate(args.window_days, args.cluster))
@@ -0,0 +1,39 @@
+
+import asyncio
+import logging
+from sqlalchemy import text
+from core.database import engine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Adds the (building_id, source, timestamp) natural key to an existing esg_metrics table.
+# Duplicates created by retries before the key existed are removed, keeping one row per key.
+STATEMENTS = [
+    "ALTER TABLE esg_metrics ADD COLUMN IF NOT EXISTS source VARCHAR(64) NOT NULL DEFAULT 'api'",
+    """
+    DELETE FROM esg_metrics a
+    USING esg_metrics b
+    WHERE a.building_id = b.building_id
+      AND a.source = b.source
+      AND a.timestamp = b.timestamp
+      AND a.id > b.id
+    """,
+    """
+    DO $$ BEGIN
+        ALTER TABLE esg_metrics
+            ADD CONSTRAINT uq_esg_metrics_natural_key UNIQUE (building_id, source, timestamp);
+    EXCEPTION WHEN duplicate_table OR duplicate_object THEN NULL;
+    END $$
+    """,
+]
+
+async def migrate():
+    async with engine.begin() as conn:
+        for statement in STATEMENTS:
+            result = await conn.execute(text(statement))
+            logger.info(f"{statement.split()[0]}: {result.rowcount} rows")
+    logger.info("Natural key migration completed")
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from api.v1.services.alert_engine import AlertEngine, _RuleSet
+
+
+def rule(rule_id, threshold, direction="above", hysteresis=0.0, debounce_seconds=0.0, building_id="b1"):
+    return SimpleNamespace(
+        id=rule_id,
+        building_id=building_id,
+        sensor_type="co2",
+        threshold=threshold,
+        direction=direction,
+        hysteresis=hysteresis,
+        debounce_seconds=debounce_seconds,
+        notify_emails=[],
+    )
+
+
+def states(events):
+    return {(event["alert_id"], event["state"]) for event in events}
+
+
+def test_rule_set_bisects_to_exceeded_prefix():
+    rules = [
+        {"id": f"r{t}", "threshold": t, "hysteresis": 0.0, "debounce_seconds": 0.0}
+        for t in (900, 600, 1200)
+    ]
+    rule_set = _RuleSet(1.0, rules)
+    assert list(rule_set.thresholds) == [600, 900, 1200]
+
+    changes = rule_set.evaluate(1000, 0.0)
+    assert {rule_set.rule_ids[i] for i, state in changes if state == "triggered"} == {"r600", "r900"}
+    # A reading equal to a threshold does not exceed it
+    assert rule_set.evaluate(1000, 1.0) == []
+    assert {rule_set.rule_ids[i] for i, _ in rule_set.evaluate(600, 2.0)} == {"r900", "r600"}
+
+
+def test_below_rules_are_stored_negated():
+    rule_set = _RuleSet(-1.0, [
+        {"id": "cold", "threshold": 18.0, "hysteresis": 0.0, "debounce_seconds": 0.0},
+        {"id": "freezing", "threshold": 5.0, "hysteresis": 0.0, "debounce_seconds": 0.0},
+    ])
+    assert [rule_set.rule_ids[i] for i, _ in rule_set.evaluate(10.0, 0.0)] == ["cold"]
+    assert [rule_set.rule_ids[i] for i, _ in rule_set.evaluate(4.0, 1.0)] == ["freezing"]
+
+
+def test_hysteresis_delays_clearing():
+    engine = AlertEngine()
+    engine.add_rule(rule("r1", 1000, hysteresis=50))
+    assert states(engine.evaluate("b1", "co2", 1100)) == {("r1", "triggered")}
+    assert engine.evaluate("b1", "co2", 980) == []
+    assert states(engine.evaluate("b1", "co2", 950)) == {("r1", "cleared")}
+    assert engine.active_alerts("b1") == []
+
+
+def test_debounce_requires_sustained_breach():
+    engine = AlertEngine()
+    engine.add_rule(rule("r1", 1000, debounce_seconds=60))
+    start = datetime(2026, 1, 1, 12, 0)
+    assert engine.evaluate("b1", "co2", 1100, start) == []
+    # Dropping back resets the pending breach
+    assert engine.evaluate("b1", "co2", 900, start + timedelta(seconds=30)) == []
+    assert engine.evaluate("b1", "co2", 1100, start + timedelta(seconds=40)) == []
+    assert engine.evaluate("b1", "co2", 1100, start + timedelta(seconds=90)) == []
+    assert states(engine.evaluate("b1", "co2", 1100, start + timedelta(seconds=100))) == {("r1", "triggered")}
+
+
+def test_rebuild_keeps_firing_state():
+    engine = AlertEngine()
+    engine.add_rule(rule("r1", 1000))
+    engine.evaluate("b1", "co2", 1100)
+    engine.add_rule(rule("r2", 500))
+    assert engine.active_alerts("b1") == ["r1"]
+    # r1 is already active, only r2 fires
+    assert states(engine.evaluate("b1", "co2", 1100)) == {("r2", "triggered")}
+
+    assert engine.remove_rule("r2")
+    assert not engine.remove_rule("r2")
+    assert engine.active_alerts("b1") == ["r1"]
+
+
+def test_readings_without_rules_produce_no_events():
+    engine = AlertEngine()
+    engine.add_rule(rule("r1", 1000))
+    assert engine.evaluate("b2", "co2", 5000) == []
+    assert engine.evaluate("b1", "temperature", 5000) == []
@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from api.v1.services.anomaly import AnomalyDetector, score_batch  # noqa: E402
+
+MONDAY_NINE = datetime(2026, 1, 5, 9)
+
+
+def weekly(values):
+    """One reading per week, all in the same hour-of-week slot"""
+    return [MONDAY_NINE + timedelta(weeks=i) for i in range(len(values))], values
+
+
+def test_flat_series_uses_the_variance_floor():
+    timestamps, values = weekly([100.0] * 19 + [100.5])
+    assert score_batch(timestamps, values) == []
+
+    detector = AnomalyDetector()
+    z = [detector.score("b1", "co2_kg", v, ts) for ts, v in zip(timestamps, values)]
+    assert z[-1] == pytest.approx(0.5)
+
+
+def test_large_steady_values_do_not_lose_precision():
+    timestamps, values = weekly([1e9 + (i % 2) for i in range(20)])
+    assert score_batch(timestamps, values, min_std_ratio=0.0) == []
+
+
+def test_outlier_is_flagged_like_live_scoring():
+    values = [100.0 + (i % 5) for i in range(40)] + [200.0]
+    timestamps, values = weekly(values)
+    flagged = score_batch(timestamps, values)
+    assert [point["value"] for point in flagged] == [200.0]
+
+    detector = AnomalyDetector()
+    live = [detector.score("b1", "co2_kg", v, ts) for ts, v in zip(timestamps, values)]
+    assert live[-1] >= detector.threshold
+
+
+def test_sparse_slots_fall_back_to_the_whole_range():
+    timestamps = [MONDAY_NINE + timedelta(hours=i) for i in range(30)]
+    values = [100.0 + (i % 3) for i in range(29)] + [300.0]
+    flagged = score_batch(timestamps, values)
+    assert [point["value"] for point in flagged] == [300.0]
@@ -0,0 +1,74 @@
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+
+# The scripts run with their own directory on sys.path, not as a package
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "scripts"))
+from data_migration import _prepare_batch  # noqa: E402
+from api.v1.models.esg_metrics import BULK_LOAD_COLUMNS  # noqa: E402
+
+
+def make_batch(**columns):
+    values = {
+        "building_id": ["b1", "b2", "b3"],
+        "timestamp": pa.array([datetime(2026, 1, 1, h) for h in range(3)], pa.timestamp("us")),
+        "co2_kg": [100.0, 110.0, 120.0],
+        "energy_kwh": [400, 410, 420],
+        "water_m3": [3.0, 3.1, 3.2],
+        "waste_kg": [10.0, 11.0, 12.0],
+    }
+    values.update(columns)
+    return pa.RecordBatch.from_pydict(values)
+
+
+def test_clean_batch_is_cast_to_bulk_load_layout():
+    table, rejected = _prepare_batch(make_batch(), "parquet")
+    assert rejected == 0
+    assert table.column_names == list(BULK_LOAD_COLUMNS)
+    assert table["source"].to_pylist() == ["parquet"] * 3
+    assert table["energy_kwh"].type == pa.float64()
+    assert table["timestamp"].type == pa.timestamp("us")
+
+
+def test_invalid_rows_are_rejected():
+    table, rejected = _prepare_batch(make_batch(
+        building_id=["b1", None, "b3"],
+        co2_kg=[100.0, 110.0, float("nan")],
+        waste_kg=[10.0, 11.0, 12.0],
+    ), "parquet")
+    assert rejected == 2
+    assert table["building_id"].to_pylist() == ["b1"]
+
+    table, rejected = _prepare_batch(make_batch(water_m3=[0.0, None, 3.2]), "parquet")
+    assert rejected == 2
+    assert table["building_id"].to_pylist() == ["b3"]
+
+
+def test_source_column_nulls_take_the_default():
+    table, _ = _prepare_batch(make_batch(source=["bms", None, "meter"]), "arrow")
+    assert table["source"].to_pylist() == ["bms", "arrow", "meter"]
+
+
+def test_aware_timestamps_become_naive_utc():
+    aware = pa.array(
+        [datetime(2026, 1, 1, 12), datetime(2026, 1, 1, 13), datetime(2026, 1, 1, 14)],
+        pa.timestamp("us", tz="Europe/Warsaw")
+    )
+    table, _ = _prepare_batch(make_batch(timestamp=aware), "parquet")
+    # Arrow stores aware values as UTC instants; only the zone is dropped
+    assert table["timestamp"].to_pylist()[0] == datetime(2026, 1, 1, 12)
+    assert table["timestamp"].type.tz is None
+
+
+def test_string_timestamps_with_offsets_are_parsed():
+    table, rejected = _prepare_batch(make_batch(timestamp=[
+        "2026-01-01T13:00:00+01:00", "2026-01-01T12:30:00+00:00", "2026-01-01T07:00:00-05:00"
+    ]), "parquet")
+    assert rejected == 0
+    assert table["timestamp"].to_pylist() == [
+        datetime(2026, 1, 1, 12, 0), datetime(2026, 1, 1, 12, 30), datetime(2026, 1, 1, 12, 0)
+    ]
@@ -0,0 +1,87 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from api.v1.models import building as building_module
+from api.v1.models.building import BuildingRegistry, DBBuilding
+
+
+def make_building(building_id):
+    return DBBuilding(id=building_id, name=f"Building {building_id}", address=None,
+                      certifications=["LEED"], created_at=datetime(2026, 1, 1))
+
+
+@pytest.fixture
+def database(monkeypatch):
+    """Buildings "in the database", the buildings data version and a log of queries made"""
+    state = {"buildings": {}, "version": 1, "queries": []}
+
+    async def get_version(db, scope):
+        state["queries"].append("version")
+        return state["version"], None
+
+    async def get_building(db, building_id):
+        state["queries"].append("building")
+        return state["buildings"].get(building_id)
+
+    monkeypatch.setattr(building_module.DataVersionCRUD, "get", get_version)
+    monkeypatch.setattr(building_module.BuildingCRUD, "get", get_building)
+    return state
+
+
+def complete_registry(database, *buildings):
+    registry = BuildingRegistry(max_size=10)
+    for building in buildings:
+        database["buildings"][building.id] = building
+        registry.put(building)
+    registry.complete = True
+    registry.version = database["version"]
+    return registry
+
+
+def test_hit_needs_no_query(database):
+    registry = complete_registry(database, make_building("b1"))
+    cached = asyncio.run(registry.fetch(None, "b1"))
+    assert cached.name == "Building b1"
+    assert cached.certifications == ["LEED"]
+    assert database["queries"] == []
+
+
+def test_miss_on_complete_registry_checks_version_only(database):
+    registry = complete_registry(database, make_building("b1"))
+    assert asyncio.run(registry.fetch(None, "missing")) is None
+    assert database["queries"] == ["version"]
+
+
+def test_miss_after_foreign_write_falls_back_to_database(database):
+    registry = complete_registry(database, make_building("b1"))
+    # Created by another process: the version moved on
+    database["buildings"]["b2"] = make_building("b2")
+    database["version"] += 1
+
+    cached = asyncio.run(registry.fetch(None, "b2"))
+    assert cached.id == "b2"
+    assert database["queries"] == ["version", "building"]
+    assert registry.get("b2") is cached
+
+
+def test_miss_on_partial_registry_queries_database(database):
+    registry = BuildingRegistry(max_size=1)
+    database["buildings"]["b1"] = make_building("b1")
+    assert asyncio.run(registry.fetch(None, "b1")).id == "b1"
+    assert asyncio.run(registry.fetch(None, "missing")) is None
+    assert database["queries"] == ["building", "building"]
+
+
+def test_eviction_marks_registry_incomplete():
+    registry = BuildingRegistry(max_size=2)
+    registry.complete = True
+    for building_id in ("b1", "b2"):
+        registry.put(make_building(building_id))
+    registry.get("b1")  # b2 becomes the least recently used
+    registry.put(make_building("b3"))
+
+    assert not registry.complete
+    assert registry.get("b2") is None
+    assert registry.get("b1") is not None and registry.get("b3") is not None
@@ -0,0 +1,93 @@
+import struct
+
+import pytest
+
+from integrations.iot.spool import DiskSpool
+
+RECORD = DiskSpool._RECORD.size
+
+
+def payloads(spool, limit=100):
+    return [payload for _, payload in spool.peek(limit)]
+
+
+def test_records_are_delivered_until_committed(tmp_path):
+    spool = DiskSpool(tmp_path / "spool.bin", capacity=256)
+    for i in range(3):
+        spool.append(f"r{i}".encode())
+    records = spool.peek(2)
+    assert [payload for _, payload in records] == [b"r0", b"r1"]
+    # Not committed yet: the same records come back
+    assert payloads(spool, 2) == [b"r0", b"r1"]
+    spool.commit(records[-1][0])
+    assert payloads(spool) == [b"r2"]
+    spool.commit(spool.peek(1)[0][0])
+    assert not spool and spool.pending_bytes == 0
+
+
+def test_records_wrap_around_the_end(tmp_path):
+    spool = DiskSpool(tmp_path / "spool.bin", capacity=4 * (RECORD + 10))
+    for i in range(3):
+        spool.append(b"%010d" % i)
+    spool.commit(spool.peek(2)[-1][0])
+    # Each of these crosses or starts past the physical end of the buffer
+    spool.append(b"x" * 14)
+    spool.append(b"y" * 14)
+    assert payloads(spool) == [b"%010d" % 2, b"x" * 14, b"y" * 14]
+    assert spool.dropped == 0
+
+
+def test_full_spool_drops_the_oldest_records(tmp_path):
+    spool = DiskSpool(tmp_path / "spool.bin", capacity=3 * (RECORD + 4))
+    for i in range(5):
+        spool.append(b"%04d" % i)
+    assert payloads(spool) == [b"0002", b"0003", b"0004"]
+    assert spool.dropped == 2
+
+
+def test_oversized_record_is_rejected(tmp_path):
+    spool = DiskSpool(tmp_path / "spool.bin", capacity=32)
+    with pytest.raises(ValueError):
+        spool.append(b"x" * 32)
+    assert not spool
+
+
+def test_reopen_keeps_uncommitted_records(tmp_path):
+    path = tmp_path / "spool.bin"
+    spool = DiskSpool(path, capacity=256)
+    for i in range(3):
+        spool.append(f"r{i}".encode())
+    spool.commit(spool.peek(1)[0][0])
+    spool.close()
+
+    # The stored capacity wins over the one passed on reopen
+    reopened = DiskSpool(path, capacity=1024)
+    assert reopened.capacity == 256
+    assert payloads(reopened) == [b"r1", b"r2"]
+    reopened.close()
+
+
+def test_reopen_discards_a_torn_tail(tmp_path):
+    path = tmp_path / "spool.bin"
+    spool = DiskSpool(path, capacity=256)
+    spool.append(b"complete")
+    torn_at = spool._tail
+    spool.append(b"torn record")
+    # Corrupt the last record's payload as an interrupted write would
+    offset = DiskSpool._HEADER.size + torn_at + RECORD
+    spool._map[offset:offset + 4] = b"\0\0\0\0"
+    spool.close()
+
+    reopened = DiskSpool(path, capacity=256)
+    assert payloads(reopened) == [b"complete"]
+    reopened.append(b"next")
+    assert payloads(reopened) == [b"complete", b"next"]
+    reopened.close()
+
+
+def test_foreign_file_starts_empty(tmp_path):
+    path = tmp_path / "spool.bin"
+    path.write_bytes(struct.pack("<8sQQQQ", b"NOTSPOOL", 64, 0, 0, 0) + b"\0" * 64)
+    spool = DiskSpool(path, capacity=128)
+    assert spool.capacity == 128 and not spool
+    spool.close()
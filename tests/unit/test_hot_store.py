@@ -0,0 +1,90 @@
+import math
+from array import array
+from datetime import datetime, timedelta
+
+import pytest
+
+from api.v1.services.hot_store import HotStore, decode_chunk, encode_chunk
+
+START = datetime(2026, 1, 1)
+
+
+def at(seconds):
+    return START + timedelta(seconds=seconds)
+
+
+def make_store(chunk_points=4):
+    return HotStore(window=timedelta(days=1), chunk_points=chunk_points, workers=1)
+
+
+def test_chunk_round_trip():
+    timestamps = array("q", [1_767_225_600, 1_767_225_660, 1_767_225_720, 1_767_225_721, 1_767_229_000,
+                             1_767_229_000 + 10**7, 1_767_229_000 + 10**7 + 60])
+    values = array("d", [21.5, 21.5, 21.75, -3.0, 0.0, 1e-300, math.inf])
+    decoded_ts, decoded_values = decode_chunk(encode_chunk(timestamps, values), len(timestamps))
+    assert decoded_ts == list(timestamps)
+    assert decoded_values == list(values)
+
+
+def test_sealed_chunks_answer_queries():
+    store = make_store()
+    for i in range(10):
+        store.append("b1", "co2_kg", at(60 * i), float(i))
+    assert len(store._series[("b1", "co2_kg")].chunks) == 2
+    points = store.query("b1", "co2_kg", at(0), at(600))
+    assert points == [(at(60 * i), float(i)) for i in range(10)]
+    assert points[0][0].tzinfo is None
+
+
+def test_out_of_order_points_in_the_open_chunk():
+    store = make_store(chunk_points=100)
+    for seconds in (0, 120, 60, 180, 120):
+        store.append("b1", "co2_kg", at(seconds), float(seconds))
+    assert store.query("b1", "co2_kg", at(0), at(180)) == [
+        (at(0), 0.0), (at(60), 60.0), (at(120), 120.0), (at(180), 180.0)
+    ]
+
+
+def test_late_point_revises_the_sealed_chunk():
+    store = make_store()
+    for i in range(9):
+        store.append("b1", "co2_kg", at(60 * i), float(i))
+    store.append("b1", "co2_kg", at(90), 1.5)  # inside the first sealed chunk
+    store.append("b1", "co2_kg", at(60), 10.0)  # replaces a sealed point
+    points = store.query("b1", "co2_kg", at(0), at(480))
+    assert (at(90), 1.5) in points and (at(60), 10.0) in points
+    assert len(points) == 10
+    assert len(store._series[("b1", "co2_kg")].chunks) == 2
+
+
+def test_late_point_between_sealed_and_open_chunk():
+    store = make_store()
+    for seconds in (0, 60, 120, 180, 600, 660):
+        store.append("b1", "co2_kg", at(seconds), 1.0)
+    store.append("b1", "co2_kg", at(300), 2.0)
+    assert store.query("b1", "co2_kg", at(240), at(660)) == [(at(300), 2.0), (at(600), 1.0), (at(660), 1.0)]
+    assert len(store._series[("b1", "co2_kg")].chunks) == 1
+
+
+def test_point_older_than_coverage_is_left_to_the_database():
+    store = make_store()
+    for i in range(6):
+        store.append("b1", "co2_kg", at(3600 + 60 * i), 1.0)
+    store.append("b1", "co2_kg", at(0), 5.0)
+    assert store.query("b1", "co2_kg", at(0), at(4000)) is None
+    assert len(store.query("b1", "co2_kg", at(3600), at(4000))) == 6
+
+
+def test_step_buckets_are_epoch_aligned_naive_utc():
+    store = make_store(chunk_points=100)
+    for i in range(6):
+        store.append("b1", "co2_kg", at(60 * i), float(i))
+    assert store.query("b1", "co2_kg", at(0), at(300), step=180) == [(at(0), 1.0), (at(180), 4.0)]
+
+
+def test_metric_series_are_not_kept_with_several_workers():
+    store = HotStore(window=timedelta(days=1), workers=2)
+    store.append("b1", "co2_kg", at(0), 1.0)
+    store.append("b1", "sensor:t1", at(0), 1.0)
+    assert store.query("b1", "co2_kg", at(0), at(60)) is None
+    assert store.query("b1", "sensor:t1", at(0), at(60)) == [(at(0), 1.0)]
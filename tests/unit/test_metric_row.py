@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta, timezone
+
+from api.v1.models.esg_metrics import EsgMetricCreate, _dedupe, metric_row
+
+
+def make_metric(**overrides):
+    values = dict(building_id="b1", co2_kg=100.0, energy_kwh=400.0, water_m3=3.0, waste_kg=10.0,
+                  timestamp=datetime(2026, 1, 1, 12, 0))
+    values.update(overrides)
+    return EsgMetricCreate(**values)
+
+
+def test_retry_gets_the_same_id():
+    assert metric_row(make_metric())["id"] == metric_row(make_metric(co2_kg=120.0))["id"]
+
+
+def test_id_depends_on_natural_key():
+    base = metric_row(make_metric())["id"]
+    assert metric_row(make_metric(building_id="b2"))["id"] != base
+    assert metric_row(make_metric(source="bms"))["id"] != base
+    assert metric_row(make_metric(timestamp=datetime(2026, 1, 1, 12, 1)))["id"] != base
+
+
+def test_aware_timestamp_is_normalised_to_naive_utc():
+    aware = datetime(2026, 1, 1, 14, 0, tzinfo=timezone(timedelta(hours=2)))
+    row = metric_row(make_metric(timestamp=aware))
+    assert row["timestamp"] == datetime(2026, 1, 1, 12, 0)
+    assert row["id"] == metric_row(make_metric())["id"]
+
+
+def test_source_defaults_to_api():
+    assert metric_row(make_metric())["source"] == "api"
+
+
+def test_missing_timestamp_is_filled_on_validation():
+    metric = EsgMetricCreate(building_id="b1", co2_kg=100.0, energy_kwh=400.0, water_m3=3.0, waste_kg=10.0)
+    assert metric.timestamp is not None
+    # The id is derived from the validated timestamp, not a second utcnow()
+    assert metric_row(metric)["timestamp"] == metric.timestamp
+    assert metric_row(metric)["id"] == metric_row(metric)["id"]
+
+
+def test_dedupe_keeps_the_last_row_per_key():
+    rows = [metric_row(make_metric(co2_kg=value)) for value in (100.0, 110.0, 120.0)]
+    rows.append(metric_row(make_metric(building_id="b2")))
+    deduped = _dedupe(rows)
+    assert len(deduped) == 2
+    assert deduped[0]["co2_kg"] == 120.0
@@ -0,0 +1,88 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from api.v1.models.esg_metrics import EsgMetricCreate
+from api.v1.services import metric_writer as writer_module
+from api.v1.services.metric_writer import GroupCommitWriter
+
+
+@asynccontextmanager
+async def fake_session():
+    yield None
+
+
+def make_metric(building_id, minute=0, co2_kg=100.0):
+    return EsgMetricCreate(
+        building_id=building_id,
+        co2_kg=co2_kg,
+        energy_kwh=400.0,
+        water_m3=3.0,
+        waste_kg=10.0,
+        timestamp=datetime(2026, 1, 1) + timedelta(minutes=minute)
+    )
+
+
+@pytest.fixture
+def batches(monkeypatch):
+    """Batches passed to create_many; a row of building "bad" fails the whole batch"""
+    calls = []
+
+    async def create_many(db, rows):
+        calls.append(len(rows))
+        if any(row["building_id"] == "bad" for row in rows):
+            raise ValueError("violates check constraint")
+        return {row["id"]: row for row in rows}
+
+    monkeypatch.setattr(writer_module.EsgMetricsCRUD, "create_many", create_many)
+    return calls
+
+
+async def submit_all(writer, metrics):
+    results = await asyncio.gather(*(writer.submit(m) for m in metrics), return_exceptions=True)
+    await writer.close()
+    return results
+
+
+def test_concurrent_submits_share_one_commit(batches):
+    writer = GroupCommitWriter(session_factory=fake_session, interval_ms=5, max_rows=100)
+    results = asyncio.run(submit_all(writer, [make_metric("b1", minute) for minute in range(20)]))
+    assert batches == [20]
+    assert all(written for _, written in results)
+
+
+def test_bad_row_is_isolated_by_bisection(batches):
+    writer = GroupCommitWriter(session_factory=fake_session, interval_ms=5, max_rows=100)
+    metrics = [make_metric("b1", minute) for minute in range(16)]
+    metrics[5] = make_metric("bad", 5)
+    results = asyncio.run(submit_all(writer, metrics))
+
+    assert isinstance(results[5], ValueError)
+    assert all(result[1] for i, result in enumerate(results) if i != 5)
+    # 1 + 2 + 2 + 2 + 2 attempts, not one per row
+    assert len(batches) == 9
+
+
+def test_unavailable_database_fails_batch_at_once(monkeypatch):
+    calls = []
+
+    async def create_many(db, rows):
+        calls.append(len(rows))
+        raise OperationalError("INSERT", {}, ConnectionRefusedError())
+
+    monkeypatch.setattr(writer_module.EsgMetricsCRUD, "create_many", create_many)
+    writer = GroupCommitWriter(session_factory=fake_session, interval_ms=5, max_rows=100)
+    results = asyncio.run(submit_all(writer, [make_metric("b1", minute) for minute in range(8)]))
+
+    assert calls == [8]
+    assert all(isinstance(result, OperationalError) for result in results)
+
+
+def test_only_the_newest_duplicate_counts_as_written(batches):
+    writer = GroupCommitWriter(session_factory=fake_session, interval_ms=5, max_rows=100)
+    results = asyncio.run(submit_all(writer, [make_metric("b1", 0, 100.0), make_metric("b1", 0, 120.0)]))
+    assert [written for _, written in results] == [False, True]
+    assert results[1][0].co2_kg == 120.0
@@ -0,0 +1,67 @@
+import pytest
+
+from core.profiling import RequestProfile
+
+
+def make_profile():
+    profile = RequestProfile("GET", "/api/v1/esg/aggregates", task=None)
+    profile.wall = 0.1
+    return profile
+
+
+def test_samples_are_weighted_by_elapsed_time():
+    profile = make_profile()
+    profile.add_sample("main;handler", own=True, serializing=False, seconds=0.001)
+    profile.add_sample("main;handler", own=True, serializing=False, seconds=0.025)
+    assert profile.own_samples == 2
+    assert profile.own_seconds == pytest.approx(0.026)
+    assert profile.stacks["main;handler"] == 26000
+
+
+def test_breakdown_separates_serialize_and_other_tasks():
+    profile = make_profile()
+    profile.add_sample("main;handler", own=True, serializing=False, seconds=0.004)
+    profile.add_sample("main;dumps", own=True, serializing=True, seconds=0.002)
+    profile.add_sample("main;poll", own=False, serializing=False, seconds=0.003)
+    profile.add_statement("SELECT 1", 0.010)
+    profile.add_statement("SELECT 1", 0.005)
+
+    assert profile.breakdown() == {
+        "total": 100.0, "db": 15.0, "python": 6.0, "serialize": 2.0, "other_tasks": 3.0,
+    }
+    assert profile.statements["SELECT 1"] == [2, pytest.approx(0.015)]
+    assert profile.server_timing().startswith("total;dur=100.0, db;dur=15.0")
+
+
+def test_collapsed_stacks_use_microsecond_weights():
+    profile = make_profile()
+    profile.add_sample("main;handler", own=True, serializing=False, seconds=0.0015)
+    profile.add_sample("main;poll", own=False, serializing=False, seconds=0.002)
+    assert profile.collapsed().splitlines() == ["main;handler 1500", "(other tasks);main;poll 2000"]
+
+
+def test_summary_orders_statements_by_time():
+    profile = make_profile()
+    profile.add_statement("SELECT fast", 0.001)
+    profile.add_statement("SELECT slow", 0.050)
+    assert [s["statement"] for s in profile.summary()["statements"]] == ["SELECT slow", "SELECT fast"]
+
+
+def scope_with(token=None, query=b"profile=1"):
+    headers = [(b"authorization", f"Bearer {token}".encode())] if token else []
+    return {"type": "http", "headers": headers, "query_string": query}
+
+
+def test_profile_flag_needs_an_admin_token_without_db_access():
+    from jose import jwt
+    from core.profiling import _flagged, _is_admin
+    from core.security import ALGORITHM, SECRET_KEY
+
+    admin = jwt.encode({"sub": "root", "role": "admin"}, SECRET_KEY, algorithm=ALGORITHM)
+    manager = jwt.encode({"sub": "bm", "role": "building_manager"}, SECRET_KEY, algorithm=ALGORITHM)
+    forged = jwt.encode({"sub": "x", "role": "admin"}, "not-the-key", algorithm=ALGORITHM)
+
+    assert _flagged(scope_with(admin)) and _is_admin(scope_with(admin))
+    assert not _is_admin(scope_with(manager))
+    assert not _is_admin(scope_with(forged))
+    assert not _is_admin(scope_with())
@@ -0,0 +1,81 @@
+import pytest
+
+from core import admission
+from core.admission import RateLimiter, TokenBucket
+from core.config import settings
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(admission.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_TENANT_RPS", 10.0)
+    monkeypatch.setattr(settings, "RATE_LIMIT_ROUTE_RPS", 4.0)
+    monkeypatch.setattr(settings, "RATE_LIMIT_ROUTES", {"POST /esg/metrics": 1.0})
+    monkeypatch.setattr(settings, "RATE_LIMIT_BURST_SECONDS", 1.0)
+
+
+def test_bucket_admits_burst_then_reports_wait(clock):
+    bucket = TokenBucket(rate=2.0, burst=3.0)
+    assert [bucket.take() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.take() == pytest.approx(0.5)
+
+
+def test_bucket_refills_at_rate_up_to_burst(clock):
+    bucket = TokenBucket(rate=2.0, burst=3.0)
+    for _ in range(3):
+        bucket.take()
+    clock.now += 0.5
+    assert bucket.take() == 0.0
+    assert bucket.take() > 0
+
+    clock.now += 60
+    assert [bucket.take() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.take() > 0
+
+
+def test_route_override_applies_per_tenant(clock, limits):
+    limiter = RateLimiter(workers=1)
+    assert limiter.check("t1", "POST /esg/metrics") == 0.0
+    assert limiter.check("t1", "POST /esg/metrics") == pytest.approx(1.0)
+    # Other tenants and routes have their own buckets
+    assert limiter.check("t2", "POST /esg/metrics") == 0.0
+    assert limiter.check("t1", "GET /buildings") == 0.0
+    assert limiter.rejected[("route", "POST /esg/metrics")] == 1
+
+
+def test_tenant_limit_covers_all_routes(clock, limits):
+    limiter = RateLimiter(workers=1)
+    routes = [f"GET /r{i}" for i in range(20)]
+    waits = [limiter.check("t1", route) for route in routes]
+    assert waits[:10] == [0.0] * 10
+    assert all(wait > 0 for wait in waits[10:])
+    assert sum(limiter.rejected.values()) == 10
+
+
+def test_rates_are_split_between_workers(clock, limits):
+    limiter = RateLimiter(workers=2)
+    waits = [limiter.check("t1", "GET /buildings") for _ in range(4)]
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[2] == pytest.approx(0.5)
+
+
+def test_idle_buckets_are_evicted(clock, limits):
+    limiter = RateLimiter(max_keys=4, workers=1)
+    for tenant in ("t1", "t2", "t3"):
+        limiter.check(tenant, "GET /buildings")
+    assert len(limiter._buckets) == 4
+    assert ("t1", "") not in limiter._buckets
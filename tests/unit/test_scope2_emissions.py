@@ -0,0 +1,41 @@
+from datetime import datetime
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from api.v1.models.emission_factors import DBEnergyContract, scope2_emissions  # noqa: E402
+
+TIMESTAMPS = [datetime(2026, 1, day) for day in (1, 5, 10, 15)]
+ENERGY = [100.0, 200.0, 300.0, 400.0]
+INTENSITY = [(datetime(2026, 1, 3), 250.0), (datetime(2026, 1, 10), 500.0)]
+
+
+def test_readings_take_the_latest_intensity_at_or_before_them():
+    location, market = scope2_emissions(TIMESTAMPS, ENERGY, INTENSITY)
+    assert np.isnan(location[0])
+    # The 10th matches a point exactly and takes it
+    assert location[1:].tolist() == [50.0, 150.0, 200.0]
+    np.testing.assert_array_equal(market, location)
+
+
+def test_no_intensity_gives_nan():
+    location, market = scope2_emissions(TIMESTAMPS, ENERGY, [])
+    assert np.isnan(location).all() and np.isnan(market).all()
+
+
+def test_residual_mix_replaces_location_factor_for_market():
+    location, market = scope2_emissions(TIMESTAMPS, ENERGY, INTENSITY, residual_mix=0.6)
+    assert market.tolist() == [60.0, 120.0, 180.0, 240.0]
+    assert np.isnan(location[0])
+
+
+def test_contracts_override_market_factor_with_exclusive_end():
+    contracts = [
+        DBEnergyContract(valid_from=datetime(2026, 1, 5), valid_to=datetime(2026, 1, 15), kg_co2_per_kwh=0.0),
+        DBEnergyContract(valid_from=datetime(2026, 1, 10), valid_to=None, kg_co2_per_kwh=0.1),
+    ]
+    location, market = scope2_emissions(TIMESTAMPS, ENERGY, INTENSITY, contracts, residual_mix=0.6)
+    # Later contracts win where they overlap; valid_to itself is not covered
+    assert market.tolist() == [60.0, 0.0, 30.0, 40.0]
+    assert location[1:].tolist() == [50.0, 150.0, 200.0]
@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta, timezone
+
+from api.v1.services.sensor_registry import SensorRegistry
+
+
+def test_latest_value_and_listing():
+    registry = SensorRegistry()
+    ts = datetime(2026, 1, 1, 12, 0)
+    registry.update("b1", "t1", "temperature", 21.5, "C", ts)
+    registry.update("b1", "c1", "co2", 640, "ppm", ts)
+    registry.update("b2", "t1", "temperature", 19.0, "C", ts)
+
+    assert len(registry) == 3
+    latest = registry.latest("b1", "t1")
+    assert latest["last_value"] == 21.5
+    assert latest["type"] == "temperature"
+    assert latest["unit"] == "C"
+    assert latest["last_update"] == ts
+    assert {row["sensor_id"] for row in registry.list_building("b1")} == {"t1", "c1"}
+    assert registry.list_building("unknown") == []
+    assert registry.latest("b1", "unknown") is None
+
+
+def test_out_of_order_reading_is_ignored():
+    registry = SensorRegistry()
+    ts = datetime(2026, 1, 1, 12, 0)
+    assert registry.update("b1", "t1", "temperature", 21.5, "C", ts)
+    assert not registry.update("b1", "t1", "temperature", 30.0, "C", ts - timedelta(minutes=1))
+    assert registry.latest("b1", "t1")["last_value"] == 21.5
+
+    assert registry.update("b1", "t1", "temperature", 22.0, "C", ts + timedelta(minutes=1))
+    assert registry.latest("b1", "t1")["last_value"] == 22.0
+
+
+def test_aware_timestamps_are_stored_as_naive_utc():
+    registry = SensorRegistry()
+    aware = datetime(2026, 1, 1, 14, 0, tzinfo=timezone(timedelta(hours=2)))
+    registry.update("b1", "t1", "temperature", 21.5, "C", aware)
+    assert registry.latest("b1", "t1")["last_update"] == datetime(2026, 1, 1, 12, 0)
@@ -0,0 +1,148 @@
+import asyncio
+
+import pytest
+
+from api.v1.services.single_flight import SingleFlight
+
+
+class Query:
+    """Counts executions; each run waits until released"""
+
+    def __init__(self):
+        self.runs = 0
+        self.release = None
+
+    async def __call__(self):
+        self.runs += 1
+        await self.release.wait()
+        return {"total_co2": self.runs}
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_concurrent_callers_share_one_query():
+    async def scenario():
+        flight, query = SingleFlight(ttl=0), Query()
+        query.release = asyncio.Event()
+        callers = [asyncio.ensure_future(flight.do("key", query)) for _ in range(5)]
+        await asyncio.sleep(0)
+        query.release.set()
+        results = await asyncio.gather(*callers)
+        return flight, query, results
+
+    flight, query, results = run(scenario())
+    assert query.runs == 1
+    assert all(result is results[0] for result in results)
+    assert flight.stats()["coalesced"] == 4
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_cancelled_caller_does_not_cancel_shared_query():
+    async def scenario():
+        flight, query = SingleFlight(ttl=0), Query()
+        query.release = asyncio.Event()
+        first = asyncio.ensure_future(flight.do("key", query))
+        second = asyncio.ensure_future(flight.do("key", query))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        query.release.set()
+        return first, await second, query
+
+    first, result, query = run(scenario())
+    assert first.cancelled()
+    assert result == {"total_co2": 1}
+    assert query.runs == 1
+
+
+def test_caller_timeout_leaves_query_running():
+    async def scenario():
+        flight, query = SingleFlight(ttl=0), Query()
+        query.release = asyncio.Event()
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(flight.do("key", query), timeout=0.01)
+        # A later caller joins the same query instead of starting another
+        later = asyncio.ensure_future(flight.do("key", query))
+        await asyncio.sleep(0)
+        query.release.set()
+        return await later, query
+
+    result, query = run(scenario())
+    assert result == {"total_co2": 1}
+    assert query.runs == 1
+
+
+def test_errors_are_shared_and_not_cached():
+    async def scenario():
+        flight, calls = SingleFlight(ttl=60), []
+
+        async def failing():
+            calls.append(1)
+            await asyncio.sleep(0)
+            raise RuntimeError("boom")
+
+        results = await asyncio.gather(
+            flight.do("key", failing), flight.do("key", failing), return_exceptions=True
+        )
+        with pytest.raises(RuntimeError):
+            await flight.do("key", failing)
+        return results, calls
+
+    results, calls = run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert len(calls) == 2
+
+
+def grouped(ttl):
+    return SingleFlight(ttl=ttl, group=lambda key: key[1])
+
+
+def test_ttl_cache_and_forget_group():
+    async def scenario():
+        flight, query = grouped(60), Query()
+        query.release = asyncio.Event()
+        query.release.set()
+        first = await flight.do(("aggregates", "b1"), query)
+        other = await flight.do(("aggregates", "b2"), query)
+        cached = await flight.do(("aggregates", "b1"), query)
+        flight.forget_group("b1")
+        fresh = await flight.do(("aggregates", "b1"), query)
+        return first, cached, fresh, other, await flight.do(("aggregates", "b2"), query), flight
+
+    first, cached, fresh, other, other_cached, flight = run(scenario())
+    assert cached is first
+    assert fresh == {"total_co2": 3}
+    assert other_cached is other
+    assert flight.stats()["cache_hits"] == 2
+
+
+def test_group_index_follows_eviction():
+    async def scenario():
+        flight, query = SingleFlight(ttl=60, max_entries=2, group=lambda key: key[1]), Query()
+        query.release = asyncio.Event()
+        query.release.set()
+        for building in ("b1", "b2", "b3"):
+            await flight.do(("aggregates", building), query)
+        return flight
+
+    flight = run(scenario())
+    assert set(flight._groups) == {"b2", "b3"}
+
+
+def test_query_forgotten_while_running_is_not_cached():
+    async def scenario():
+        flight, query = grouped(60), Query()
+        query.release = asyncio.Event()
+        running = asyncio.ensure_future(flight.do(("aggregates", "b1"), query))
+        await asyncio.sleep(0)
+        flight.forget_group("b1")  # a write landed meanwhile
+        query.release.set()
+        stale = await running
+        return stale, await flight.do(("aggregates", "b1"), query), flight
+
+    stale, fresh, flight = run(scenario())
+    assert stale == {"total_co2": 1}
+    assert fresh == {"total_co2": 2}
+    assert set(flight._groups["b1"]) == {("aggregates", "b1")}
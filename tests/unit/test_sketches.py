@@ -0,0 +1,88 @@
+import random
+from bisect import bisect_left
+
+import pytest
+
+from api.v1.services.sketches import HyperLogLog, TDigest, merge_payloads
+
+
+def rank_error(values, estimate, q):
+    """How far (as a fraction of rank) the estimate is from the true q-quantile"""
+    return abs(bisect_left(values, estimate) / len(values) - q)
+
+
+@pytest.fixture
+def values():
+    rng = random.Random(7)
+    return [rng.lognormvariate(3, 1) for _ in range(50000)]
+
+
+def test_tdigest_quantiles_are_accurate(values):
+    digest = TDigest()
+    for value in values:
+        digest.add(value)
+    ordered = sorted(values)
+    for q in (0.01, 0.1, 0.5, 0.9, 0.99):
+        assert rank_error(ordered, digest.quantile(q), q) < 0.01
+    assert digest.quantile(0.0) == pytest.approx(ordered[0])
+    assert digest.quantile(1.0) == pytest.approx(ordered[-1])
+
+
+def test_tdigest_serialisation_round_trip(values):
+    digest = TDigest()
+    for value in values[:5000]:
+        digest.add(value)
+    restored = TDigest.from_bytes(digest.to_bytes())
+    assert restored.total == 5000
+    assert restored.quantile(0.9) == pytest.approx(digest.quantile(0.9))
+
+
+def test_merged_single_value_digests_match_one_digest(values):
+    """The portfolio case: one digest per building-day, merged at query time"""
+    payloads = []
+    for value in values[:20000]:
+        digest = TDigest()
+        digest.add(value)
+        payloads.append(digest.to_bytes())
+    merged = merge_payloads("tdigest", payloads)
+    ordered = sorted(values[:20000])
+    assert merged.total == 20000
+    assert len(merged.means) <= 2 * merged.compression
+    for q in (0.5, 0.9, 0.99):
+        assert rank_error(ordered, merged.quantile(q), q) < 0.01
+
+
+def test_merge_payloads_of_nothing_is_none():
+    assert merge_payloads("tdigest", []) is None
+    assert merge_payloads("hll", []) is None
+
+
+def test_hll_count_is_within_error():
+    hll = HyperLogLog()
+    for i in range(100000):
+        hll.add(f"badge-{i}")
+    assert hll.count() == pytest.approx(100000, rel=3 * hll.standard_error)
+
+
+def test_hll_small_counts_are_exact_enough():
+    hll = HyperLogLog()
+    for i in range(100):
+        hll.add(f"badge-{i}")
+        hll.add(f"badge-{i}")  # repeats do not count
+    assert hll.count() == pytest.approx(100, abs=1)
+
+
+def test_hll_merge_is_the_union():
+    daily = []
+    for day in range(7):
+        hll = HyperLogLog()
+        for i in range(day * 1000, day * 1000 + 3000):  # overlapping visitors
+            hll.add(f"badge-{i}")
+        daily.append(hll.to_bytes())
+    merged = merge_payloads("hll", daily)
+    assert merged.count() == pytest.approx(9000, rel=3 * merged.standard_error)
+
+
+def test_hll_precision_mismatch_is_rejected():
+    with pytest.raises(ValueError):
+        HyperLogLog(14).merge(HyperLogLog(12))